@@ -14,49 +14,15 @@ print("Successfully downloaded !")
 
 template_df.head()
 
-def parse_template_with_logs(template_df):
-    rules = {}
-
-    print("📌 Parsing conjugation template...")
-
-    # Step 1: Extract header IDs
-    ending_class_ids = template_df.iloc[0, 2:].astype(int).tolist()
-    verb_class_ids = template_df.iloc[2:, 0].astype(int).tolist()
-
-    print(f"📋 Found {len(verb_class_ids)} verb classes and {len(ending_class_ids)} ending classes.")
-
-    for i, verb_class in enumerate(verb_class_ids):
-        rules[verb_class] = {}
-        for j, ending_class in enumerate(ending_class_ids):
-            cell = template_df.iloc[i + 2, j + 2]
-
-            # ✅ Allow (,,) to be parsed — don't skip it!
-            if pd.isna(cell) or str(cell).strip() in {"", "NaN"}:
-                continue
-
-            print(f"🔍 Verb Class {verb_class}, Ending Class {ending_class}: Raw Cell = {cell}")
-
-            try:
-                # Clean and split
-                clean = str(cell).strip().strip("()")
-                parts = [p.strip() if p.strip() != 'None' else None for p in clean.split(",")]
-
-                stop_idx = int(parts[0]) if parts[0] not in [None, ""] else None
-                postfix = parts[1] if parts[1] not in [None, ""] else ""
-                start_idx = int(parts[2]) if parts[2] not in [None, ""] else None
-
-                rules[verb_class][ending_class] = (stop_idx, postfix, start_idx)
-
-                print(f"✅ Parsed: (stop_idx={stop_idx}, postfix='{postfix}', start_idx={start_idx})")
-
-            except Exception as e:
-                print(f"⚠️ Failed to parse at Verb Class {verb_class}, Ending Class {ending_class}: {cell} — {e}")
-                continue
-
-    print("✅ Finished parsing template.")
-    return rules
-
-parse_template_with_logs(template_df)
+# The template is compiled once into a rule matrix and cached (see scripts/koparadigm_template.py)
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from koparadigm_template import load_template
+
+template = load_template()
+print(f"📋 {template.matrix.shape[0] - 1} verb classes × {template.matrix.shape[1] - 1} ending classes, "
+      f"{len(template.rules)} distinct rules.")
+template.as_dict()
 
 
 # %%
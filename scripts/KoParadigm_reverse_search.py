@@ -13,185 +13,66 @@
 #       2 - I reduce the list of eligible verbs using the dictionary of verb class and the ending class
 #       3 - I compute the rules in reverse and see whether it matches one of the reduced list.
 #       4 - (optional) I compute the rules in the normal order given these reductions
+#   When several lemmas remain, they are ranked with a corpus frequency prior (lemma_prior.py) and only checked
+#   best-first until the top ones are confirmed.
 
 # %%
 # Step 1
 
 from collections import defaultdict
-import pandas as pd
-import jamo
-from jamo import h2j, j2hcj
+from koparadigm_lookup import (EndingTrie, VerbIndex, detect_candidate_endings, filter_candidates,
+                               rules_by_ending_class)
+from koparadigm_bundle import open_bundle
 
-# ✅ Paths to KoParadigm files
-verbs_path = r"C:\Users\Nerros\Documents\Korean_Language_App\data\vocab\koparadigm_vocab\koparadigm_verbs_df_jamo.csv"
-endings_path = r"C:\Users\Nerros\Documents\Korean_Language_App\data\vocab\koparadigm_vocab\koparadigm_endings.csv"
+# ✅ KoParadigm verbs, endings and template, from the binary bundle (see koparadigm_bundle.py)
+bundle = open_bundle()
 
-# ✅ Load verbs (assumed format: [lemma, class_id])
-verbs_df = pd.read_csv(verbs_path, header=None, names=["Num", "Verbs", "Class", "Jamo"])
-print("✅ verbs_df loaded:", verbs_df.shape)
-
-# ✅ Load endings (assumed format: [ending, class_id])
-endings_df = pd.read_csv(endings_path, header=None, names=["Num", "Ending", "Class"])
-print("✅ endings_df loaded:", endings_df.shape)
+# ✅ Load endings into a reversed jamo suffix trie (see koparadigm_lookup.py)
+ending_trie = EndingTrie.from_bundle(bundle)
+print("✅ ending_trie loaded:", ending_trie.size, "endings")
 
 # ✅ Sample conjugated words
 conjugated_word_list = ["하면서"]
 
-# ✅ Decompose Hangul syllable into (choseong, jungseong, jongseong)
-def get_jamo(syllable):
-    decomposed = j2hcj(h2j(syllable))
-    if len(decomposed) == 2:
-        return (decomposed[0], decomposed[1], None)
-    elif len(decomposed) == 3:
-        return tuple(decomposed)
-    return (None, None, None)
-
 # ✅ Step 1: Detect possible endings and stem clues
-def detect_candidate_endings_first_jamo(conjugated_word, endings_df):
-    candidates = []
-
-    for _, row in endings_df.iterrows():
-        ending = row["Ending"]
-        class_id = row["Class"]
-
-        if conjugated_word.endswith(ending):
-            stem_candidate = conjugated_word[:-len(ending)]
-            if not stem_candidate:
-                continue
-
-            last_syllable = stem_candidate[-1]
-            choseong_last, jungseong_last, jongseong_last = get_jamo(last_syllable)
-
-            # ✅ Get first syllable and decompose it
-            first_syllable = stem_candidate[0]
-            choseong_first, jungseong_first, jongseong_first = get_jamo(first_syllable)
-
-            candidates.append({
-                "word": conjugated_word,
-                "ending": ending,
-                "class_id": class_id,
-                "stem_candidate": stem_candidate,
-                "last_syllable": last_syllable,
-                "last_jamo": (choseong_last, jungseong_last, jongseong_last),
-                "first_syllable": first_syllable,
-                "first_jamo": choseong_first,  # ✅ Add this line
-            })
-
-    return candidates
+#   The trie returns every ending the word ends with in O(len(word)), at jamo level,
+#   so endings starting with a final consonant (ㄴ가, ㄹ까, ㅂ니다...) are found as well.
+def detect_candidate_endings_first_jamo(conjugated_word, ending_trie):
+    return detect_candidate_endings(conjugated_word, ending_trie)
+
 # ✅ Run Step 1 with updated function and show first jamo too
 for word in conjugated_word_list:
     print(f"\n🔎 Analyzing: {word}")
-    candidates = detect_candidate_endings_first_jamo(word, endings_df)
+    candidates = detect_candidate_endings_first_jamo(word, ending_trie)
     for c in candidates:
         print(f"➡ Ending '{c['ending']}' (Class {c['class_id']}), Stem: '{c['stem_candidate']}', First jamo: '{c['first_jamo']}', Last jamo: {c['last_jamo']}")
 
-import pandas as pd
-
-def parse_template_with_logs(template_df):
-    rules = {}
-
-    print("📌 Parsing conjugation template...")
-
-    # Step 1: Extract header IDs
-    ending_class_ids = template_df.iloc[0, 2:].astype(int).tolist()
-    verb_class_ids = template_df.iloc[2:, 0].astype(int).tolist()
-
-    print(f"📋 Found {len(verb_class_ids)} verb classes and {len(ending_class_ids)} ending classes.")
-
-    for i, verb_class in enumerate(verb_class_ids):
-        rules[verb_class] = {}
-        for j, ending_class in enumerate(ending_class_ids):
-            cell = template_df.iloc[i + 2, j + 2]
-
-            # ✅ Allow (,,) to be parsed — don't skip it!
-            if pd.isna(cell) or str(cell).strip() in {"", "NaN"}:
-                continue
-
-            try:
-                # Clean and split
-                clean = str(cell).strip().strip("()")
-                parts = [p.strip() if p.strip() != 'None' else None for p in clean.split(",")]
-
-                stop_idx = int(parts[0]) if parts[0] not in [None, ""] else None
-                postfix = parts[1] if parts[1] not in [None, ""] else ""
-                start_idx = int(parts[2]) if parts[2] not in [None, ""] else None
-
-                rules[verb_class][ending_class] = (stop_idx, postfix, start_idx)
-
-            except Exception as e:
-                continue
+# %%
+# Step 2
 
-    print("✅ Finished parsing template.")
-    return rules
+# ✅ Conjugation rules and verb index (see koparadigm_lookup.py)
+rules_dict = bundle.template().as_dict()
+rules_inverted = rules_by_ending_class(rules_dict)
+verb_index = VerbIndex.from_bundle(bundle)
+print("✅ verb_index loaded:", len(verb_index), "verbs")
 
-template_path = r"C:\Users\Nerros\Documents\Korean_Language_App\data\vocab\koparadigm_vocab\koparadigm_template.csv"
-template_df = pd.read_csv(template_path, header=None)
-rules_dict = parse_template_with_logs(template_df)
-def filter_candidate_verbs(step1_results, verbs_df, rules_dict):
+def filter_candidate_verbs(step1_results, verb_index, rules_inverted):
     """
     Step 2: For each ending match (from step 1), find candidate lemmas:
         - The verb class must support the detected ending class
         - The lemma's initial jamo must match the detected first jamo
+        - When the rule leaves the verb untouched, the lemma's last syllable must match the stem's
     Returns a list of matches with all the information needed for Step 3.
     """
-    filtered = []
-
-    for item in step1_results:
-        ending_class = item["class_id"]
-        first_jamo = item["first_jamo"]
-        ending = item["ending"]
-        word = item["word"]
-        stem_candidate = item["stem_candidate"]
-
-        print(f"\n🔎 STEP 2: Checking '{word}' (Ending '{ending}', Class {ending_class}, Stem '{stem_candidate}', First jamo '{first_jamo}')")
-
-        compatible_found = False
-        match_count = 0
-
-        for verb_class, rule_map in rules_dict.items():
-            if ending_class not in rule_map:
-                continue
-
-            rule = rule_map[ending_class]
-            compatible_found = True
-
-            matching_verbs = verbs_df[
-                (verbs_df["Class"] == verb_class) &
-                (verbs_df["Jamo"] == first_jamo)
-            ]
-
-            print(f"   ✅ Verb Class {verb_class} matches Ending Class {ending_class} with rule {rule} → {len(matching_verbs)} match(es)")
-
-            for _, row in matching_verbs.iterrows():
-                match_count += 1
-                filtered.append({
-                    "lemma": row["Verbs"],
-                    "verb_class": verb_class,
-                    "ending_class": ending_class,
-                    "rule": rule,
-                    "ending": ending,
-                    "original_word": word,
-                    "stem_candidate": stem_candidate,
-                    "first_jamo": first_jamo,
-                })
-                print(f"      ➕ Matched lemma: {row['Verbs']}")
-
-        if not compatible_found:
-            print(f"   ❌ No verb classes compatible with ending class {ending_class}.")
-        elif match_count == 0:
-            print(f"   ⚠️ Verb classes exist, but no lemma with first jamo '{first_jamo}' matched.")
-
+    filtered = filter_candidates(step1_results, verb_index, rules_inverted)
     print(f"\n✅ STEP 2 COMPLETE: Found {len(filtered)} total candidate(s) across all matches.\n")
     return filtered
 
-# Load the updated file with first_jamo
-verbs_df = pd.read_csv(r"C:\Users\Nerros\Documents\Korean_Language_App\data\vocab\koparadigm_vocab\koparadigm_verbs_df_jamo.csv")
-
 # Step 1
-step1_results = detect_candidate_endings_first_jamo("하면서", endings_df)
+step1_results = detect_candidate_endings_first_jamo("하면서", ending_trie)
 
 # Step 2
-filtered_candidates = filter_candidate_verbs(step1_results, verbs_df, rules_dict)
+filtered_candidates = filter_candidate_verbs(step1_results, verb_index, rules_inverted)
 
 # Preview result
 for c in filtered_candidates[:5]:  # show first 5 matches
@@ -202,15 +83,52 @@ for vc, endings in rules_dict.items():
     if 2 in endings:
         print(f"✅ Verb Class {vc} has a rule for Ending Class 2 → {endings[2]}")
 
-filtered = verbs_df[
-    (verbs_df["Class"] == vc) & (verbs_df["first_jamo"] == 'ㅎ')
-]
-print(filtered.head())
+filtered = [verb_index.verbs[i] for i in verb_index.candidates(vc, 'ㅎ')]
+print(filtered[:5])
 
-print(ord('ㅎ'))  # should be 54620
+print(ord('ㅎ'))  # should be 12622
 
-verbs_df["first_jamo"].apply(lambda x: ord(x) if isinstance(x, str) else x).value_counts()
 
 
+# %%
+# Step 3
+
+import time
+from koparadigm_lookup import InverseRules
+
+# ✅ The template rules run backwards: the word itself gives the few stems it can come from
+#   (see InverseRules in koparadigm_lookup.py), no verb list to scan
+inverse_rules = InverseRules.from_bundle(bundle)
+
+for word in conjugated_word_list + ["좋습니다", "한가", "와서"]:
+    start = time.perf_counter()
+    analyses = inverse_rules.stems(word)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"\n🔎 {word}: {len(analyses)} analysis(es) in {elapsed:.2f}ms")
+    for lemma, verb_class, ending, ending_class, rule in analyses:
+        print(f"➡ Lemma: {lemma} (Class {verb_class}) | Ending: {ending} (Class {ending_class}) | Rule: {rule}")
+
+# %%
+# Ranking
+
+from koparadigm_rules import combine
+from koparadigm_lookup import to_jamo
+from lemma_prior import load_prior, top_k
+
+# ✅ Frequency prior over the corpus frequency lists: candidates are checked best-first, and the search stops
+#   once the best one is confirmed, since every remaining candidate has a lower prior
+prior = load_prior()
+
+for word in ["하면서", "좋습니다"]:
+    checked = []
+    def produces_word(candidate):
+        checked.append(candidate)
+        return word in combine(to_jamo(candidate["lemma"]), to_jamo(candidate["ending"]), candidate["rule"])
+
+    step2 = filter_candidates(detect_candidate_endings(word, ending_trie), verb_index, rules_inverted)
+    best = top_k(step2, lambda candidate: prior.score(candidate["lemma"]), produces_word, k=1)
+    print(f"\n🔎 {word}: {len(step2)} candidate(s), {len(checked)} checked")
+    for score, c in best:
+        print(f"➡ Lemma: {c['lemma']} | Ending: {c['ending']} | Rule: {c['rule']} | Prior: {score:.2f}")
 
 # %%
@@ -11,8 +11,9 @@
 import pandas as pd
 import os
 from pathlib import Path
-from jamo import h2j, j2hcj
 from koparadigm import __file__ as kp_file
+from hangul import first_jamos
+from koparadigm_bundle import build_bundle
 
 # Step 1: Locate koparadigm.xlsx inside the installed module
 xlsx_path = Path(kp_file).resolve().parent / "koparadigm.xlsx"
@@ -22,17 +23,8 @@ verbs_df = pd.read_excel(xlsx_path, sheet_name='Verbs')
 endings_df = pd.read_excel(xlsx_path, sheet_name='Endings')
 template_df = pd.read_excel(xlsx_path, sheet_name='Template', header=None)
 
-# Step 3: Add first_jamo column to verbs_df
-def extract_first_jamo(word):
-    if not word or not isinstance(word, str):
-        return None
-    try:
-        jamos = j2hcj(h2j(word[0]))
-        return jamos[0] if jamos else None
-    except:
-        return None
-
-verbs_df["first_jamo"] = verbs_df["Verb"].apply(extract_first_jamo)
+# Step 3: Add first_jamo column to verbs_df (vectorized, see hangul.py)
+verbs_df["first_jamo"] = first_jamos(verbs_df["Verb"].tolist())
 
 # Step 4: Define output folder relative to this script
 project_root = Path(__file__).resolve().parent.parent
@@ -44,8 +36,15 @@ verbs_df.to_csv(output_dir / "koparadigm_verbs_df_jamo.csv", index=False, encodi
 endings_df.to_csv(output_dir / "koparadigm_endings.csv", index=False, encoding='utf-8-sig')
 template_df.to_csv(output_dir / "koparadigm_template.csv", index=False, header=False, encoding='utf-8-sig')
 
+# Step 6: Pack verbs, endings and the compiled template into the binary bundle every KoParadigm script loads
+bundle_path = output_dir / "koparadigm.bundle"
+n_verbs, n_endings, n_rules = build_bundle(bundle_path, output_dir / "koparadigm_verbs_df_jamo.csv",
+                                           output_dir / "koparadigm_endings.csv",
+                                           output_dir / "koparadigm_template.csv")
+
 # ✅ Summary
 print("✅ KoParadigm data exported to:", output_dir)
+print(f"📦 Bundle: {n_verbs} verbs, {n_endings} endings, {n_rules} rules → {bundle_path.name}")
 print("🔤 Columns in verbs_df:", verbs_df.columns.tolist())
 
 # %%
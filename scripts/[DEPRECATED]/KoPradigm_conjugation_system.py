@@ -16,52 +16,17 @@
 
 # %% 
 # Parsing the rules of conjugation
+#   The template is compiled once into a rule matrix and cached with the CSV checksum (see scripts/koparadigm_template.py)
+import sys
 import pandas as pd
-template_path = r"C:\Users\Nerros\Documents\Korean_Language_App\data\vocab\koparadigm_vocab\koparadigm_template.csv"
-template_df = pd.read_csv(template_path, header=None)
-print("✅ template_df was correctly loaded:", template_df.shape)
-
-def parse_template_with_logs(template_df):
-    rules = {}
-
-    print("📌 Parsing conjugation template...")
-
-    # Step 1: Extract header IDs
-    ending_class_ids = template_df.iloc[0, 2:].astype(int).tolist()
-    verb_class_ids = template_df.iloc[2:, 0].astype(int).tolist()
-
-    print(f"📋 Found {len(verb_class_ids)} verb classes and {len(ending_class_ids)} ending classes.")
-
-    for i, verb_class in enumerate(verb_class_ids):
-        rules[verb_class] = {}
-        for j, ending_class in enumerate(ending_class_ids):
-            cell = template_df.iloc[i + 2, j + 2]
-            if pd.isna(cell) or str(cell).strip() in {"", "(,,)", "NaN"}:
-                continue
-
-            print(f"🔍 Verb Class {verb_class}, Ending Class {ending_class}: Raw Cell = {cell}")
-
-            try:
-                # Clean and split
-                clean = str(cell).strip().strip("()")
-                parts = [p.strip() if p.strip() != 'None' else None for p in clean.split(",")]
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from koparadigm_template import load_template
 
-                stop_idx = int(parts[0]) if parts[0] not in [None, ""] else None
-                postfix = parts[1] if parts[1] not in [None, ""] else ""
-                start_idx = int(parts[2]) if parts[2] not in [None, ""] else None
-
-                rules[verb_class][ending_class] = (stop_idx, postfix, start_idx)
-
-                print(f"✅ Parsed: (stop_idx={stop_idx}, postfix='{postfix}', start_idx={start_idx})")
-
-            except Exception as e:
-                print(f"⚠️ Failed to parse at Verb Class {verb_class}, Ending Class {ending_class}: {cell} — {e}")
-                continue
-
-    print("✅ Finished parsing template.")
-    return rules
-
-rules_dict = parse_template_with_logs(template_df)
+template_path = r"C:\Users\Nerros\Documents\Korean_Language_App\data\vocab\koparadigm_vocab\koparadigm_template.csv"
+template = load_template(template_path)
+rules_dict = template.as_dict()
+print(f"✅ Template loaded: {len(rules_dict)} verb classes, {len(template.rules)} distinct rules.")
 
 verbs_path = r"C:\Users\Nerros\Documents\Korean_Language_App\data\vocab\koparadigm_vocab\koparadigm_verbs.csv"
 verbs_df = pd.read_csv(verbs_path, header=None, names=["Num", "Verb", "Class"])
@@ -84,14 +49,11 @@ def get_all_forms(stem, verbs_df, endings_df, rules_dict, save_to_csv=False, csv
     Generate all conjugated forms for a given Korean stem using KoParadigm logic.
     Optionally save the output to CSV.
     """
-    import re
+    import sys
     import pandas as pd
-
-    def decompose(word):
-        return list(word)  # Naive: no jamo split, just character-level for now
-
-    def compose(chars):
-        return ''.join(chars)
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+    from koparadigm_rules import combine
+    from hangul import to_jamo
 
     results = []
 
@@ -124,17 +86,8 @@ def get_all_forms(stem, verbs_df, endings_df, rules_dict, save_to_csv=False, csv
 
         print(f"🔧 Applying rule {rule} for ending '{ending}' (class {ending_class})")
 
-        try:
-            verb_jamos = decompose(stem)
-            ending_jamos = decompose(ending)
-
-            modified_stem = verb_jamos if stop_idx is None else verb_jamos[:stop_idx]
-            modified_stem += list(postfix) if postfix else []
-
-            modified_ending = ending_jamos if start_idx is None else ending_jamos[start_idx:]
-
-            full_form = compose(modified_stem + modified_ending)
-
+        # Rules are applied at jamo level (see scripts/koparadigm_rules.py); optional contractions give two forms
+        for full_form in combine(to_jamo(stem), to_jamo(ending), rule):
             results.append({
                 "base_stem": stem,
                 "verb_class": verb_class,
@@ -146,10 +99,6 @@ def get_all_forms(stem, verbs_df, endings_df, rules_dict, save_to_csv=False, csv
 
             print(f"✅ Created form: {full_form}")
 
-        except Exception as e:
-            print(f"⚠️ Error processing rule {rule} for {stem} + {ending}: {e}")
-            continue
-
     if save_to_csv:
         if not csv_path:
             csv_path = f"{stem}_conjugations.csv"
@@ -170,63 +119,30 @@ print(rules_dict.get(17, "❌ No entry found"))
 
 # %%
 # koparadigm_full_export
+#   Conjugates the stems in a process pool and streams the forms into parquet row groups
+#   (see scripts/koparadigm_export.py) instead of one serial loop and one giant list.
+#   koparadigm.Paradigm remains the reference: the export is aborted unless a sample of verbs conjugates the same.
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from koparadigm_export import EXPORT_PATH, export_paradigms
+
+if __name__ == "__main__":
+    count = export_paradigms()
+    print(f"\n📦 Saved {count:,} forms to Parquet: {EXPORT_PATH}")
 
-import pandas as pd
-from koparadigm import Paradigm
-
-# 1. Load verb stems from your local CSV
-verb_path = r"C:\Users\Nerros\Documents\Korean_Language_App\data\vocab\koparadigm_vocab\koparadigm_verbs.csv"
-verbs_df = pd.read_csv(verb_path, header=0, names=["Num", "Verb", "Class"])
-verbs_df = verbs_df[verbs_df["Class"] != "Class"]
-verbs_df["Class"] = verbs_df["Class"].astype(int)
-verb_stems = verbs_df["Verb"].unique().tolist()
-
-print(f"✅ Loaded {len(verb_stems)} unique verb stems")
-
-# 2. Load KoParadigm generator
-p = Paradigm()
-
-# 3. Flatten helper
-def flatten_koparadigm_output(stem, conjugated):
-    result = []
-    for category, pairs in conjugated:
-        for ending, form in pairs:
-            result.append({
-                "stem": stem,
-                "category": category,
-                "ending": ending,
-                "form": form
-            })
-    return result
-
-# 4. Process all stems
-all_conjugations = []
-
-for idx, stem in enumerate(verb_stems):
-    try:
-        print(f"[{idx+1}/{len(verb_stems)}] 🔁 Conjugating '{stem}'...")
-        conjugated = p.conjugate(stem)
-        flattened = flatten_koparadigm_output(stem, conjugated)
-        all_conjugations.extend(flattened)
-    except Exception as e:
-        print(f"❌ Error for '{stem}': {e}")
-
-# 5. Save to CSV
-parquet_path = r"C:\Users\Nerros\Documents\Korean_Language_App\data\vocab\koparadigm_vocab\koparadigm_conjugations.parquet"
-df = pd.DataFrame(all_conjugations)
-df.to_parquet(parquet_path, index=False)
-print(f"\n📦 Saved to Parquet: {parquet_path}")
 # %%
-# Load Parquet when needed
-parquet_path = r"C:\Users\Nerros\Documents\Korean_Language_App\data\vocab\koparadigm_vocab\koparadigm_conjugations.parquet"
-df = pd.read_parquet(parquet_path)
+# Find the stem of a conjugated form with the compiled lexicon (see scripts/koparadigm_lexicon.py)
+#   instead of filtering the full parquet for every word.
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from koparadigm_lexicon import open_lexicon
+
+lexicon = open_lexicon()
 
-# Example: Find the stem of a conjugated form
 def find_stem(word):
-    result = df[df["form"] == word]
-    if not result.empty:
-        return result.iloc[0]["stem"]
-    else:
-        return None
+    entries = lexicon.lookup(word)
+    return entries[0][0] if entries else None
 
 print(find_stem("갔어요"))  # Output: 가
@@ -0,0 +1,170 @@
+# %%
+# This module holds the article picker used by main.py and article_selection_interface.py.
+#   Instead of one SelectMultiple listing every row of wikipedia_korean_articles_cleaned.csv, the picker has a
+#   search box: what is typed is matched against title_ko, title_final and category through a character n-gram index
+#   (every bigram of the normalized text → sorted row ids, built with numpy in CSR form). A query is split on spaces;
+#   each term becomes the intersection of the posting arrays of its bigrams (smallest first), the rows of all terms
+#   are intersected, and the few remaining rows are confirmed with a substring test. Single-character terms use a
+#   unigram index.
+#   Results are shown one page at a time, and the selection is kept across searches and pages.
+
+import numpy as np
+import pandas as pd
+import ipywidgets as widgets
+
+# ✅ Settings
+SEARCH_COLUMNS = ["title_ko", "title_final", "category"]
+PAGE_SIZE = 20
+FIELD_SEPARATOR = "\n"  # never typed in the box, so no n-gram spans two fields
+
+def normalize(text):
+    return str(text).casefold()
+
+def grams(text, n):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+# ✅ N-gram index
+def gram_code(gram):
+    # Unigrams are their code point; bigrams are shifted above every code point so the two never collide
+    if len(gram) == 1:
+        return ord(gram)
+    return ((ord(gram[0]) + 1) << 21) | ord(gram[1])
+
+class NgramIndex:
+    def __init__(self, texts):
+        """Postings in CSR form: sorted gram codes, offsets into one array of row ids (sorted per gram)."""
+        self.texts = [normalize(text) for text in texts]
+        joined = FIELD_SEPARATOR.join(self.texts) + FIELD_SEPARATOR
+        points = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+        lengths = np.fromiter((len(text) + 1 for text in self.texts), dtype=np.int64, count=len(self.texts))
+        row_of = np.repeat(np.arange(len(self.texts), dtype=np.int32), lengths)
+        blank = (points == ord(FIELD_SEPARATOR)) | (points == ord(" ")) | (points == ord("\t"))
+
+        unigrams, bigrams = points, ((points[:-1] + 1) << 21) | points[1:]
+        codes = np.concatenate([unigrams[~blank], bigrams[~(blank[:-1] | blank[1:])]])
+        rows = np.concatenate([row_of[~blank], row_of[:-1][~(blank[:-1] | blank[1:])]])
+        order = np.lexsort((rows, codes))
+        codes, rows = codes[order], rows[order]
+        keep = np.ones(len(codes), dtype=bool)
+        keep[1:] = (codes[1:] != codes[:-1]) | (rows[1:] != rows[:-1])
+        codes, self.rows = codes[keep], rows[keep]
+
+        self.codes, starts = np.unique(codes, return_index=True)
+        self.offsets = np.append(starts, len(codes)).astype(np.int64)
+        self.all_rows = np.arange(len(self.texts), dtype=np.int32)
+
+    def posting(self, gram):
+        code = gram_code(gram)
+        i = np.searchsorted(self.codes, code)
+        if i == len(self.codes) or self.codes[i] != code:
+            return None
+        return self.rows[self.offsets[i]:self.offsets[i + 1]]
+
+    @classmethod
+    def from_frame(cls, df, columns=SEARCH_COLUMNS):
+        columns = [c for c in columns if c in df.columns]
+        return cls(df[columns].fillna("").astype(str).agg(FIELD_SEPARATOR.join, axis=1))
+
+    def __len__(self):
+        return len(self.texts)
+
+    def term_rows(self, term):
+        keys = grams(term, 2) or {term}
+        # A missing gram means no match at all; otherwise the smallest posting array is intersected first
+        arrays = sorted((self.posting(key) for key in keys), key=lambda a: -1 if a is None else len(a))
+        if arrays[0] is None:
+            return None
+        rows = arrays[0]
+        for array in arrays[1:]:
+            rows = np.intersect1d(rows, array, assume_unique=True)
+            if not len(rows):
+                break
+        return rows
+
+    def search(self, query):
+        """Sorted row ids whose text contains every space-separated term of the query."""
+        terms = sorted(set(normalize(query).split()), key=len, reverse=True)
+        if not terms:
+            return self.all_rows
+        rows = None
+        for term in terms:
+            term_rows = self.term_rows(term)
+            if term_rows is None:
+                return self.all_rows[:0]
+            rows = term_rows if rows is None else np.intersect1d(rows, term_rows, assume_unique=True)
+            if not len(rows):
+                return rows
+        # For longer terms the bigrams only prove the pieces are there; the substring test removes false positives
+        texts = self.texts
+        for term in terms:
+            if len(term) > 2:
+                rows = np.array([r for r in rows.tolist() if term in texts[r]], dtype=np.int32)
+        return rows
+
+# ✅ Search-as-you-type picker
+class ArticlePicker:
+    def __init__(self, df, page_size=PAGE_SIZE):
+        self.df = df.reset_index(drop=True)
+        self.labels = (self.df["title_ko"].astype(str) + " — " + self.df["title_final"].astype(str)).tolist()
+        self.index = NgramIndex.from_frame(self.df)
+        self.page_size = page_size
+        self.matches = self.index.all_rows
+        self.page = 0
+        self.selected = {}  # row id → title_ko, in selection order
+        self.updating = False
+
+        self.query = widgets.Text(placeholder="🔎 Type to filter titles and categories", continuous_update=True,
+                                  layout=widgets.Layout(width='100%'))
+        self.results = widgets.SelectMultiple(rows=page_size, layout=widgets.Layout(width='100%'))
+        self.prev_button = widgets.Button(description="◀", layout=widgets.Layout(width='40px'))
+        self.next_button = widgets.Button(description="▶", layout=widgets.Layout(width='40px'))
+        self.status = widgets.Label()
+        self.query.observe(lambda change: self.set_query(change["new"]), names="value")
+        self.results.observe(self.on_select, names="value")
+        self.prev_button.on_click(lambda b: self.set_page(self.page - 1))
+        self.next_button.on_click(lambda b: self.set_page(self.page + 1))
+        self.widget = widgets.VBox([self.query, self.results,
+                                    widgets.HBox([self.prev_button, self.next_button, self.status])])
+        self.render()
+
+    def set_query(self, query):
+        self.matches = self.index.search(query)
+        self.page = 0
+        self.render()
+
+    def set_page(self, page):
+        self.page = min(max(page, 0), self.page_count() - 1)
+        self.render()
+
+    def page_count(self):
+        return max(-(-len(self.matches) // self.page_size), 1)
+
+    def render(self):
+        rows = self.matches[self.page * self.page_size:(self.page + 1) * self.page_size].tolist()
+        self.updating = True  # replacing the options must not count as unselecting the hidden rows
+        self.results.options = [(self.labels[r], r) for r in rows]
+        self.results.value = [r for r in rows if r in self.selected]
+        self.updating = False
+        self.prev_button.disabled = self.page == 0
+        self.next_button.disabled = self.page >= self.page_count() - 1
+        self.update_status()
+
+    def update_status(self):
+        self.status.value = (f"{len(self.matches)} match(es) — page {self.page + 1}/{self.page_count()} — "
+                             f"{len(self.selected)} selected")
+
+    def on_select(self, change):
+        if self.updating:
+            return
+        for _, r in self.results.options:
+            if r in change["new"]:
+                self.selected.setdefault(r, self.df.at[r, "title_ko"])
+            else:
+                self.selected.pop(r, None)
+        self.update_status()
+
+    def selected_titles(self):
+        return list(self.selected.values())
+
+def load_picker(csv_file, page_size=PAGE_SIZE):
+    return ArticlePicker(pd.read_csv(csv_file), page_size)
@@ -1,6 +1,6 @@
 # %%
 # This script uploads a csv file containing wikipedia articles, and allows you to 
-#   interactively select the wikipedia articles based on their titles. It saves the 
+#   interactively select the wikipedia articles based on their titles (searched as you type). It saves the 
 #   articles into a json and downloads it to be used in the words frequency creation script. 
 #   For it to run properly, two options: 
 #   "Run cell" above, or
@@ -13,6 +13,7 @@ import json
 import ipywidgets as widgets
 from IPython.display import display
 from pathlib import Path
+from article_picker import ArticlePicker
 
 # Use absolute path based on your workspace root:
 WORKSPACE_ROOT = Path("/Users/yannis.daguenet/Documents/korean_language_app")
@@ -38,22 +39,14 @@ df = pd.read_csv(csv_file)
 print("✅ Loaded CSV successfully. Previewing first 10 entries:")
 display(df[['title_ko', 'title_final']].head(10))
 
-# --- Interactive selection with ipywidgets ---
-df['combined'] = df['title_ko'] + " — " + df['title_final']
-options = df['combined'].tolist()
-
-selector = widgets.SelectMultiple(
-    options=options,
-    description='Select',
-    rows=20,
-    layout=widgets.Layout(width='100%')
-)
+# --- Interactive selection: type to filter titles and categories (see article_picker.py) ---
+picker = ArticlePicker(df)
 
 save_button = widgets.Button(description="💾 Save selected titles to JSON", button_style='success')
 output = widgets.Output()
 
 def save_selected_titles(b):
-    selected_korean = [item.split(" — ")[0] for item in selector.value]
+    selected_korean = picker.selected_titles()
     json_file = JSON_DIR / "selected_articles.json"
     with json_file.open("w", encoding="utf-8") as f:
         json.dump(selected_korean, f, ensure_ascii=False, indent=2)
@@ -62,7 +55,7 @@ def save_selected_titles(b):
         output.clear_output()
         print(f"✅ Saved {len(selected_korean)} articles to {json_file.resolve()}")
 
-display(widgets.VBox([selector, save_button, output]))
+display(widgets.VBox([picker.widget, save_button, output]))
 save_button.on_click(save_selected_titles)
 
 # %%
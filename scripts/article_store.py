@@ -0,0 +1,134 @@
+# %%
+# This module stores downloaded Wikipedia articles in an append-only JSONL file, one article per line.
+#   Every article is written (and flushed) as soon as it is fetched, so a crash or a rate-limit ban
+#   only loses the article that was in flight. When a crawl is restarted, the titles already present
+#   in the JSONL are skipped. A compaction step rebuilds the legacy {title: [paragraphs]} JSON file
+#   (selected_wikipedia_paragraphs.json) read by the other scripts, without holding the corpus in memory.
+#   WikipediaClient fetches article text from the MediaWiki API through the shared HTTP layer (http_cache.py),
+#   so article downloads can be recorded and replayed offline like the Genius requests.
+
+import re
+import json
+import os
+from pathlib import Path
+from requests.utils import default_user_agent
+from http_cache import make_session
+
+# ✅ Default paths
+JSON_DIR = Path("data/json")
+DEFAULT_JSONL = JSON_DIR / "selected_wikipedia_paragraphs.jsonl"
+DEFAULT_JSON = JSON_DIR / "selected_wikipedia_paragraphs.json"
+DEFAULT_USER_AGENT = "Yannis-KoreanCorpus/1.0"
+
+# ✅ Wikipedia client
+SECTION_HEADING = re.compile(r"^(=+)\s*(.*?)\s*\1$", re.MULTILINE)
+
+class WikipediaPage:
+    def __init__(self, title, text):
+        self.title = title
+        self.text = text
+
+    def exists(self):
+        return self.text is not None
+
+class WikipediaClient:
+    """
+    Minimal replacement for wikipediaapi.Wikipedia: page(title) returns an object with exists() and text,
+    built from the plain-text extract of the MediaWiki API. Section headings become plain lines, as in wikipediaapi.
+    """
+
+    def __init__(self, language="ko", user_agent=None, session=None):
+        self.api_url = f"https://{language}.wikipedia.org/w/api.php"
+        self.session = session or make_session()
+        # A requests session always has a User-Agent (python-requests/x), so it is assigned, never defaulted:
+        #   an explicit user_agent wins, a session's own custom one is kept, and MediaWiki never sees python-requests
+        if user_agent or self.session.headers.get("User-Agent") == default_user_agent():
+            self.session.headers["User-Agent"] = user_agent or DEFAULT_USER_AGENT
+
+    def page(self, title):
+        params = {"action": "query", "format": "json", "prop": "extracts", "explaintext": 1,
+                  "exsectionformat": "wiki", "redirects": 1, "titles": title}
+        response = self.session.get(self.api_url, params=params, timeout=30)
+        response.raise_for_status()
+        pages = response.json().get("query", {}).get("pages", {})
+        page = next(iter(pages.values()), {})
+        if "missing" in page or "extract" not in page:
+            return WikipediaPage(title, None)
+        return WikipediaPage(title, SECTION_HEADING.sub(r"\2", page["extract"]))
+
+# ✅ Paragraph extraction
+def split_paragraphs(text):
+    return [p.strip() for p in text.split("\n") if p.strip()]
+
+def get_paragraphs(wiki, title):
+    page = wiki.page(title)
+    if not page.exists():
+        return []
+    return split_paragraphs(page.text)
+
+# ✅ Reading the JSONL
+def iter_articles(jsonl_path=DEFAULT_JSONL):
+    """Yield (title, paragraphs) for every complete line of the JSONL file."""
+    jsonl_path = Path(jsonl_path)
+    if not jsonl_path.exists():
+        return
+    with jsonl_path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash in the middle of a write leaves a truncated last line: ignore it,
+                # the title will simply be fetched again on resume.
+                continue
+            yield record["title"], record["paragraphs"]
+
+def downloaded_titles(jsonl_path=DEFAULT_JSONL):
+    # Missing pages are recorded with an empty paragraph list, so they are not retried either
+    return {title for title, _ in iter_articles(jsonl_path)}
+
+# ✅ Writing the JSONL
+def open_jsonl(jsonl_path=DEFAULT_JSONL, resume=True):
+    jsonl_path = Path(jsonl_path)
+    jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+    f = jsonl_path.open("a" if resume else "w", encoding="utf-8")
+    # Terminate a truncated last line so the next record starts on its own line
+    if resume and jsonl_path.stat().st_size > 0:
+        with jsonl_path.open("rb") as check:
+            check.seek(-1, os.SEEK_END)
+            if check.read(1) != b"\n":
+                f.write("\n")
+    return f
+
+def append_article(f, title, paragraphs):
+    f.write(json.dumps({"title": title, "paragraphs": paragraphs}, ensure_ascii=False) + "\n")
+    f.flush()
+
+# ✅ Compaction into the legacy JSON format
+def compact_jsonl(jsonl_path=DEFAULT_JSONL, json_path=DEFAULT_JSON, titles=None):
+    """
+    Rewrite the JSONL as the legacy {title: [paragraphs]} JSON, one article at a time.
+    Articles without paragraphs are dropped and only the first record of a title is kept.
+    If `titles` is given, only those articles are written.
+    Returns the number of articles written.
+    """
+    wanted = set(titles) if titles is not None else None
+    json_path = Path(json_path)
+    json_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = json_path.with_suffix(json_path.suffix + ".tmp")
+
+    written = set()
+    with tmp_path.open("w", encoding="utf-8") as out:
+        out.write("{")
+        for title, paragraphs in iter_articles(jsonl_path):
+            if not paragraphs or title in written or (wanted is not None and title not in wanted):
+                continue
+            # Same layout as json.dump(..., indent=2) on the full dictionary
+            entry = json.dumps({title: paragraphs}, ensure_ascii=False, indent=2)[1:-2]
+            out.write(("," if written else "") + entry)
+            written.add(title)
+        out.write("\n}" if written else "}")
+    os.replace(tmp_path, json_path)
+    return len(written)
@@ -0,0 +1,60 @@
+# %%
+# This script benchmarks lyrics extraction on saved Genius pages (data/fixtures/genius/*.html).
+#   It compares the previous approach (parse the whole page with BeautifulSoup, walk every div to find the
+#   Lyrics__Container ones, recompile the regexes on each call) with the targeted extraction of genius_harvester.py,
+#   checks that both return the same lyrics and prints the parse time per page.
+#   Any page saved from genius.com can be dropped in the fixtures folder to extend the benchmark.
+
+import re
+import time
+from pathlib import Path
+from bs4 import BeautifulSoup
+from genius_harvester import extract_lyrics
+
+# ✅ Fixtures
+project_root = Path(__file__).resolve().parent.parent
+FIXTURE_DIR = project_root / "data" / "fixtures" / "genius"
+REPEATS = 20
+
+# ✅ Previous implementation, kept as the reference
+def extract_lyrics_full_parse(html_text):
+    html = BeautifulSoup(html_text, "html.parser")
+    lyrics_divs = html.find_all("div", class_=lambda x: x and "Lyrics__Container" in x)
+    lyrics_lines = []
+    for div in lyrics_divs:
+        text = div.get_text(separator="\n").strip()
+        for line in text.splitlines():
+            if (re.match(r"^\d+\sContributors?$", line) or
+                line.endswith(" Lyrics") or
+                re.match(r"^\[.*\]$", line)):
+                continue
+            if re.search(r"[가-힣]", line) or re.search(r"[a-zA-Z]", line):
+                lyrics_lines.append(line)
+    if not lyrics_lines:
+        return "Lyrics not found."
+    return "\n".join(lyrics_lines)
+
+def time_per_page(extract, pages, repeats=REPEATS):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for page in pages:
+            extract(page)
+    return (time.perf_counter() - start) / (repeats * len(pages)) * 1000
+
+# %%
+pages = {path.name: path.read_text(encoding="utf-8") for path in sorted(FIXTURE_DIR.glob("*.html"))}
+if not pages:
+    raise FileNotFoundError(f"⚠️ No HTML fixtures found in {FIXTURE_DIR}")
+
+# 🔍 Both extractions must agree
+for name, page in pages.items():
+    assert extract_lyrics(page) == extract_lyrics_full_parse(page), f"Different lyrics for {name}"
+print(f"✅ Same lyrics from both extractions on {len(pages)} pages "
+      f"({sum(len(p) for p in pages.values()) / len(pages) / 1024:.0f} KB per page on average).")
+
+# ⏱️ Timing
+full_ms = time_per_page(extract_lyrics_full_parse, list(pages.values()))
+targeted_ms = time_per_page(extract_lyrics, list(pages.values()))
+print(f"📄 Full BeautifulSoup parse : {full_ms:8.2f} ms / page")
+print(f"🎯 Targeted extraction     : {targeted_ms:8.2f} ms / page")
+print(f"🚀 Speed-up: x{full_ms / targeted_ms:.1f}")
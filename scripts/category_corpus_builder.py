@@ -0,0 +1,132 @@
+# %%
+# This script builds a Wikipedia corpus from whole categories of the article catalog instead of hand-picked titles.
+#   It reads wikipedia_korean_articles_cleaned.csv, keeps the rows matching the chosen categories and subcategories,
+#   and fetches all matching articles concurrently with a bounded pool of threads. Each category gets its own
+#   shard file (JSONL, one article per line, see article_store.py) and a manifest lists the shards with their sizes.
+#   Shards are resumable: titles already present in a shard are not fetched again.
+#   Readers then load only the shards of the categories being studied with load_shards().
+#   All workers share one pooled session from http_cache.py, so a build can be recorded and replayed offline.
+
+import re
+import json
+import pandas as pd
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http_cache import make_session
+from article_store import WikipediaClient, get_paragraphs, iter_articles, downloaded_titles, open_jsonl, append_article
+
+# ✅ Default paths
+CATALOG_CSV = Path("data/content/wikipedia_korean_articles_cleaned.csv")
+SHARD_DIR = Path("data/content/shards")
+MANIFEST_NAME = "manifest.json"
+USER_AGENT = 'Yannis-KoreanCorpus/1.0 (contact: yannisdaguenet@gmail.com)'
+
+# ✅ Catalog selection
+def select_titles(catalog, categories=None, subcategories=None):
+    """Return {category: [titles]} for the catalog rows matching the given categories / subcategories."""
+    rows = catalog
+    if categories:
+        rows = rows[rows["category"].isin(categories)]
+    if subcategories:
+        rows = rows[rows["subcategory"].isin(subcategories)]
+    return {category: list(dict.fromkeys(group["title_ko"])) for category, group in rows.groupby("category", sort=False)}
+
+def shard_name(category):
+    return re.sub(r'[\s/\\:*?"<>|]+', "_", str(category).strip()) + ".jsonl"
+
+# ✅ Manifest
+def load_manifest(shard_dir=SHARD_DIR):
+    path = Path(shard_dir) / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    with path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(manifest, shard_dir=SHARD_DIR):
+    path = Path(shard_dir) / MANIFEST_NAME
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+def shard_stats(shard_path):
+    articles = paragraphs = 0
+    for _, paras in iter_articles(shard_path):
+        if paras:
+            articles += 1
+            paragraphs += len(paras)
+    return articles, paragraphs
+
+# ✅ Concurrent fetching
+def fetch_title(wiki, title):
+    return title, get_paragraphs(wiki, title)
+
+def build_category_shards(catalog_csv=CATALOG_CSV, categories=None, subcategories=None,
+                          shard_dir=SHARD_DIR, max_workers=8):
+    """
+    Fetch every article of the selected categories into one JSONL shard per category.
+    Returns the updated manifest.
+    """
+    shard_dir = Path(shard_dir)
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    catalog = pd.read_csv(catalog_csv)
+    selection = select_titles(catalog, categories, subcategories)
+    manifest = load_manifest(shard_dir)
+    # One client over a connection pool sized for the workers
+    wiki = WikipediaClient(language='ko', session=make_session(pool_size=max_workers, user_agent=USER_AGENT))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for category, titles in selection.items():
+            shard_path = shard_dir / shard_name(category)
+            done = downloaded_titles(shard_path)
+            remaining = [t for t in titles if t not in done]
+            print(f"📂 {category}: {len(titles)} titles, {len(remaining)} to fetch.")
+
+            # Only this thread writes to the shard; workers just download
+            with open_jsonl(shard_path) as f:
+                futures = [pool.submit(fetch_title, wiki, title) for title in remaining]
+                for future in as_completed(futures):
+                    try:
+                        title, paras = future.result()
+                    except Exception as e:
+                        print(f"⚠️ {category}: {e}. Run again to resume.")
+                        continue
+                    append_article(f, title, paras)
+
+            articles, paragraphs = shard_stats(shard_path)
+            # Only the subcategories actually fetched, plus those of earlier runs already in the shard
+            rows = catalog[catalog["category"] == category]
+            if subcategories:
+                rows = rows[rows["subcategory"].isin(subcategories)]
+            subs = set(rows["subcategory"].dropna().tolist())
+            if done:
+                subs.update(manifest.get(category, {}).get("subcategories", []))
+            subs = sorted(subs)
+            manifest[category] = {"file": shard_path.name, "subcategories": subs,
+                                  "articles": articles, "paragraphs": paragraphs}
+            save_manifest(manifest, shard_dir)
+            print(f"✅ {category}: {articles} articles / {paragraphs} paragraphs in {shard_path}")
+    return manifest
+
+# ✅ Readers
+def available_categories(shard_dir=SHARD_DIR):
+    return list(load_manifest(shard_dir).keys())
+
+def iter_shards(categories, shard_dir=SHARD_DIR):
+    """Yield (title, paragraphs) from the shards of the given categories only."""
+    manifest = load_manifest(shard_dir)
+    for category in categories:
+        if category not in manifest:
+            print(f"⚠️ No shard for category '{category}'.")
+            continue
+        for title, paras in iter_articles(Path(shard_dir) / manifest[category]["file"]):
+            if paras:
+                yield title, paras
+
+def load_shards(categories, shard_dir=SHARD_DIR):
+    return dict(iter_shards(categories, shard_dir))
+
+# %%
+if __name__ == "__main__":
+    CATEGORIES = ["한국의 역사"]  # categories to fetch, None for the whole catalog
+    SUBCATEGORIES = None           # optional subcategory filter
+    manifest = build_category_shards(CATALOG_CSV, CATEGORIES, SUBCATEGORIES)
+    print(json.dumps(manifest, ensure_ascii=False, indent=2))
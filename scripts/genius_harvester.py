@@ -0,0 +1,211 @@
+# %%
+# This module harvests song lyrics from Genius: it searches the API, fetches song details and scrapes the lyrics pages.
+#   All requests go through one pooled session from http_cache.py (connections are reused, 429/5xx are retried,
+#   responses can be recorded and replayed), are spread over a bounded pool of worker threads and are throttled
+#   by one rate limiter per host, shared by all workers. Replayed responses skip the rate limiter.
+#   A song costs one API request (api.genius.com) and one lyrics page (genius.com), and the two hosts have their own
+#   budget, so at the default 10 requests/s per host 40 songs take about 4 seconds (plus one request per 50 songs
+#   for the catalog pages). Lower REQUESTS_PER_SECOND if Genius answers with 429: those are retried after a backoff.
+#   test_genius_harvester.py runs the paging and retry paths against a local stand-in server.
+#   The API token is read from the GENIUS_TOKEN environment variable and the API root can be overridden with
+#   GENIUS_BASE_URL, so the harvester can be pointed at a local stand-in server for testing.
+#   Whole artist catalogs are harvested by paging through /artists/{id}/songs, several artists per job,
+#   and each artist is written to its own shard under data/content/lyrics/ (see lyrics_store.py).
+#   Lyrics are extracted by locating the Lyrics__Container divs with precompiled patterns and reading only
+#   their text, instead of parsing the whole page (see benchmark_lyrics_extraction.py).
+
+import os
+import re
+import html
+import time
+import threading
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from http_cache import make_session
+from lyrics_store import LYRICS_DIR, load_artist_songs, save_artist_songs
+
+# ✅ Settings
+BASE_URL = os.environ.get("GENIUS_BASE_URL", "https://api.genius.com")
+MAX_WORKERS = 8          # songs harvested in parallel
+REQUESTS_PER_SECOND = 10  # per host, shared by all workers
+TIMEOUT = 15             # seconds per request
+SONGS_PER_PAGE = 50      # maximum page size of /artists/{id}/songs
+
+def get_token():
+    token = os.environ.get("GENIUS_TOKEN")
+    if not token:
+        raise RuntimeError("⚠️ Set the GENIUS_TOKEN environment variable to your Genius API access token.")
+    return token
+
+# ✅ Rate limiting shared across threads
+class RateLimiter:
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+# ✅ Lyrics extraction
+CONTAINER_OPEN = re.compile(r'<div\b[^>]*\bclass="[^"]*Lyrics__Container[^"]*"[^>]*>')
+DIV_TAG = re.compile(r"<(/?)div\b[^>]*?(/?)>")
+ANY_TAG = re.compile(r"<[^>]*>")
+CONTRIBUTORS_LINE = re.compile(r"^\d+\sContributors?$")
+SECTION_LINE = re.compile(r"^\[.*\]$")
+KOREAN_OR_LATIN = re.compile(r"[가-힣a-zA-Z]")
+
+def iter_lyrics_containers(html_text):
+    """Yield the inner HTML of each Lyrics__Container div, matching nested divs to find its end."""
+    pos = 0
+    while True:
+        opening = CONTAINER_OPEN.search(html_text, pos)
+        if not opening:
+            return
+        depth = 1
+        for tag in DIV_TAG.finditer(html_text, opening.end()):
+            if tag.group(2):
+                continue  # <div/> opens and closes itself
+            depth += -1 if tag.group(1) else 1
+            if depth == 0:
+                yield html_text[opening.end():tag.start()]
+                pos = tag.end()
+                break
+        else:
+            yield html_text[opening.end():]
+            return
+
+def container_text(container_html):
+    # Same text as BeautifulSoup's get_text(separator="\n"): one line per text node
+    return "\n".join(html.unescape(s) for s in ANY_TAG.split(container_html) if s)
+
+def iter_lyrics_lines(html_text):
+    for container in iter_lyrics_containers(html_text):
+        for line in container_text(container).strip().splitlines():
+            # Skip contributor lines, header lines, bracketed section names
+            if CONTRIBUTORS_LINE.match(line) or line.endswith(" Lyrics") or SECTION_LINE.match(line):
+                continue
+            # Only keep lines with Korean or English
+            if KOREAN_OR_LATIN.search(line):
+                yield line
+
+def extract_lyrics(html_text):
+    lyrics = "\n".join(iter_lyrics_lines(html_text))
+    return lyrics if lyrics else "Lyrics not found."
+
+# ✅ Harvester
+class GeniusHarvester:
+    def __init__(self, token=None, base_url=BASE_URL, max_workers=MAX_WORKERS,
+                 rate=REQUESTS_PER_SECOND, session=None, timeout=TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.auth = {"Authorization": f"Bearer {token or get_token()}"}
+        self.max_workers = max_workers
+        self.session = session or make_session(pool_size=max_workers)
+        self.rate = rate
+        self.limiters = {}  # host → RateLimiter
+        self.limiters_lock = threading.Lock()
+        self.timeout = timeout
+
+    def limiter(self, url):
+        host = urlsplit(url).netloc
+        with self.limiters_lock:
+            if host not in self.limiters:
+                self.limiters[host] = RateLimiter(self.rate)
+            return self.limiters[host]
+
+    def get(self, url, headers=None, params=None):
+        # Responses served from the HTTP cache do not count against the rate limit
+        is_cached = getattr(self.session, "is_cached", None)
+        if not (is_cached and is_cached("GET", url, params)):
+            self.limiter(url).wait()
+        response = self.session.get(url, headers=headers, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+    def api_get(self, path, params=None):
+        return self.get(f"{self.base_url}{path}", headers=self.auth, params=params).json()
+
+    def search_song(self, query):
+        return self.api_get("/search", {"q": query})["response"]["hits"]
+
+    def get_song_details(self, song_id):
+        return self.api_get(f"/songs/{song_id}")
+
+    def scrape_lyrics_from_url(self, url):
+        # The token is only sent to the API, not to the lyrics pages
+        return extract_lyrics(self.get(url).text)
+
+    def harvest_song(self, song_id):
+        song = self.get_song_details(song_id)["response"]["song"]
+        return {
+            "Artist": song["primary_artist"]["name"],
+            "Song Name": song["full_title"],
+            "URL": song["url"],
+            "Lyrics": self.scrape_lyrics_from_url(song["url"]),
+        }
+
+    def harvest_songs(self, song_ids):
+        """Harvest songs concurrently; failed songs are reported and left out. Order is preserved."""
+        def safe_harvest(song_id):
+            try:
+                return self.harvest_song(song_id)
+            except Exception as e:
+                print(f"⚠️ Song {song_id} failed: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return [song for song in pool.map(safe_harvest, song_ids) if song]
+
+    def harvest_query(self, query):
+        hits = self.search_song(query)
+        return self.harvest_songs([hit["result"]["id"] for hit in hits])
+
+    # ✅ Full artist catalogs
+    def find_artist(self, name):
+        """Return (artist_id, artist_name) of the first search hit whose primary artist matches the name."""
+        hits = self.search_song(name)
+        artists = [hit["result"]["primary_artist"] for hit in hits]
+        for artist in artists:
+            if name.lower() in artist["name"].lower():
+                return artist["id"], artist["name"]
+        if artists:
+            return artists[0]["id"], artists[0]["name"]
+        raise LookupError(f"No Genius artist found for '{name}'")
+
+    def iter_artist_songs(self, artist_id, primary_only=True):
+        """Yield every song of the artist, following next_page until the catalog is exhausted."""
+        page = 1
+        while page:
+            data = self.api_get(f"/artists/{artist_id}/songs",
+                                {"per_page": SONGS_PER_PAGE, "page": page, "sort": "title"})["response"]
+            for song in data["songs"]:
+                if not primary_only or song["primary_artist"]["id"] == artist_id:
+                    yield song
+            page = data.get("next_page")
+
+    def harvest_artist(self, name, lyrics_dir=LYRICS_DIR):
+        """Harvest the full catalog of one artist into its shard. Songs already in the shard are skipped."""
+        artist_id, artist_name = self.find_artist(name)
+        songs = list(self.iter_artist_songs(artist_id))
+        existing = load_artist_songs(artist_name, lyrics_dir)
+        known_urls = {song["URL"] for song in existing}
+        todo = [song["id"] for song in songs if song["url"] not in known_urls]
+        print(f"🎤 {artist_name}: {len(songs)} songs, {len(todo)} to harvest.")
+        harvested = self.harvest_songs(todo)
+        save_artist_songs(artist_name, existing + harvested, lyrics_dir, artist_id=artist_id, query=name)
+        return artist_name, len(existing) + len(harvested)
+
+    def harvest_artists(self, names, lyrics_dir=LYRICS_DIR):
+        results = {}
+        for name in names:
+            try:
+                artist_name, count = self.harvest_artist(name, lyrics_dir)
+                results[artist_name] = count
+            except Exception as e:
+                print(f"⚠️ Artist '{name}' failed: {e}")
+        return results
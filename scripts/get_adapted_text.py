@@ -3,7 +3,7 @@
 # It loads paragraphs from a Wikipedia paragraph dataset, computes token-level coverage using the Okt tokenizer,
 # and selects blocks with 93–97% known word coverage. Sentence blocks are shown one at a time, and the user can
 # mark words as known or unknown via toggle buttons. The app updates progress with a progress bar and saves
-# session data to persistent JSON files.
+# session data to persistent JSON files. Duplicate paragraphs are removed before coverage is computed.
 
 # 📁 Imports
 import os
@@ -15,6 +15,9 @@ from IPython.display import display, clear_output
 import ipywidgets as widgets
 import matplotlib.pyplot as plt
 import threading
+from paragraph_dedup import dedup_paragraphs, format_report
+from reader_view import ReaderView
+from session_engine import ParagraphPrefetcher, apply_statuses, serialized
 
 # ✅ File paths
 BASE_DIR = Path("data")
@@ -40,13 +43,16 @@ with open(json_path, "r", encoding="utf-8") as f:
     wiki_paragraphs = json.load(f)
 
 paragraphs = [para.strip() for paras in wiki_paragraphs.values() for para in paras if para.strip()]
+paragraphs, dedup_report = dedup_paragraphs(paragraphs)
+print(format_report(dedup_report))
 df = pd.DataFrame(paragraphs, columns=["korean"])
 
 # ✅ Tokenizer + coverage
 okt = Okt()
+morphs = serialized(okt.morphs)  # the prefetch thread and the foreground share one Okt
 
 def korean_known_coverage(text):
-    tokens = okt.morphs(str(text))
+    tokens = morphs(str(text))
     if not tokens:
         return 0
     known = [t for t in tokens if t in known_words]
@@ -97,105 +103,69 @@ if plot_thread.is_alive():
     plot_thread.join(0)
 
 # ✅ Build the interface
-class TokenButton(widgets.Button):
-    def __init__(self, token):
-        super().__init__(description=token)
-        self.token = token
-        self.state = "neutral"
-        self.layout.width = 'auto'
-        self.style.font_weight = 'bold'
-        self.update_color()
-        self.on_click(self.toggle_state)
-
-    def toggle_state(self, b):
-        if self.state == "neutral":
-            self.state = "known"
-        elif self.state == "known":
-            self.state = "unknown"
-        else:
-            self.state = "neutral"
-        self.update_color()
-
-    def update_color(self):
-        colors = {"neutral": "#616161", "known": "#2e7d32", "unknown": "#c62828"}
-        self.style.button_color = colors[self.state]
+# One pooled reader view (see reader_view.py): each block only updates the existing token buttons
+TOKEN_COLORS = {"grey": "#616161", "green": "#2e7d32", "red": "#c62828"}
+progress = widgets.IntProgress(
+    value=len(seen_sentences),
+    min=0,
+    max=len(df[(df["coverage"] >= 93) & (df["coverage"] <= 97)]),
+    description='Progress:',
+    bar_style='info',
+    style={'bar_color': '#2e7d32'},
+    layout=widgets.Layout(width='100%')
+)
+view = ReaderView([("submit", "✅ Submit", 'success'), ("exit", "🚪 Exit", 'danger')],
+                  colors=TOKEN_COLORS, font_weight='bold', footer=[progress])
+word_status = {}
 
 # ✅ Main review function
 index = 0
+prefetcher = None
 
-def review_block():
-    global index
-    clear_output()
+def prepare_block(i):
+    # Tokenization runs ahead on the prefetch thread (see session_engine.ParagraphPrefetcher)
+    sentence = eligible_df.iloc[i]["korean"]
+    tokens = morphs(sentence)
+    return {"korean": sentence, "tokens": tokens, "new_tokens": [t for t in tokens if t not in known_words]}
 
-    if index >= len(eligible_df):
-        print("🎉 No more eligible sentence blocks to review.")
-        save_all()
-        return
-
-    row = eligible_df.iloc[index]
-    sentence = row["korean"]
-    tokens = okt.morphs(sentence)
-    new_tokens = [t for t in tokens if t not in known_words]
-
-    # Skip block if all tokens already known
-    if not new_tokens:
+def review_block():
+    global index, word_status
+
+    while index < len(eligible_df):
+        item = prefetcher.get(index)
+        sentence, new_tokens = item["korean"], item["new_tokens"]
+        if new_tokens:
+            break
+        # Skip block if all tokens already known
         seen_sentences.add(sentence)
         index += 1
-        return review_block()
-
-    # UI Elements
-    sentence_label = widgets.HTML(f"<b>📝 Sentence {index+1}/{len(eligible_df)}</b><br><i>{sentence}</i>")
-    token_buttons = [TokenButton(t) for t in new_tokens]
-    rows = [widgets.HBox(token_buttons[i:i+8]) for i in range(0, len(token_buttons), 8)]
-    token_box = widgets.VBox(rows)
-
-    # Progress bar
-    progress = widgets.IntProgress(
-        value=len(seen_sentences),
-        min=0,
-        max=len(df[(df["coverage"] >= 93) & (df["coverage"] <= 97)]),
-        description='Progress:',
-        bar_style='info',
-        style={'bar_color': '#2e7d32'},
-        layout=widgets.Layout(width='100%')
-    )
-
-    # Buttons
-    submit_button = widgets.Button(description="✅ Submit", button_style='success')
-    exit_button = widgets.Button(description="🚪 Exit", button_style='danger')
-    output = widgets.Output()
-
-    def on_submit(b):
-        for btn in token_buttons:
-            if btn.state == "known":
-                known_words.add(btn.token)
-                unknown_words.discard(btn.token)
-            elif btn.state == "unknown":
-                unknown_words.add(btn.token)
-        seen_sentences.add(sentence)
+    else:
+        prefetcher.close()
+        clear_output()
+        print("🎉 No more eligible sentence blocks to review.")
         save_all()
-        index_increment()
+        return
 
-    def on_exit(b):
-        save_all()
-        clear_output()
-        print("👋 Review session saved and exited.")
+    word_status = {t: "grey" for t in new_tokens}
+    progress.value = len(seen_sentences)
+    view.show(f"<b>📝 Sentence {index+1}/{len(eligible_df)}</b><br><i>{sentence}</i>", new_tokens, word_status)
 
-    def index_increment():
-        global index
-        index += 1
-        review_block()
+def on_submit():
+    global index
+    prefetcher.vocab_changed(apply_statuses(word_status, known_words, unknown_words))
+    seen_sentences.add(eligible_df.iloc[index]["korean"])
+    save_all()
+    index += 1
+    review_block()
 
-    submit_button.on_click(on_submit)
-    exit_button.on_click(on_exit)
+def on_exit():
+    prefetcher.close()
+    save_all()
+    clear_output()
+    print("👋 Review session saved and exited.")
 
-    display(widgets.VBox([
-        sentence_label,
-        token_box,
-        widgets.HBox([submit_button, exit_button]),
-        progress,
-        output
-    ]))
+view.on("submit", on_submit)
+view.on("exit", on_exit)
 
 # ✅ Save helper
 
@@ -205,8 +175,11 @@ def save_all():
     save_json_set(seen_sentences, seen_path)
 
 def launch_adapted_reader(fallback=None):
-    global index
+    global index, prefetcher
     index = 0
+    if prefetcher is not None:
+        prefetcher.close()  # a relaunch must not leave the previous worker thread running
+        prefetcher = None
 
     if eligible_df.empty:
         print("😕 No eligible sentence blocks found. Try learning more words first.")
@@ -214,6 +187,9 @@ def launch_adapted_reader(fallback=None):
             fallback()
         return
 
+    prefetcher = ParagraphPrefetcher(prepare_block, len(eligible_df))
+    clear_output()
+    display(view.widget)
     review_block()
 
 launch_adapted_reader()
\ No newline at end of file
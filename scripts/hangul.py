@@ -0,0 +1,142 @@
+# %%
+# This module decomposes and composes Hangul with Unicode arithmetic instead of the jamo library's
+#   per-character name lookups. A precomposed syllable is
+#       0xAC00 + (lead - 0x1100) * 588 + (vowel - 0x1161) * 28 + (tail - 0x11A7 or 0)
+#   so strings are decomposed with one str.translate over a precomputed table, and jamo sequences are composed
+#   either with a regex (single strings) or vectorized with NumPy over 2D arrays of code points (one row per
+#   word, zero padded), which is what the KoParadigm rule engine (koparadigm_rules.py) uses to generate forms.
+
+import re
+import numpy as np
+
+# ✅ Unicode layout
+S_BASE, L_BASE, V_BASE, T_BASE = 0xAC00, 0x1100, 0x1161, 0x11A7
+L_COUNT, V_COUNT, T_COUNT = 19, 21, 28
+N_COUNT = V_COUNT * T_COUNT
+S_COUNT = L_COUNT * N_COUNT
+
+# Compatibility jamo (ㄱ, ㅏ...) of the conjoining leads, vowels and tails
+HCJ_LEADS = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+HCJ_VOWELS = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+HCJ_TAILS = "ㄱㄲㄳㄴㄵㄶㄷㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅄㅅㅆㅇㅈㅊㅋㅌㅍㅎ"
+
+# ✅ Translation tables
+def syllable_to_jamo(code):
+    index = code - S_BASE
+    lead, vowel, tail = index // N_COUNT, (index % N_COUNT) // T_COUNT, index % T_COUNT
+    return chr(L_BASE + lead) + chr(V_BASE + vowel) + (chr(T_BASE + tail) if tail else "")
+
+DECOMPOSE = {S_BASE + i: syllable_to_jamo(S_BASE + i) for i in range(S_COUNT)}
+# Compatibility consonants are read as tails (as KoParadigm does for endings such as ㄴ가), vowels as vowels
+HCJ_TO_JAMO = {ord(c): chr(T_BASE + 1 + i) for i, c in enumerate(HCJ_TAILS)}
+HCJ_TO_JAMO.update({ord(c): chr(V_BASE + i) for i, c in enumerate(HCJ_VOWELS)})
+TO_JAMO = {**DECOMPOSE, **HCJ_TO_JAMO}
+JAMO_TO_HCJ = {L_BASE + i: c for i, c in enumerate(HCJ_LEADS)}
+JAMO_TO_HCJ.update({V_BASE + i: c for i, c in enumerate(HCJ_VOWELS)})
+JAMO_TO_HCJ.update({T_BASE + 1 + i: c for i, c in enumerate(HCJ_TAILS)})
+
+# ✅ Strings
+SYLLABLE_JAMO = re.compile("[ᄀ-ᄒ][ᅡ-ᅵ][ᆨ-ᇂ]?")
+
+def is_syllable(char):
+    return S_BASE <= ord(char) < S_BASE + S_COUNT
+
+def decompose(text):
+    """Syllables → conjoining jamo (h2j). Other characters are kept."""
+    return text.translate(DECOMPOSE)
+
+def to_jamo(text):
+    """decompose(), with compatibility jamo mapped to conjoining jamo (consonants as tails)."""
+    return text.translate(TO_JAMO)
+
+def to_compatibility(jamo_text):
+    """Conjoining jamo → compatibility jamo (j2hcj)."""
+    return jamo_text.translate(JAMO_TO_HCJ)
+
+def compose_syllable(match):
+    syllable = match.group()
+    code = S_BASE + (ord(syllable[0]) - L_BASE) * N_COUNT + (ord(syllable[1]) - V_BASE) * T_COUNT
+    return chr(code + ord(syllable[2]) - T_BASE if len(syllable) == 3 else code)
+
+def compose(jamo_text):
+    """Compose every lead + vowel (+ tail) run into a syllable; anything else is kept as is."""
+    return SYLLABLE_JAMO.sub(compose_syllable, jamo_text)
+
+def syllable_jamo(syllable):
+    """(lead, vowel, tail) of one syllable as compatibility jamo, tail None when open; (None, None, None) otherwise."""
+    if len(syllable) != 1 or not is_syllable(syllable):
+        return (None, None, None)
+    parts = to_compatibility(DECOMPOSE[ord(syllable)])
+    return (parts[0], parts[1], parts[2] if len(parts) == 3 else None)
+
+def first_jamo(word):
+    return syllable_jamo(word[0])[0] if word else None
+
+def first_lead_indices(words):
+    """Vectorized: index in HCJ_LEADS of the first lead of each word, -1 when it does not start with a syllable."""
+    firsts = "".join(w[0] if isinstance(w, str) and w else "\0" for w in words)
+    codes = np.frombuffer(firsts.encode("utf-32-le"), dtype=np.uint32).astype(np.int64) - S_BASE
+    valid = (codes >= 0) & (codes < S_COUNT)
+    return np.where(valid, codes // N_COUNT, -1)
+
+def first_jamos(words):
+    """Vectorized first_jamo() over a list of words (None where there is none)."""
+    leads = np.array(list(HCJ_LEADS) + [None], dtype=object)
+    return leads[first_lead_indices(words)].tolist()
+
+# ✅ Code point arrays
+def to_codes(strings, width=None, align="left"):
+    """List of strings → uint32 array (len(strings), width), zero padded on the right (or the left)."""
+    width = width if width is not None else max((len(s) for s in strings), default=0)
+    codes = np.zeros((len(strings), width), dtype=np.uint32)
+    for i, s in enumerate(strings):
+        if s:
+            row = np.frombuffer(s.encode("utf-32-le"), dtype=np.uint32)
+            if align == "left":
+                codes[i, :len(row)] = row
+            else:
+                codes[i, width - len(row):] = row
+    return codes
+
+def compact(codes):
+    """Move the non-zero code points of each row to the left, keeping their order."""
+    order = np.argsort(codes == 0, axis=1, kind="stable")
+    return np.take_along_axis(codes, order, axis=1)
+
+def from_codes(codes, compacted=False):
+    """uint32 array → list of strings (zero code points are dropped)."""
+    codes = np.ascontiguousarray(codes if compacted else compact(codes))
+    if codes.shape[1] == 0:
+        return [""] * len(codes)
+    return codes.view(f"<U{codes.shape[1]}").ravel().tolist()
+
+def decompose_codes(codes):
+    """Syllable code points → (leads, vowels, tails) arrays of conjoining jamo, 0 where absent or not a syllable."""
+    index = codes.astype(np.int64) - S_BASE
+    valid = (index >= 0) & (index < S_COUNT)
+    index = np.where(valid, index, 0)
+    leads = np.where(valid, L_BASE + index // N_COUNT, 0)
+    vowels = np.where(valid, V_BASE + (index % N_COUNT) // T_COUNT, 0)
+    tails = np.where(valid & (index % T_COUNT > 0), T_BASE + index % T_COUNT, 0)
+    return leads.astype(np.uint32), vowels.astype(np.uint32), tails.astype(np.uint32)
+
+def compose_codes(codes):
+    """Vectorized compose() over a 2D array of jamo code points. Returns a compacted array."""
+    codes = np.asarray(codes, dtype=np.uint32)
+    padded = np.pad(codes, ((0, 0), (0, 2)))
+    is_lead = (padded >= L_BASE) & (padded < L_BASE + L_COUNT)
+    is_vowel = (padded >= V_BASE) & (padded < V_BASE + V_COUNT)
+    is_tail = (padded > T_BASE) & (padded < T_BASE + T_COUNT)
+
+    # A syllable starts at every lead directly followed by a vowel; a tail right after the vowel closes it
+    starts = is_lead[:, :-2] & is_vowel[:, 1:-1]
+    closed = starts & is_tail[:, 2:]
+    lead = padded[:, :-2].astype(np.int64) - L_BASE
+    vowel = padded[:, 1:-1].astype(np.int64) - V_BASE
+    tail = np.where(closed, padded[:, 2:].astype(np.int64) - T_BASE, 0)
+    syllables = S_BASE + lead * N_COUNT + vowel * T_COUNT + tail
+
+    out = np.where(starts, syllables, codes).astype(np.uint32)
+    out[:, 1:][starts[:, :-1]] = 0          # the vowel of each syllable
+    out[:, 2:][closed[:, :-2]] = 0          # and its tail
+    return compact(out)
@@ -0,0 +1,135 @@
+# %%
+# This module is the shared HTTP layer of the Wikipedia and Genius download code.
+#   make_session() returns a pooled requests session with retries that can also record responses to disk
+#   and replay them later, so a rerun of a crawl costs nothing and harvest pipelines can be tested and
+#   benchmarked offline, deterministically. The mode is chosen per session or with the HTTP_CACHE_MODE variable:
+#     "off"    → always use the network (default)
+#     "record" → use the network and store every response
+#     "replay" → serve stored responses only, a request that was never recorded raises CacheMiss
+#     "auto"   → serve stored responses when present, otherwise use the network and store the response
+#   Responses are stored as JSON files under HTTP_CACHE_DIR (default data/http_cache), keyed by method, URL,
+#   sorted query parameters and body. Request headers (API tokens) are not part of the key and are never stored.
+
+import os
+import json
+import base64
+import hashlib
+import tempfile
+import requests
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.util.retry import Retry
+
+# ✅ Settings
+MODES = ("off", "record", "replay", "auto")
+DEFAULT_MODE = os.environ.get("HTTP_CACHE_MODE", "off")
+DEFAULT_CACHE_DIR = Path(os.environ.get("HTTP_CACHE_DIR", "data/http_cache"))
+SKIPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie"}
+
+class CacheMiss(LookupError):
+    pass
+
+# ✅ Cache keys
+def canonical_url(url, params=None):
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query += [(k, str(v)) for k, v in (params.items() if isinstance(params, dict) else params) if v is not None]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(sorted(query)), ""))
+
+def cache_key(method, url, params=None, data=None):
+    body = data if isinstance(data, bytes) else json.dumps(data, sort_keys=True, default=str).encode("utf-8")
+    digest = hashlib.sha256(f"{method.upper()} {canonical_url(url, params)}\n".encode("utf-8") + body)
+    return digest.hexdigest()
+
+# ✅ Session with record / replay
+class CachedSession(requests.Session):
+    def __init__(self, mode=None, cache_dir=None):
+        super().__init__()
+        self.mode = mode or DEFAULT_MODE
+        if self.mode not in MODES:
+            raise ValueError(f"⚠️ Unknown HTTP cache mode '{self.mode}', expected one of {MODES}")
+        self.cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR)
+        self.stats = {"hits": 0, "misses": 0, "stored": 0}
+
+    def cache_path(self, method, url, params=None, data=None):
+        key = cache_key(method, url, params, data)
+        return self.cache_dir / (urlsplit(url).hostname or "local") / key[:2] / f"{key}.json"
+
+    def is_cached(self, method, url, params=None, data=None):
+        return self.mode in ("replay", "auto") and self.cache_path(method, url, params, data).exists()
+
+    def request(self, method, url, params=None, data=None, **kwargs):
+        if self.mode == "off":
+            return super().request(method, url, params=params, data=data, **kwargs)
+
+        path = self.cache_path(method, url, params, data)
+        if self.mode in ("replay", "auto") and path.exists():
+            self.stats["hits"] += 1
+            return load_response(path)
+        if self.mode == "replay":
+            raise CacheMiss(f"⚠️ No recorded response for {method} {canonical_url(url, params)}")
+
+        self.stats["misses"] += 1
+        response = super().request(method, url, params=params, data=data, **kwargs)
+        # Server errors and rate limits are not worth replaying
+        if response.status_code < 500 and response.status_code != 429:
+            store_response(response, path)
+            self.stats["stored"] += 1
+        return response
+
+# ✅ Response files
+def store_response(response, path):
+    content = response.content
+    try:
+        body, encoding = content.decode("utf-8"), "utf-8"
+    except UnicodeDecodeError:
+        body, encoding = base64.b64encode(content).decode("ascii"), "base64"
+    record = {
+        "method": response.request.method if response.request is not None else None,
+        "url": response.url,
+        "status": response.status_code,
+        "reason": response.reason,
+        "headers": {k: v for k, v in response.headers.items() if k.lower() not in SKIPPED_HEADERS},
+        "body_encoding": encoding,
+        "body": body,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # One temporary file per writer: worker threads may record the same URL at the same time
+    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=path.parent, suffix=".tmp", delete=False) as f:
+        json.dump(record, f, ensure_ascii=False)
+    try:
+        os.replace(f.name, path)
+    except OSError:
+        os.unlink(f.name)
+        raise
+
+def load_response(path):
+    with open(path, "r", encoding="utf-8") as f:
+        record = json.load(f)
+    response = requests.Response()
+    response.status_code = record["status"]
+    response.reason = record["reason"]
+    response.url = record["url"]
+    response.headers = CaseInsensitiveDict(record["headers"])
+    response.encoding = get_encoding_from_headers(response.headers)
+    if record["body_encoding"] == "base64":
+        response._content = base64.b64decode(record["body"])
+    else:
+        response._content = record["body"].encode("utf-8")
+    return response
+
+# ✅ Pooled session with retries
+def make_session(pool_size=8, retries=3, backoff=0.5, mode=None, cache_dir=None, user_agent=None):
+    retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=frozenset({"GET"}), respect_retry_after_header=True)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = CachedSession(mode=mode, cache_dir=cache_dir)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if user_agent:
+        session.headers["User-Agent"] = user_agent
+    return session
@@ -0,0 +1,164 @@
+# %%
+# This module packs the KoParadigm data (verbs, endings, conjugation template) into one versioned binary bundle,
+#   koparadigm.bundle, so every KoParadigm consumer loads the same data the same way, in milliseconds:
+#     - verbs: a string pool (u32 offsets + UTF-8 bytes), their class (u8) and first-jamo key (i8, index in
+#       hangul.HCJ_LEADS, -1 when none) as typed arrays
+#     - endings: a string pool and their class (u8)
+#     - the compiled template (koparadigm_template.py): the rule matrix and the rule table
+#   The file starts with a section table; load_bundle() maps it with mmap and wraps every section with
+#   numpy.frombuffer, so nothing is parsed or copied up front. open_bundle() rebuilds the bundle from the CSVs when
+#   it is missing or when one of the CSVs changed (the sha256 of each source is stored in the bundle).
+
+import os
+import csv
+import json
+import mmap
+import struct
+import numpy as np
+from pathlib import Path
+from hangul import HCJ_LEADS, first_lead_indices
+from koparadigm_template import KOPARADIGM_DIR, TEMPLATE_PATH, Template, compile_template, file_sha256
+
+# ✅ Format
+BUNDLE_PATH = KOPARADIGM_DIR / "koparadigm.bundle"
+VERBS_PATH = KOPARADIGM_DIR / "koparadigm_verbs_df_jamo.csv"
+ENDINGS_PATH = KOPARADIGM_DIR / "koparadigm_endings.csv"
+MAGIC = b"KPBN"
+VERSION = 1
+HEADER = struct.Struct("<4sII")      # magic, version, number of sections
+SECTION = struct.Struct("<24s8sQQ")  # name, dtype, offset, number of items
+ALIGN = 8
+
+# ✅ Build
+def pool_arrays(strings):
+    data = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(data) + 1, dtype=np.uint32)
+    np.cumsum([len(d) for d in data], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(data), dtype=np.uint8)
+
+def read_rows(path):
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        return list(csv.DictReader(f))
+
+def write_bundle(path, sections, meta):
+    """sections: {name: numpy array}. Written 8-byte aligned after the header and the section table."""
+    sections = dict(sections, meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8))
+    offset = HEADER.size + SECTION.size * len(sections)
+    table, layout = [], []
+    for name, array in sections.items():
+        offset += -offset % ALIGN
+        table.append(SECTION.pack(name.encode("ascii"), array.dtype.str.encode("ascii"), offset, array.size))
+        layout.append((offset, array))
+        offset += array.nbytes
+
+    tmp_path = Path(path).with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(sections)) + b"".join(table))
+        for offset, array in layout:
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp_path, path)
+
+def build_bundle(path=BUNDLE_PATH, verbs_path=VERBS_PATH, endings_path=ENDINGS_PATH, template_path=TEMPLATE_PATH):
+    verb_rows = [row for row in read_rows(verbs_path) if row["Verb"]]
+    ending_rows = read_rows(endings_path)
+    verbs = [row["Verb"] for row in verb_rows]
+    endings = [row["Ending"] for row in ending_rows]
+    matrix, rules = compile_template(template_path)
+
+    verb_offsets, verb_data = pool_arrays(verbs)
+    ending_offsets, ending_data = pool_arrays(endings)
+    postfix_offsets, postfix_data = pool_arrays([postfix for _, postfix, _ in rules])
+    sections = {
+        "verbs.offsets": verb_offsets,
+        "verbs.data": verb_data,
+        "verbs.class": np.array([int(row["Class"]) for row in verb_rows], dtype=np.uint8),
+        "verbs.first_jamo": first_lead_indices(verbs).astype(np.int8),
+        "endings.offsets": ending_offsets,
+        "endings.data": ending_data,
+        "endings.class": np.array([int(row["Class"]) for row in ending_rows], dtype=np.uint8),
+        "template.matrix": matrix.ravel(),
+        "rules.stop": np.array([-128 if stop is None else stop for stop, _, _ in rules], dtype=np.int8),
+        "rules.start": np.array([-128 if start is None else start for _, _, start in rules], dtype=np.int8),
+        "rules.postfix.offsets": postfix_offsets,
+        "rules.postfix.data": postfix_data,
+    }
+    meta = {
+        "matrix_shape": list(matrix.shape),
+        "sources": {name: file_sha256(p) for name, p in
+                    [("verbs", verbs_path), ("endings", endings_path), ("template", template_path)]},
+    }
+    write_bundle(path, sections, meta)
+    return len(verbs), len(endings), len(rules)
+
+# ✅ Read
+class StringPool:
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def tolist(self):
+        text, offsets = self.data.tobytes(), self.offsets.tolist()
+        return [text[a:b].decode("utf-8") for a, b in zip(offsets, offsets[1:])]
+
+class Bundle:
+    def __init__(self, path=BUNDLE_PATH):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"⚠️ {path} is not a version {VERSION} KoParadigm bundle")
+        self.sections = {}
+        for i in range(count):
+            name, dtype, offset, size = SECTION.unpack_from(self.mm, HEADER.size + i * SECTION.size)
+            dtype = np.dtype(dtype.rstrip(b"\0").decode("ascii"))
+            self.sections[name.rstrip(b"\0").decode("ascii")] = np.frombuffer(self.mm, dtype, size, offset)
+        self.meta = json.loads(self.sections["meta"].tobytes())
+
+        self.verbs = StringPool(self.sections["verbs.offsets"], self.sections["verbs.data"])
+        self.verb_classes = self.sections["verbs.class"]
+        self.first_jamo_ids = self.sections["verbs.first_jamo"]
+        self.endings = StringPool(self.sections["endings.offsets"], self.sections["endings.data"])
+        self.ending_classes = self.sections["endings.class"]
+        self.matrix = self.sections["template.matrix"].reshape(self.meta["matrix_shape"])
+
+    def first_jamo(self, verb_id):
+        lead = self.first_jamo_ids[verb_id]
+        return HCJ_LEADS[lead] if lead >= 0 else None
+
+    def template(self):
+        postfixes = StringPool(self.sections["rules.postfix.offsets"], self.sections["rules.postfix.data"]).tolist()
+        rules = [(None if stop == -128 else stop, postfix, None if start == -128 else start)
+                 for stop, postfix, start in zip(self.sections["rules.stop"].tolist(), postfixes,
+                                                 self.sections["rules.start"].tolist())]
+        return Template(self.matrix, rules)
+
+    def ending_list(self):
+        """[(ending, ending_class), ...], the format of koparadigm_lookup.load_endings."""
+        return list(zip(self.endings.tolist(), self.ending_classes.tolist()))
+
+def load_bundle(path=BUNDLE_PATH):
+    return Bundle(path)
+
+def bundle_is_stale(path=BUNDLE_PATH, verbs_path=VERBS_PATH, endings_path=ENDINGS_PATH, template_path=TEMPLATE_PATH):
+    if not Path(path).exists():
+        return True
+    try:
+        sources = load_bundle(path).meta["sources"]
+    except ValueError:
+        return True
+    return any(sources.get(name) != file_sha256(p) for name, p in
+               [("verbs", verbs_path), ("endings", endings_path), ("template", template_path)] if Path(p).exists())
+
+def open_bundle(path=BUNDLE_PATH):
+    """The bundle, rebuilt first from the CSVs when it is missing or out of date."""
+    if bundle_is_stale(path):
+        build_bundle(path)
+    return load_bundle(path)
@@ -0,0 +1,131 @@
+# %%
+# This module exports the full KoParadigm paradigm (every form of every verb) to parquet.
+#   The verbs are split into chunks that are conjugated in a pool of processes with the vectorized rule engine
+#   (koparadigm_rules.generate_forms); each finished chunk is written straight away as one parquet row group,
+#   with stem / category / ending stored as dictionary columns. Only a few chunks are in flight at a time,
+#   so memory stays bounded by the chunk size while the throughput scales with the number of cores.
+#   Columns are the same as the old koparadigm_full_export cell: stem, category, ending, form.
+#   KoParadigm's own Paradigm stays the source of truth: before anything is written, check_parity() conjugates a
+#   sample of verbs with both and the export is aborted if any form differs (KoParadigm's few uncomposed forms
+#   such as 뛰ᅥ aside, which the rule engine drops).
+
+import os
+import time
+import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import pyarrow as pa
+import pyarrow.parquet as pq
+from koparadigm_lookup import KOPARADIGM_DIR, VerbIndex
+from koparadigm_bundle import load_bundle, open_bundle
+from koparadigm_rules import generate_forms, verb_category, is_word
+
+# ✅ Settings
+EXPORT_PATH = KOPARADIGM_DIR / "koparadigm_conjugations.parquet"
+CHUNK_SIZE = 2000  # verbs per task / row group
+PARITY_SAMPLE = 300  # verbs conjugated by both koparadigm.Paradigm and the rule engine before an export
+SCHEMA = pa.schema([
+    ("stem", pa.dictionary(pa.int32(), pa.string())),
+    ("category", pa.dictionary(pa.int8(), pa.string())),
+    ("ending", pa.dictionary(pa.int16(), pa.string())),
+    ("form", pa.string()),
+])
+
+# ✅ Worker side: the KoParadigm data is loaded once per process
+_worker = {}
+
+def init_worker():
+    bundle = load_bundle()
+    _worker["verbs"] = VerbIndex.from_bundle(bundle)
+    _worker["endings"] = bundle.ending_list()
+    _worker["rules"] = bundle.template().as_dict()
+
+def conjugate_chunk(start, stop):
+    """Columns of every form of the verb rows [start, stop)."""
+    verbs, endings, rules = _worker["verbs"], _worker["endings"], _worker["rules"]
+    chunk_verbs, chunk_classes = verbs.verbs[start:stop], verbs.classes[start:stop]
+    stems, categories, ending_names, forms = [], [], [], []
+    for verb_ids, ending_ids, batch_forms in generate_forms(chunk_verbs, chunk_classes, endings, rules):
+        verb_ids, ending_ids = verb_ids.tolist(), ending_ids.tolist()
+        stems.extend(chunk_verbs[i] for i in verb_ids)
+        categories.extend(verb_category(chunk_classes[i]) for i in verb_ids)
+        ending_names.extend(endings[i][0] for i in ending_ids)
+        forms.extend(batch_forms)
+    return stems, categories, ending_names, forms
+
+def to_table(columns):
+    stems, categories, ending_names, forms = columns
+    return pa.table([
+        pa.array(stems).dictionary_encode().cast(SCHEMA.field("stem").type),
+        pa.array(categories).dictionary_encode().cast(SCHEMA.field("category").type),
+        pa.array(ending_names).dictionary_encode().cast(SCHEMA.field("ending").type),
+        pa.array(forms, type=pa.string()),
+    ], schema=SCHEMA)
+
+# ✅ Parity with KoParadigm
+def check_parity(sample_size=PARITY_SAMPLE, seed=0, paradigm=None):
+    """Conjugate sample_size verbs with koparadigm.Paradigm and with generate_forms; ValueError on any difference."""
+    if paradigm is None:
+        from koparadigm import Paradigm  # the reference implementation (pip install koparadigm)
+        paradigm = Paradigm()
+    bundle = open_bundle()
+    verbs, classes = bundle.verbs.tolist(), bundle.verb_classes.tolist()
+    endings, rules = bundle.ending_list(), bundle.template().as_dict()
+    sample = set(random.Random(seed).sample(sorted(set(verbs)), min(sample_size, len(set(verbs)))))
+    rows = [i for i, verb in enumerate(verbs) if verb in sample]
+
+    generated = {verb: set() for verb in sample}
+    sample_verbs = [verbs[i] for i in rows]
+    for verb_ids, ending_ids, forms in generate_forms(sample_verbs, [classes[i] for i in rows], endings, rules):
+        for verb_id, ending_id, form in zip(verb_ids.tolist(), ending_ids.tolist(), forms):
+            generated[sample_verbs[verb_id]].add((endings[ending_id][0], form))
+
+    mismatches = []
+    for verb in sorted(sample):
+        expected = {(ending, form) for _, pairs in paradigm.conjugate(verb) or [] for ending, joined in pairs
+                    for form in joined.split("/") if is_word(form)}
+        if expected != generated[verb]:
+            mismatches.append((verb, sorted(expected ^ generated[verb])[:3]))
+    if mismatches:
+        raise ValueError(f"⚠️ {len(mismatches)} of {len(sample)} verbs differ from koparadigm.Paradigm, "
+                         f"e.g. {mismatches[:3]}")
+    return len(sample)
+
+# ✅ Export
+def export_paradigms(path=EXPORT_PATH, chunk_size=CHUNK_SIZE, max_workers=None, parity_sample=PARITY_SAMPLE):
+    """Check parity with KoParadigm, then write the parquet file, one row group per chunk of verbs.
+    Returns the number of forms written."""
+    path = Path(path)
+    max_workers = max_workers or os.cpu_count() or 1
+    n_verbs = len(open_bundle().verbs)  # also brings the bundle up to date before the workers load it
+    print(f"✅ Same forms as koparadigm.Paradigm on {check_parity(parity_sample)} sampled verbs")
+    chunks = [(start, min(start + chunk_size, n_verbs)) for start in range(0, n_verbs, chunk_size)]
+
+    rows = 0
+    started = time.perf_counter()
+    tmp_path = path.with_suffix(".tmp")
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker) as pool, \
+            pq.ParquetWriter(tmp_path, SCHEMA, compression="zstd") as writer:
+        pending = deque()
+        todo = iter(chunks)
+        # Keep at most two chunks per worker in flight, so finished results never pile up in memory
+        for start, stop in todo:
+            pending.append(pool.submit(conjugate_chunk, start, stop))
+            if len(pending) >= 2 * max_workers:
+                break
+        while pending:
+            table = to_table(pending.popleft().result())
+            writer.write_table(table, row_group_size=len(table) or None)
+            rows += len(table)
+            next_chunk = next(todo, None)
+            if next_chunk:
+                pending.append(pool.submit(conjugate_chunk, *next_chunk))
+            print(f"\r📦 {rows:,} forms written ({time.perf_counter() - started:.0f}s)", end="")
+    os.replace(tmp_path, path)
+    print()
+    return rows
+
+if __name__ == "__main__":
+    count = export_paradigms()
+    print(f"✅ Saved {count:,} forms to: {EXPORT_PATH}")
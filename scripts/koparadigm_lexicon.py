@@ -0,0 +1,251 @@
+# %%
+# This module compiles every KoParadigm surface form into one on-disk lexicon, so a conjugated word is
+#   lemmatized by a lookup instead of scanning the full-paradigm parquet (find_stem in the deprecated
+#   KoPradigm_conjugation_system.py filtered millions of rows per word).
+#   build_lexicon() forward-generates the forms of every verb with koparadigm_rules.generate_forms, sorts them on disk
+#   in bounded chunks and writes a sorted string table:
+#     - header: magic "KLEX", format version, section offsets
+#     - three string pools (lemmas, endings, categories): u32 offsets + UTF-8 bytes
+#     - front-coded key blocks of BLOCK_SIZE surface forms, each key followed by its (lemma, ending, category) ids
+#     - the u32 offset of every block, for the binary search
+#   Lexicon() maps the file with mmap and reads nothing up front: a lookup is a binary search over the block
+#   heads plus a scan of one block, and only decodes the strings of the entries it returns. A word that is not a form
+#   (갔어요) is looked up again as a form ending in a pre-final ending plus a final ending (갔 + 어요).
+#   VERSION changes whenever the generated forms do, and open_lexicon() rebuilds a lexicon of another version.
+
+import os
+import mmap
+import heapq
+import struct
+import tempfile
+from itertools import groupby
+from pathlib import Path
+from koparadigm_lookup import KOPARADIGM_DIR, PREFINAL_ENDINGS, VerbIndex, final_endings, prefinal_splits
+from koparadigm_bundle import open_bundle
+from koparadigm_rules import generate_forms, verb_category
+
+# ✅ Format
+LEXICON_PATH = KOPARADIGM_DIR / "koparadigm_lexicon.bin"
+MAGIC = b"KLEX"
+VERSION = 2               # 2: 하|ᅧ and 오|ᅡ contracted at jamo level, uncomposed forms dropped
+BLOCK_SIZE = 16           # keys per front-coded block
+CHUNK_SIZE = 1_000_000    # forms sorted in memory at a time during the build
+HEADER = struct.Struct("<4sIIIQQQQQ")   # magic, version, keys, blocks, lemmas, endings, categories, keys, block index
+KEY_HEAD = struct.Struct("<BBB")        # shared prefix length, suffix length, number of entries
+ENTRY = struct.Struct("<IHB")           # lemma id, ending id, category id
+RUN_RECORD = struct.Struct("<BIHB")     # form length, lemma id, ending id, category id (build runs only)
+
+# ✅ Build
+CATEGORIES = ["Action Verb/Descriptive Verb", "Action Verb", "Descriptive Verb", "Copula"]
+
+def iter_forms(verb_index, lemmas, endings, rules):
+    """Yield (form, lemma_id, ending_id, category_id) for every verb × ending the template allows."""
+    lemma_ids = {lemma: i for i, lemma in enumerate(lemmas)}
+    verb_lemma = [lemma_ids[verb] for verb in verb_index.verbs]
+    verb_category_ids = [CATEGORIES.index(verb_category(verb_class)) for verb_class in verb_index.classes]
+    for verb_ids, ending_ids, forms in generate_forms(verb_index.verbs, verb_index.classes, endings, rules):
+        for verb_id, ending_id, form in zip(verb_ids.tolist(), ending_ids.tolist(), forms):
+            yield form, verb_lemma[verb_id], ending_id, verb_category_ids[verb_id]
+
+def write_run(records, path):
+    records.sort()
+    with open(path, "wb") as f:
+        for key, lemma_id, ending_id, category_id in records:
+            f.write(RUN_RECORD.pack(len(key), lemma_id, ending_id, category_id) + key)
+
+def read_run(path):
+    with open(path, "rb") as f:
+        while True:
+            head = f.read(RUN_RECORD.size)
+            if not head:
+                return
+            length, lemma_id, ending_id, category_id = RUN_RECORD.unpack(head)
+            yield f.read(length), lemma_id, ending_id, category_id
+
+def pack_pool(strings):
+    data = [s.encode("utf-8") for s in strings]
+    offsets, pos = [], 0
+    for d in data:
+        offsets.append(pos)
+        pos += len(d)
+    offsets.append(pos)
+    return struct.pack(f"<I{len(offsets)}I", len(strings), *offsets) + b"".join(data)
+
+def build_lexicon(path=LEXICON_PATH, verb_index=None, endings=None, rules=None, chunk_size=CHUNK_SIZE):
+    """Generate, sort and write the lexicon. Returns the number of distinct surface forms."""
+    bundle = open_bundle()
+    verb_index = verb_index or VerbIndex.from_bundle(bundle)
+    endings = endings or bundle.ending_list()
+    rules = rules or bundle.template().as_dict()
+    lemmas = list(dict.fromkeys(verb_index.verbs))
+    path = Path(path)
+
+    with tempfile.TemporaryDirectory(dir=path.parent) as tmp_dir:
+        # 1. Sorted runs of at most chunk_size forms
+        runs, records = [], []
+        for form, lemma_id, ending_id, category_id in iter_forms(verb_index, lemmas, endings, rules):
+            records.append((form.encode("utf-8"), lemma_id, ending_id, category_id))
+            if len(records) >= chunk_size:
+                runs.append(os.path.join(tmp_dir, f"run_{len(runs)}.bin"))
+                write_run(records, runs[-1])
+                records = []
+        if records:
+            runs.append(os.path.join(tmp_dir, f"run_{len(runs)}.bin"))
+            write_run(records, runs[-1])
+            records = []
+
+        # 2. Merge the runs into front-coded blocks
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(b"\0" * HEADER.size)
+            sections = [f.tell()]
+            f.write(pack_pool(lemmas))
+            sections.append(f.tell())
+            f.write(pack_pool([ending for ending, _ in endings]))
+            sections.append(f.tell())
+            f.write(pack_pool(CATEGORIES))
+            sections.append(f.tell())
+
+            block_offsets, key_count, previous = [], 0, b""
+            merged = heapq.merge(*(read_run(run) for run in runs))
+            for key, group in groupby(merged, key=lambda record: record[0]):
+                entries = sorted({record[1:] for record in group})
+                shared = 0
+                if key_count % BLOCK_SIZE == 0:
+                    block_offsets.append(f.tell() - sections[3])
+                else:
+                    limit = min(len(key), len(previous), 255)
+                    while shared < limit and key[shared] == previous[shared]:
+                        shared += 1
+                suffix = key[shared:]
+                f.write(KEY_HEAD.pack(shared, len(suffix), len(entries)) + suffix)
+                f.write(b"".join(ENTRY.pack(*entry) for entry in entries))
+                previous = key
+                key_count += 1
+
+            sections.append(f.tell())
+            f.write(struct.pack(f"<{len(block_offsets)}I", *block_offsets))
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, VERSION, key_count, len(block_offsets), *sections))
+    os.replace(tmp_path, path)
+    return key_count
+
+# ✅ Read
+class StringPool:
+    def __init__(self, buffer, offset):
+        (self.count,) = struct.unpack_from("<I", buffer, offset)
+        self.offsets = buffer[offset + 4:offset + 8 + 4 * self.count].cast("I")
+        self.data = buffer[offset + 8 + 4 * self.count:]
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+class Lexicon:
+    def __init__(self, path=LEXICON_PATH):
+        self.file = open(path, "rb")
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = memoryview(self.mm)
+        magic, version, self.key_count, block_count, lemmas, endings, categories, keys, index = \
+            HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"⚠️ {path} is not a version {VERSION} KoParadigm lexicon")
+        self.lemmas = StringPool(self.buffer, lemmas)
+        self.endings = StringPool(self.buffer, endings)
+        self.categories = StringPool(self.buffer, categories)
+        self.keys_offset = keys
+        self.block_offsets = self.buffer[index:index + 4 * block_count].cast("I")
+        self.finals = None
+
+    def __len__(self):
+        return self.key_count
+
+    def close(self):
+        self.buffer.release()
+        self.lemmas = self.endings = self.categories = self.block_offsets = None
+        self.mm.close()
+        self.file.close()
+
+    def block_head(self, block):
+        # The first key of a block is stored whole
+        pos = self.keys_offset + self.block_offsets[block]
+        _, length, _ = KEY_HEAD.unpack_from(self.mm, pos)
+        return self.mm[pos + KEY_HEAD.size:pos + KEY_HEAD.size + length]
+
+    def find_entries(self, key):
+        """(entry offset, count) of a UTF-8 key, or None."""
+        lo, hi = 0, len(self.block_offsets)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.block_head(mid) <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == 0:
+            return None
+
+        block = lo - 1
+        pos = self.keys_offset + self.block_offsets[block]
+        current = b""
+        for _ in range(min(BLOCK_SIZE, self.key_count - block * BLOCK_SIZE)):
+            shared, length, count = KEY_HEAD.unpack_from(self.mm, pos)
+            pos += KEY_HEAD.size
+            current = current[:shared] + self.mm[pos:pos + length]
+            pos += length
+            if current == key:
+                return pos, count
+            if current > key:
+                return None
+            pos += count * ENTRY.size
+        return None
+
+    def __contains__(self, word):
+        return self.find_entries(word.encode("utf-8")) is not None
+
+    def lookup_form(self, word):
+        """[(lemma, ending, category), ...] for a surface form, [] when it is not a KoParadigm form."""
+        found = self.find_entries(word.encode("utf-8"))
+        if found is None:
+            return []
+        pos, count = found
+        results = []
+        for i in range(count):
+            lemma_id, ending_id, category_id = ENTRY.unpack_from(self.mm, pos + i * ENTRY.size)
+            results.append((self.lemmas[lemma_id], self.endings[ending_id], self.categories[category_id]))
+        return results
+
+    def lookup(self, word):
+        """lookup_form(), or the analyses of the word as a pre-final form plus a final ending (ending 았 + 어요)."""
+        results = self.lookup_form(word)
+        if results:
+            return results
+        if self.finals is None:
+            self.finals = final_endings(self.endings[i] for i in range(len(self.endings)))
+        for head, final in prefinal_splits(word, self.finals):
+            results.extend((lemma, ending + final, category) for lemma, ending, category in self.lookup_form(head)
+                           if ending in PREFINAL_ENDINGS)
+        return results
+
+def lexicon_version(path=LEXICON_PATH):
+    """Format version of a lexicon file, None when it is missing or not a lexicon."""
+    if not Path(path).exists():
+        return None
+    with open(path, "rb") as f:
+        head = f.read(HEADER.size)
+    if len(head) < HEADER.size or head[:4] != MAGIC:
+        return None
+    return HEADER.unpack(head)[1]
+
+def open_lexicon(path=LEXICON_PATH):
+    if lexicon_version(path) != VERSION:
+        print("🛠️ Building the KoParadigm lexicon (one time, a few minutes)...")
+        count = build_lexicon(path)
+        print(f"✅ Lexicon built: {count} surface forms.")
+    return Lexicon(path)
+
+if __name__ == "__main__":
+    lexicon = open_lexicon()
+    for word in ["갔어요", "하면서", "먹었다", "좋습니다", "공부해요", "와요"]:
+        print(word, "→", lexicon.lookup(word))
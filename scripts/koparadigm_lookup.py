@@ -0,0 +1,289 @@
+# %%
+# This module holds the lookup structures used by the KoParadigm reverse search (KoParadigm_reverse_search.py).
+#   KoParadigm (Park, 2020, arXiv:2004.13221) combines verbs and endings at jamo level, so endings are matched
+#   the same way here: every ending of koparadigm_endings.csv is decomposed into jamo (a leading consonant such as
+#   the ㄴ of ㄴ가 is a final consonant, 받침) and inserted reversed into a suffix trie.
+#   Walking a word backwards through the trie returns every ending it ends with, and its ending class,
+#   in O(len(word)) instead of testing the ~600 endings one by one.
+#   The verbs are indexed by (verb class, first jamo) and (verb class, first jamo, last syllable), so the
+#   candidate lemmas of step 2 are plain dictionary lookups instead of boolean masks over the verbs DataFrame.
+#   Step 3 runs the template rules backwards (InverseRules): every surface tail an ending can take (as is, contracted
+#   with the verb's last vowel, or after an inserted ㅇ) is in a second suffix trie, so a word directly yields the few
+#   stems it can come from, which are confirmed by hash lookup in the verb list and by conjugating them forward.
+#   The verbs and endings come from the binary bundle (koparadigm_bundle.py) or, with from_csv, from the CSVs.
+#   Hangul is decomposed and composed with Unicode arithmetic (hangul.py); forward conjugation is in koparadigm_rules.py.
+
+import csv
+from hangul import HCJ_LEADS, to_jamo, is_syllable, compose as compose_jamo, syllable_jamo as get_jamo
+from koparadigm_template import KOPARADIGM_DIR, TEMPLATE_PATH, load_template
+from koparadigm_bundle import open_bundle
+from koparadigm_rules import CONTRACTIONS, FILLER, combine
+
+# ✅ Default paths
+ENDINGS_PATH = KOPARADIGM_DIR / "koparadigm_endings.csv"
+VERBS_PATH = KOPARADIGM_DIR / "koparadigm_verbs_df_jamo.csv"
+
+def load_endings(path=ENDINGS_PATH):
+    """[(ending, ending_class), ...] in file order."""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        return [(row["Ending"], int(row["Class"])) for row in csv.DictReader(f)]
+
+# ✅ Stacked endings
+# KoParadigm conjugates a verb with one ending, and the tense / mood pre-final endings (았, 었, 였, 겠...) are endings
+#   of their own: 갔어요 is not a form of the paradigm but the form 갔 (가 + 았) followed by the ending 어요.
+PREFINAL_ENDINGS = {"았", "었", "였", "았었", "었었", "였었", "겠"}
+
+def final_endings(endings):
+    """Endings that can follow a pre-final ending: the ones starting with a full syllable (어요, 다, 습니다...)."""
+    return {ending for ending in endings if ending and is_syllable(ending[0]) and ending not in PREFINAL_ENDINGS}
+
+def prefinal_splits(word, finals):
+    """Yield (head, final) for every way the word ends with one of the final endings after a non-empty head."""
+    for i in range(1, len(word)):
+        if word[i:] in finals:
+            yield word[:i], word[i:]
+
+# ✅ Ending suffix trie
+class EndingTrie:
+    END = None  # key of the list of endings terminating at a node (jamo keys are strings)
+
+    def __init__(self, endings=()):
+        self.root = {}
+        self.size = 0
+        for ending, class_id in endings:
+            self.add(ending, class_id)
+
+    @classmethod
+    def from_csv(cls, path=ENDINGS_PATH):
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            return cls((row["Ending"], int(row["Class"])) for row in csv.DictReader(f))
+
+    @classmethod
+    def from_bundle(cls, bundle=None):
+        return cls((bundle or open_bundle()).ending_list())
+
+    def add(self, ending, class_id):
+        jamo_ending = to_jamo(ending)
+        node = self.root
+        for ch in reversed(jamo_ending):
+            node = node.setdefault(ch, {})
+        node.setdefault(self.END, []).append((ending, class_id, len(jamo_ending)))
+        self.size += 1
+
+    def match_jamo(self, jamo_word):
+        """Return [(ending, class_id, ending_jamo_length), ...] for every ending the jamo string ends with."""
+        matches = []
+        node = self.root
+        for ch in reversed(jamo_word):
+            node = node.get(ch)
+            if node is None:
+                break
+            matches.extend(node.get(self.END, ()))
+        return matches
+
+    def match(self, word):
+        return self.match_jamo(to_jamo(word))
+
+# ✅ Step 1 of the reverse search: possible endings and stem clues
+def detect_candidate_endings(conjugated_word, ending_trie):
+    jamo_word = to_jamo(conjugated_word)
+    candidates = []
+    for ending, class_id, length in ending_trie.match_jamo(jamo_word):
+        stem_candidate = compose_jamo(jamo_word[:-length])
+        if not stem_candidate:
+            continue
+
+        last_syllable = stem_candidate[-1]
+        first_syllable = stem_candidate[0]
+        candidates.append({
+            "word": conjugated_word,
+            "ending": ending,
+            "class_id": class_id,
+            "stem_candidate": stem_candidate,
+            "last_syllable": last_syllable,
+            "last_jamo": get_jamo(last_syllable),
+            "first_syllable": first_syllable,
+            "first_jamo": get_jamo(first_syllable)[0],
+        })
+    return candidates
+
+# ✅ Conjugation template: {verb_class: {ending_class: (stop, postfix, start)}}, compiled and cached once
+def parse_template(path=TEMPLATE_PATH):
+    return load_template(path).as_dict()
+
+def rules_by_ending_class(rules):
+    """Invert the template: {ending_class: [(verb_class, rule), ...]}."""
+    inverted = {}
+    for verb_class, rule_map in rules.items():
+        for ending_class, rule in rule_map.items():
+            inverted.setdefault(ending_class, []).append((verb_class, rule))
+    return inverted
+
+# ✅ Verb index
+class VerbIndex:
+    def __init__(self, verbs, classes, first_jamos):
+        self.verbs = verbs
+        self.classes = classes
+        self.by_first_jamo = {}
+        self.by_last_syllable = {}
+        for verb_id, (verb, verb_class, first_jamo) in enumerate(zip(verbs, classes, first_jamos)):
+            self.by_first_jamo.setdefault((verb_class, first_jamo), []).append(verb_id)
+            self.by_last_syllable.setdefault((verb_class, first_jamo, verb[-1]), []).append(verb_id)
+
+    @classmethod
+    def from_csv(cls, path=VERBS_PATH):
+        verbs, classes, first_jamos = [], [], []
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            for row in csv.DictReader(f):
+                if not row["Verb"]:
+                    continue
+                verbs.append(row["Verb"])
+                classes.append(int(row["Class"]))
+                first_jamos.append(row["first_jamo"] or get_jamo(row["Verb"][0])[0])
+        return cls(verbs, classes, first_jamos)
+
+    @classmethod
+    def from_bundle(cls, bundle=None):
+        bundle = bundle or open_bundle()
+        leads = list(HCJ_LEADS) + [None]
+        return cls(bundle.verbs.tolist(), bundle.verb_classes.tolist(),
+                   [leads[i] for i in bundle.first_jamo_ids.tolist()])
+
+    def __len__(self):
+        return len(self.verbs)
+
+    def candidates(self, verb_class, first_jamo, last_syllable=None):
+        """Verb ids of a class starting with first_jamo (and ending with last_syllable when given)."""
+        if last_syllable is None:
+            return self.by_first_jamo.get((verb_class, first_jamo), [])
+        return self.by_last_syllable.get((verb_class, first_jamo, last_syllable), [])
+
+# ✅ Step 2 of the reverse search: candidate lemmas for each detected ending
+def keeps_stem(rule):
+    # (,,) style rules attach the ending to the untouched verb, so the stem candidate ends like the lemma
+    stop, postfix, _ = rule
+    return stop is None and not postfix
+
+def filter_candidates(step1_results, verb_index, rules_inverted):
+    filtered = []
+    for item in step1_results:
+        for verb_class, rule in rules_inverted.get(item["class_id"], ()):
+            last_syllable = item["last_syllable"] if keeps_stem(rule) else None
+            for verb_id in verb_index.candidates(verb_class, item["first_jamo"], last_syllable):
+                filtered.append({
+                    "lemma": verb_index.verbs[verb_id],
+                    "verb_class": verb_class,
+                    "ending_class": item["class_id"],
+                    "rule": rule,
+                    "ending": item["ending"],
+                    "original_word": item["word"],
+                    "stem_candidate": item["stem_candidate"],
+                    "first_jamo": item["first_jamo"],
+                })
+    return filtered
+
+# ✅ Step 3 of the reverse search: template rules inverted
+PLAIN, FILLED = -1, -2  # tail kinds besides the index of a contraction in CONTRACTIONS
+
+class InverseRules:
+    def __init__(self, verbs, classes, endings, rules):
+        self.endings = endings
+        self.endings_jamo = [to_jamo(ending) for ending, _ in endings]
+        self.finals = final_endings(ending for ending, _ in endings)
+        self.rules = rules
+
+        # Verbs by jamo (hash confirmation) and, per (verb class, stop), the jamo suffixes a stop can remove
+        self.verb_classes = {}
+        self.removed = {}
+        stops_by_class = {verb_class: {rule[0] for rule in rule_map.values() if rule[0] is not None}
+                          for verb_class, rule_map in rules.items()}
+        for verb, verb_class in zip(verbs, classes):
+            verb_jamo = to_jamo(verb)
+            self.verb_classes.setdefault(verb_jamo, {})[verb_class] = verb
+            for stop in stops_by_class.get(verb_class, ()):
+                self.removed.setdefault((verb_class, stop), set()).add(verb_jamo[stop:])
+
+        # Verb classes and rule of each (ending class, start)
+        self.classes_by_start = {}
+        for verb_class, rule_map in rules.items():
+            for ending_class, rule in rule_map.items():
+                self.classes_by_start.setdefault((ending_class, rule[2]), []).append((verb_class, rule))
+
+        # Surface tails of every ending, reversed in a trie: node[None] = [(ending_id, start, kind), ...]
+        self.root = {}
+        for ending_id, (_, ending_class) in enumerate(endings):
+            for start in {start for (ec, start) in self.classes_by_start if ec == ending_class}:
+                tail = self.endings_jamo[ending_id][start:]
+                for kind, surface in self.surface_tails(tail):
+                    node = self.root
+                    for ch in reversed(surface):
+                        node = node.setdefault(ch, {})
+                    node.setdefault(None, []).append((ending_id, start, kind))
+
+    @classmethod
+    def from_bundle(cls, bundle=None):
+        bundle = bundle or open_bundle()
+        return cls(bundle.verbs.tolist(), bundle.verb_classes.tolist(), bundle.ending_list(),
+                   bundle.template().as_dict())
+
+    @staticmethod
+    def surface_tails(tail):
+        yield PLAIN, tail
+        for k, (untouched, contraction, cond) in enumerate(CONTRACTIONS):
+            if tail[:1] == untouched[-1]:
+                yield k, contraction + tail[1:]
+                if cond == "optional":
+                    yield FILLED, FILLER + tail
+
+    def heads(self, token_jamo):
+        """Yield (head, ending_id, start) for every way the word splits into a rule head and an ending tail."""
+        node = self.root
+        for depth in range(len(token_jamo) + 1):
+            for ending_id, start, kind in node.get(None, ()):
+                rest = token_jamo[:len(token_jamo) - depth]
+                # A contracted tail also replaced the head side of the contraction (one jamo, or 하 / 오)
+                yield (rest + CONTRACTIONS[kind][0].split("|")[0] if kind >= 0 else rest), ending_id, start
+            if depth == len(token_jamo):
+                break
+            node = node.get(token_jamo[-1 - depth])
+            if node is None:
+                break
+
+    def candidates(self, word):
+        """Yield the (lemma, verb_class, ending, ending_class, rule) the rules allow, before the forward check."""
+        seen = set()
+        for head, ending_id, start in self.heads(to_jamo(word)):
+            ending, ending_class = self.endings[ending_id]
+            for verb_class, rule in self.classes_by_start.get((ending_class, start), ()):
+                stop, postfix, _ = rule
+                if not head.endswith(postfix):
+                    continue
+                base = head[:len(head) - len(postfix)]
+                stems = [base] if stop is None else [base + s for s in self.removed.get((verb_class, stop), ())]
+                for verb_jamo in stems:
+                    lemma = self.verb_classes.get(verb_jamo, {}).get(verb_class)
+                    key = (lemma, verb_class, ending_id)
+                    if lemma is None or key in seen:
+                        continue
+                    seen.add(key)
+                    yield lemma, verb_class, ending, ending_class, rule
+
+    @staticmethod
+    def verify(word, analysis):
+        """Forward check: the rule must really produce the word."""
+        lemma, _, ending, _, rule = analysis
+        return word in combine(to_jamo(lemma), to_jamo(ending), rule)
+
+    def stacked_candidates(self, word):
+        """candidates() of a form ending in a pre-final ending, followed by a final ending (갔어요 = 갔 + 어요).
+        The ending of each analysis is the two endings joined (았어요), which verify() conjugates as one."""
+        for head, final in prefinal_splits(word, self.finals):
+            for lemma, verb_class, ending, ending_class, rule in self.candidates(head):
+                if ending in PREFINAL_ENDINGS:
+                    yield lemma, verb_class, ending + final, ending_class, rule
+
+    def stems(self, word):
+        """[(lemma, verb_class, ending, ending_class, rule), ...] of every analysis of a conjugated word;
+        the stacked analyses are only looked for when the word is not a form of the paradigm."""
+        analyses = [analysis for analysis in self.candidates(word) if self.verify(word, analysis)]
+        return analyses or [analysis for analysis in self.stacked_candidates(word) if self.verify(word, analysis)]
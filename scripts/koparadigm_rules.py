@@ -0,0 +1,154 @@
+# %%
+# This module is the KoParadigm rule engine (Park, 2020, arXiv:2004.13221), applied at jamo level.
+#   A template rule (stop, postfix, start) conjugates a verb with an ending in KoParadigm's steps:
+#     1. decompose the verb into jamo and keep verb[:stop], then append the postfix
+#     2. decompose the ending (a leading ㄴ/ㄹ/ㅁ/ㅂ is a tail) and keep ending[start:]
+#     3. contract the vowels meeting at the junction (아+아 → 아, 우+어 → 워...), optional contractions give two forms
+#     4. compose the jamo back into syllables
+#   combine() does this for one verb and one ending. generate_forms() does it for every verb × ending the template
+#   allows, vectorized with NumPy (hangul.py): for one verb class and one rule, all verb heads and ending tails are
+#   laid out as code-point arrays, joined, contracted with masks and composed in one pass.
+#   The deprecated get_all_forms sliced whole syllables instead of jamo, which is why its forms were wrong.
+#   Forms that are not fully composed (still holding conjoining jamo) are dropped by both.
+
+import re
+import numpy as np
+from hangul import to_jamo, compose, to_codes, compose_codes, from_codes
+
+# ✅ Vowel contractions, as in KoParadigm's Paradigm.contract (first match wins)
+#   Everything is conjoining jamo: 오|ᅡ and 하|ᅧ are written with to_jamo() so no editor can precompose them
+CONTRACTIONS = [
+    ("ᅡ|ᅡ", "ᅡ", "required"),
+    ("ᅥ|ᅥ", "ᅥ", "required"),
+    (to_jamo("오") + "|ᅡ", to_jamo("와"), "required"),
+    ("ᅩ|ᅡ", "ᅪ", "optional"),
+    ("ᅮ|ᅥ", "ᅯ", "optional"),
+    ("ᅳ|ᅥ", "ᅥ", "required"),
+    ("ᅵ|ᅥ", "ᅧ", "optional"),
+    ("ᅢ|ᅥ", "ᅢ", "optional"),
+    ("ᅦ|ᅥ", "ᅦ", "optional"),
+    ("ᅬ|ᅥ", "ᅫ", "optional"),
+    (to_jamo("하") + "|ᅧ", to_jamo("해"), "optional"),
+]
+FILLER = "ᄋ"  # silent initial put back in front of the ending when an optional contraction is not applied
+VERB_CHUNK = 2048  # verbs conjugated per array
+# A form that still holds a conjoining jamo after composition is not a word (KoParadigm itself emits a few, e.g.
+#   뛰 + ᅥ → 뛰ᅥ): such forms are dropped
+STRAY_JAMO = re.compile("[\u1100-\u11ff]")
+
+def is_word(form):
+    return bool(form) and not STRAY_JAMO.search(form)
+
+def contract(wordform):
+    """Contract the vowels around the verb|ending boundary. Optional contractions return "full/contracted"."""
+    for untouched, contraction, cond in CONTRACTIONS:
+        if untouched in wordform:
+            contracted = wordform.replace(untouched, contraction)
+            if cond == "optional":
+                return wordform.replace("|", FILLER) + "/" + contracted
+            return contracted
+    return wordform.replace("|", "")
+
+def combine(verb_jamo, ending_jamo, rule):
+    """Surface forms of verb + ending (both already in jamo, see hangul.to_jamo) under a template rule."""
+    stop, postfix, start = rule
+    forms = compose(contract(verb_jamo[:stop] + postfix + "|" + ending_jamo[start:])).split("/")
+    return [form for form in forms if is_word(form)]
+
+def verb_category(verb_class):
+    if verb_class < 3:
+        return "Action Verb/Descriptive Verb"
+    elif verb_class == 14:
+        return "Copula"
+    elif verb_class <= 6 or 15 <= verb_class <= 30:
+        return "Action Verb"
+    return "Descriptive Verb"
+
+def conjugate(verb, verb_classes, endings, rules):
+    """KoParadigm's Paradigm.conjugate: [[category, [(ending, form), ...]], ...], one entry per verb class."""
+    verb_jamo = to_jamo(verb)
+    paradigms = []
+    for verb_class in verb_classes:
+        rule_map = rules.get(verb_class, {})
+        pairs = []
+        for ending, ending_class in endings:
+            rule = rule_map.get(ending_class)
+            forms = combine(verb_jamo, to_jamo(ending), rule) if rule is not None else []
+            if forms:
+                pairs.append((ending, "/".join(forms)))
+        paradigms.append([verb_category(verb_class), pairs])
+    return paradigms
+
+# ✅ Vectorized generation
+def apply_rule(verbs_jamo, endings_jamo, rule):
+    """combine() of every verb × every ending under one rule.
+    Returns (verb positions, ending positions, forms), one entry per non-empty surface form."""
+    stop, postfix, start = rule
+    heads = to_codes([verb[:stop] + postfix for verb in verbs_jamo], align="right")  # junction on the right edge
+    tails = [ending[start:] for ending in endings_jamo]
+    tails = to_codes(tails, width=max(len(t) for t in tails) + 1)                    # spare column for FILLER
+    n_verbs, n_endings = len(heads), len(tails)
+    head_width = heads.shape[1]
+
+    # Contraction of each verb × ending pair, from the jamo on both sides of the junction
+    #   (the head side of 오|ᅡ and 하|ᅧ is two jamo long; a contraction always has the length of that side)
+    first = tails[:, 0]
+    kind = np.full((n_verbs, n_endings), -1, dtype=np.int8)
+    for k, (untouched, _, _) in enumerate(CONTRACTIONS):
+        before, after = untouched.split("|")
+        if len(before) > head_width:
+            continue
+        ends_with = (heads[:, head_width - len(before):] == to_codes([before])[0]).all(axis=1)
+        kind[(ends_with[:, None] & (first == ord(after))[None, :]) & (kind < 0)] = k
+    optional = np.array([cond == "optional" for _, _, cond in CONTRACTIONS])
+
+    pair_verbs, pair_endings = np.divmod(np.arange(n_verbs * n_endings), n_endings)
+    joined = np.concatenate([heads[pair_verbs], tails[pair_endings]], axis=1)
+    kind = kind.ravel()
+    contracted = kind >= 0
+
+    # Contracted pairs: the last head jamo becomes the contraction and the first tail jamo is dropped
+    rows = joined[contracted]
+    if len(rows):
+        row_kinds = kind[contracted]
+        for k, (_, contraction, _) in enumerate(CONTRACTIONS):
+            rows[np.ix_(row_kinds == k, range(head_width - len(contraction), head_width))] = to_codes([contraction])[0]
+        rows[:, head_width:-1] = rows[:, head_width + 1:]
+        rows[:, -1] = 0
+    # Optional contractions also keep the full form, with FILLER at the junction
+    full = contracted.copy()
+    full[contracted] = optional[kind[contracted]]
+    filled = joined[full]
+    filled[:, head_width + 1:] = filled[:, head_width:-1]
+    filled[:, head_width] = ord(FILLER)
+
+    # Same order as KoParadigm's "full/contracted"
+    codes = np.concatenate([joined[~contracted], filled, rows])
+    verb_pos = np.concatenate([pair_verbs[~contracted], pair_verbs[full], pair_verbs[contracted]])
+    ending_pos = np.concatenate([pair_endings[~contracted], pair_endings[full], pair_endings[contracted]])
+    forms = from_codes(compose_codes(codes), compacted=True)
+    keep = [i for i, form in enumerate(forms) if is_word(form)]
+    return verb_pos[keep], ending_pos[keep], [forms[i] for i in keep]
+
+def generate_forms(verbs, classes, endings, rules, chunk_size=VERB_CHUNK):
+    """Yield (verb_ids, ending_ids, forms) batches covering every verb × ending the template allows.
+    verbs/classes are parallel lists (one entry per verb row), endings is [(ending, ending_class), ...]."""
+    endings_jamo = [to_jamo(ending) for ending, _ in endings]
+    endings_by_class = {}
+    for ending_id, (_, ending_class) in enumerate(endings):
+        endings_by_class.setdefault(ending_class, []).append(ending_id)
+
+    verbs_by_class = {}
+    for verb_id, verb_class in enumerate(classes):
+        verbs_by_class.setdefault(verb_class, []).append(verb_id)
+
+    for verb_class, verb_ids in verbs_by_class.items():
+        for chunk in range(0, len(verb_ids), chunk_size):
+            chunk_ids = np.array(verb_ids[chunk:chunk + chunk_size])
+            chunk_jamo = [to_jamo(verbs[i]) for i in chunk_ids]
+            for ending_class, rule in rules.get(verb_class, {}).items():
+                ending_ids = np.array(endings_by_class.get(ending_class, []))
+                if not len(ending_ids):
+                    continue
+                verb_pos, ending_pos, forms = apply_rule(chunk_jamo, [endings_jamo[i] for i in ending_ids], rule)
+                yield chunk_ids[verb_pos], ending_ids[ending_pos], forms
@@ -0,0 +1,116 @@
+# %%
+# This module compiles the KoParadigm conjugation template (koparadigm_template.csv) once and caches it.
+#   The template says, for every verb class × ending class, which rule (stop, postfix, start) conjugates them,
+#   if any. It is compiled into:
+#     - matrix: a dense int16 array indexed [verb_class, ending_class] holding a rule id, -1 when incompatible
+#     - rules: the small table of distinct rules, rule id → (stop, postfix, start)
+#   and saved next to the CSV as koparadigm_template.npz together with the sha256 of the CSV, so every KoParadigm
+#   script loads the rules without parsing and recompiles only when the CSV changes.
+#   Compatibility checks are array lookups: template.matrix[verb_class, ending_class] >= 0.
+
+import csv
+import hashlib
+import numpy as np
+from pathlib import Path
+
+# ✅ Default paths
+KOPARADIGM_DIR = Path("data/vocab/koparadigm_vocab")
+TEMPLATE_PATH = KOPARADIGM_DIR / "koparadigm_template.csv"
+NO_RULE = -1
+
+# ✅ Parsing
+def parse_rule(cell):
+    """"(stop,postfix,start)" → (stop, postfix, start) with None for empty indices; None for an empty cell."""
+    cell = cell.strip()
+    if not cell or cell == "NaN":
+        return None
+    stop, postfix, start = [p.strip() for p in cell.strip("()").split(",")]
+    return (int(stop) if stop else None, postfix, int(start) if start else None)
+
+def compile_template(path=TEMPLATE_PATH):
+    """Parse the CSV into (matrix, rules). Row 0 holds the ending classes, rows 2+ one verb class each."""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.reader(f))
+    ending_classes = [int(c) for c in rows[0][2:]]
+    verb_classes = [int(row[0]) for row in rows[2:]]
+
+    matrix = np.full((max(verb_classes) + 1, max(ending_classes) + 1), NO_RULE, dtype=np.int16)
+    rules, rule_ids = [], {}
+    for verb_class, row in zip(verb_classes, rows[2:]):
+        for ending_class, cell in zip(ending_classes, row[2:]):
+            rule = parse_rule(cell)
+            if rule is not None:
+                matrix[verb_class, ending_class] = rule_ids.setdefault(rule, len(rule_ids))
+                if len(rules) < len(rule_ids):
+                    rules.append(rule)
+    return matrix, rules
+
+# ✅ Compiled template
+class Template:
+    def __init__(self, matrix, rules):
+        self.matrix = matrix
+        self.rules = rules
+
+    def verb_classes(self):
+        return np.nonzero((self.matrix >= 0).any(axis=1))[0].tolist()
+
+    def rule(self, verb_class, ending_class):
+        rule_id = self.matrix[verb_class, ending_class]
+        return self.rules[rule_id] if rule_id >= 0 else None
+
+    def compatible(self, verb_class, ending_class):
+        return self.matrix[verb_class, ending_class] >= 0
+
+    def verb_classes_for(self, ending_class):
+        """Verb classes that take endings of this class."""
+        return np.nonzero(self.matrix[:, ending_class] >= 0)[0].tolist()
+
+    def as_dict(self):
+        """{verb_class: {ending_class: (stop, postfix, start)}}, the format of the old parse_template_with_logs."""
+        rules = {verb_class: {} for verb_class in self.verb_classes()}
+        for verb_class, ending_class in zip(*np.nonzero(self.matrix >= 0)):
+            rules[int(verb_class)][int(ending_class)] = self.rules[self.matrix[verb_class, ending_class]]
+        return rules
+
+# ✅ Cache
+def file_sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def cache_path_for(path):
+    return Path(path).with_suffix(".npz")
+
+def save_template(template, sha256, cache_path):
+    stops = np.array([NO_RULE if stop is None else stop for stop, _, _ in template.rules], dtype=np.int16)
+    starts = np.array([NO_RULE if start is None else start for _, _, start in template.rules], dtype=np.int16)
+    has_stop = np.array([stop is not None for stop, _, _ in template.rules])
+    has_start = np.array([start is not None for _, _, start in template.rules])
+    postfixes = np.array([postfix for _, postfix, _ in template.rules], dtype=str)
+    np.savez(cache_path, matrix=template.matrix, stops=stops, has_stop=has_stop, postfixes=postfixes,
+             starts=starts, has_start=has_start, sha256=np.array(sha256))
+
+def read_cached_template(cache_path, sha256):
+    if not Path(cache_path).exists():
+        return None
+    with np.load(cache_path) as data:
+        if str(data["sha256"]) != sha256:
+            return None
+        rules = [(int(stop) if has_stop else None, str(postfix), int(start) if has_start else None)
+                 for stop, has_stop, postfix, start, has_start in
+                 zip(data["stops"], data["has_stop"], data["postfixes"], data["starts"], data["has_start"])]
+        return Template(data["matrix"], rules)
+
+_loaded = {}
+
+def load_template(path=TEMPLATE_PATH):
+    """Compiled template of a CSV, from the .npz cache when it matches the CSV checksum."""
+    sha256 = file_sha256(path)
+    key = (str(path), sha256)
+    if key not in _loaded:
+        cache_path = cache_path_for(path)
+        template = read_cached_template(cache_path, sha256)
+        if template is None:
+            template = Template(*compile_template(path))
+            save_template(template, sha256, cache_path)
+        _loaded[key] = template
+    return _loaded[key]
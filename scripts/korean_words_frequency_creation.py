@@ -1,20 +1,27 @@
 # This code loads pre-extracted wikipedia paragraphs, initializes a Korean tokenizer and runs it via loop through all paragraphs, 
 #   in order to extract all morphemes and store their frequencies into a dataframe sorted from most to least frequent and saves it into a json.
+#   Exact and near-duplicate paragraphs (boilerplate, repeated list items) are dropped first so they are not tokenized and counted twice.
 
 import json
 from pathlib import Path
 from konlpy.tag import Okt
 from collections import Counter
 import pandas as pd
+from paragraph_dedup import dedup_articles, format_report
 
 # ✅ Load the Wikipedia paragraph dataset
 DATA_DIR = Path("data/json")  # adjust if needed
 input_file = DATA_DIR / "selected_wikipedia_paragraphs.json"
 output_file = Path("data/vocab/korean_token_frequency.csv")
+DEDUP_THRESHOLD = 0.8  # estimated Jaccard similarity above which a paragraph counts as a duplicate
 
 with open(input_file, "r", encoding="utf-8") as f:
     article_data = json.load(f)
 
+# 🧹 Drop exact and near-duplicate paragraphs before tokenization
+article_data, dedup_report = dedup_articles(article_data, threshold=DEDUP_THRESHOLD)
+print(format_report(dedup_report))
+
 # ✅ Initialize tokenizer
 okt = Okt()
 
@@ -0,0 +1,105 @@
+# %%
+# This script load-tests learner_server.py: LEARNERS simulated learners, each on its own keep-alive connection,
+#   run reading sessions concurrently for DURATION seconds (coverage once, then next paragraph → mark a few words →
+#   mark seen, over and over) and the script prints the requests per second and the p50 / p95 / p99 latency per
+#   endpoint, as seen by the clients. Start the server first (python learner_server.py), or set START_SERVER to run
+#   one in this process on the cached tokenized corpus.
+#   The learners are named load-test-<n>, so their files in data/json/learners/ can be deleted afterwards.
+
+import json
+import time
+import random
+import asyncio
+from urllib.parse import urlencode
+from session_engine import percentile, KNOWN, UNKNOWN
+
+# ✅ Settings
+HOST, PORT = "127.0.0.1", 8765
+LEARNERS = 50
+DURATION = 10  # seconds
+START_SERVER = False
+
+# ✅ Client
+class Client:
+    def __init__(self, reader, writer):
+        self.reader, self.writer = reader, writer
+
+    @classmethod
+    async def connect(cls, host=HOST, port=PORT):
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, method, path, params=None, body=None):
+        if params:
+            path += "?" + urlencode(params)
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8") if body is not None else b""
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: {HOST}\r\nContent-Type: application/json\r\n"
+                          f"Content-Length: {len(data)}\r\n\r\n".encode("latin-1") + data)
+        await self.writer.drain()
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        status = int(head.split(b" ", 2)[1])
+        length = next(int(line.split(b":", 1)[1]) for line in head.split(b"\r\n")
+                      if line.lower().startswith(b"content-length:"))
+        payload = json.loads(await self.reader.readexactly(length))
+        if status != 200:
+            raise RuntimeError(f"{method} {path}: {status} {payload}")
+        return payload
+
+    def close(self):
+        self.writer.close()
+
+# ✅ Simulated learner
+async def learner_session(n, deadline, latencies):
+    learner = f"load-test-{n}"
+    rng = random.Random(n)
+    client = await Client.connect()
+
+    async def timed(name, *args, **kwargs):
+        start = time.perf_counter()
+        payload = await client.request(*args, **kwargs)
+        latencies.setdefault(name, []).append(time.perf_counter() - start)
+        return payload
+
+    try:
+        while time.perf_counter() < deadline:
+            bins = (await timed("coverage", "GET", "/coverage", {"learner": learner}))["bins"]
+            label = rng.choice([label for label, count in bins.items() if count] or list(bins))
+            while time.perf_counter() < deadline:
+                item = (await timed("next", "GET", "/next", {"learner": learner, "bin": label}))["item"]
+                if item is None:
+                    break
+                statuses = {t: KNOWN if rng.random() < 0.8 else UNKNOWN for t in item["tokens"][:5]}
+                await timed("mark", "POST", "/mark", body={"learner": learner, "statuses": statuses})
+                await timed("seen", "POST", "/seen", body={"learner": learner, "korean": item["korean"]})
+    finally:
+        client.close()
+
+async def load_test(learners=LEARNERS, duration=DURATION):
+    latencies = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(learner_session(n, start + duration, latencies) for n in range(learners)))
+    elapsed = time.perf_counter() - start
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"✅ {learners} learners, {total} requests in {elapsed:.1f}s: {total / elapsed:.0f} requests/s")
+    for name, values in sorted(latencies.items()):
+        values.sort()
+        print(f"⏱️ {name:>9}: {len(values):>6} calls, p50 {percentile(values, 0.50) * 1000:.2f}ms, "
+              f"p95 {percentile(values, 0.95) * 1000:.2f}ms, p99 {percentile(values, 0.99) * 1000:.2f}ms")
+    client = await Client.connect()
+    print(f"🖥️ Server side: {await client.request('GET', '/stats')}")
+    client.close()
+
+async def main():
+    if START_SERVER:
+        from learner_server import LearnerServer, load_corpus
+        server = asyncio.create_task(LearnerServer(load_corpus()).serve(HOST, PORT))
+        await asyncio.sleep(0.5)
+        try:
+            await load_test()
+        finally:
+            server.cancel()
+    else:
+        await load_test()
+
+if __name__ == "__main__":
+    asyncio.run(main())
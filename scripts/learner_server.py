@@ -0,0 +1,276 @@
+# %%
+# This script serves the reading sessions of session_engine.py to many learners at once, over local HTTP / JSON.
+#   Instead of one notebook kernel (with its own JVM and its own copy of the corpus) per learner, the server tokenizes
+#   the paragraphs once (Okt results are cached in data/json/tokenized_paragraphs.json, so a restart does not even
+#   start the JVM), keeps that one TokenizedCorpus in memory and gives every learner a SessionEngine over it with their
+#   own known / unknown / seen words (data/json/learners/<learner>/). It runs on a single asyncio event loop with plain
+#   asyncio streams (HTTP/1.1 keep-alive, no web framework); every engine call is in-memory and takes microseconds.
+#   Endpoints (learner = ?learner=... or "learner" in the JSON body):
+#     GET  /coverage?learner=a           → {"bins": {label: count}}
+#     GET  /next?learner=a&bin=93%-97%   → next paragraph of the bin ({"item": null} when done)
+#     POST /mark {"learner", "token", "status"} or {"learner", "statuses": {token: status}}  (green / red / grey)
+#     POST /seen {"learner", "korean"}
+#     GET  /stats                        → per-endpoint latency p50 / p95 / p99 and the number of learners
+#   Missing or malformed fields (and unparsable requests) get a 400 and change nothing.
+#   Learner files are written by a background task every SAVE_INTERVAL seconds and on shutdown.
+#   learner_load_test.py measures the requests per second and tail latency.
+
+import re
+import json
+import time
+import signal
+import asyncio
+import hashlib
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qsl
+from article_store import JSON_DIR, DEFAULT_JSON
+from paragraph_dedup import dedup_paragraphs, format_report
+from session_engine import TokenizedCorpus, SessionEngine, percentile, KNOWN, UNKNOWN, NEUTRAL
+
+# ✅ Settings
+HOST, PORT = "127.0.0.1", 8765
+PARAGRAPHS_JSON = DEFAULT_JSON  # written by main.py / wikipedia_articles_download.py
+TOKENIZED_JSON = JSON_DIR / "tokenized_paragraphs.json"
+LEARNERS_DIR = JSON_DIR / "learners"
+SAVE_INTERVAL = 30  # seconds between two writes of the learners' files
+LEARNER_ID = re.compile(r"[A-Za-z0-9_-]{1,64}")
+LATENCY_WINDOW = 10_000
+STATUSES = {KNOWN, UNKNOWN, NEUTRAL}
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+# ✅ Corpus, tokenized once
+def korean_tokens(okt, text):
+    tokens = okt.morphs(str(text))
+    return [t for t in tokens if re.search(r"[가-힣]", t) and len(t) > 1]
+
+def load_corpus(paragraphs_json=PARAGRAPHS_JSON, tokenized_json=TOKENIZED_JSON):
+    """The deduplicated, tokenized paragraphs; Okt only runs when the paragraphs file changed since the last run."""
+    source = Path(paragraphs_json).read_bytes()
+    sha256 = hashlib.sha256(source).hexdigest()
+    if Path(tokenized_json).exists():
+        with open(tokenized_json, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached["sha256"] == sha256:
+            return TokenizedCorpus(cached["rows"])
+
+    from konlpy.tag import Okt  # the JVM is only started when the cache is missing or stale
+    okt = Okt()
+    paragraphs = [p.strip() for paras in json.loads(source).values() for p in paras if p.strip()]
+    paragraphs, report = dedup_paragraphs(paragraphs)
+    print(format_report(report))
+    rows = [{"korean": p, "tokens": korean_tokens(okt, p)} for p in paragraphs]
+    with open(tokenized_json, "w", encoding="utf-8") as f:
+        json.dump({"sha256": sha256, "rows": rows}, f, ensure_ascii=False)
+    return TokenizedCorpus(rows)
+
+# ✅ Learners
+def load_set(path):
+    return set(json.load(open(path, encoding="utf-8"))) if path.exists() else set()
+
+class Learners:
+    def __init__(self, corpus, learners_dir=LEARNERS_DIR):
+        self.corpus = corpus
+        self.learners_dir = Path(learners_dir)
+        self.engines = {}
+        self.reading = {}  # learner → coverage bin being read
+        self.dirty = set()
+
+    def engine(self, learner):
+        if not isinstance(learner, str) or not LEARNER_ID.fullmatch(learner):
+            raise ValueError("a learner id ([A-Za-z0-9_-], at most 64 characters) is required")
+        if learner not in self.engines:
+            folder = self.learners_dir / learner
+            paths = {name: folder / f"{name}.json" for name in ("known", "unknown", "seen")}
+            # lookahead=0: preparing an item is a few set lookups, not worth one thread per learner
+            self.engines[learner] = SessionEngine(self.corpus, load_set(paths["known"]), load_set(paths["unknown"]),
+                                                  load_set(paths["seen"]), save_paths=paths, lookahead=0)
+        return self.engines[learner]
+
+    def next_item(self, learner, label):
+        engine = self.engine(learner)
+        if label not in engine.labels:
+            raise ValueError(f"unknown coverage bin: {label}")
+        if self.reading.get(learner) != label:
+            engine.start_reading(label)
+            self.reading[learner] = label
+        item = engine.next_item()
+        if item is None:
+            self.reading.pop(learner, None)
+        return item
+
+    def save(self):
+        # Each learner is saved on its own: one failure must not keep the others' progress from being written
+        for learner in list(self.dirty):
+            try:
+                (self.learners_dir / learner).mkdir(parents=True, exist_ok=True)
+                self.engines[learner].save()
+                self.dirty.discard(learner)
+            except Exception as e:
+                print(f"⚠️ Could not save learner {learner}: {e!r}")
+
+# ✅ Request validation
+def text_field(params, name):
+    value = params.get(name)
+    if not isinstance(value, str) or not value:
+        raise ValueError(f'"{name}" must be a non-empty string')
+    return value
+
+def statuses_field(params):
+    """{token: status} from "statuses", or from "token" and "status"."""
+    if "statuses" in params:
+        statuses = params["statuses"]
+        if not isinstance(statuses, dict):
+            raise ValueError('"statuses" must be an object {token: status}')
+    else:
+        statuses = {text_field(params, "token"): params.get("status")}
+    for token, status in statuses.items():
+        if not token:
+            raise ValueError("tokens must be non-empty strings")
+        if status not in STATUSES:
+            raise ValueError(f"the status of {token} must be one of {sorted(STATUSES)}")
+    return statuses
+
+# ✅ HTTP
+class LearnerServer:
+    def __init__(self, corpus, learners_dir=LEARNERS_DIR):
+        self.learners = Learners(corpus, learners_dir)
+        self.latency = {}
+        self.routes = {
+            ("GET", "/coverage"): self.coverage,
+            ("GET", "/next"): self.next_item,
+            ("POST", "/mark"): self.mark,
+            ("POST", "/seen"): self.seen,
+            ("GET", "/stats"): self.stats,
+        }
+
+    def coverage(self, params):
+        return {"bins": self.learners.engine(params.get("learner")).coverage_bins()}
+
+    def next_item(self, params):
+        return {"item": self.learners.next_item(params.get("learner"), params.get("bin"))}
+
+    def mark(self, params):
+        learner = params.get("learner")
+        engine = self.learners.engine(learner)
+        changed = engine.mark_all(statuses_field(params))
+        self.learners.dirty.add(learner)
+        return {"changed": sorted(changed)}
+
+    def seen(self, params):
+        learner = params.get("learner")
+        self.learners.engine(learner).mark_seen(text_field(params, "korean"))
+        self.learners.dirty.add(learner)
+        return {"ok": True}
+
+    def stats(self, params):
+        report = {}
+        for route, durations in self.latency.items():
+            values = sorted(durations)
+            report[route] = {"calls": len(values),
+                             **{f"p{q}_ms": round(percentile(values, q / 100) * 1000, 3) for q in (50, 95, 99)}}
+        return {"learners": len(self.learners.engines), "latency": report}
+
+    def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        handler = self.routes.get((method, url.path))
+        if handler is None:
+            known_path = any(path == url.path for _, path in self.routes)
+            return (405 if known_path else 404), {"error": f"{method} {url.path}"}
+        params = dict(parse_qsl(url.query))
+        if body:
+            try:
+                data = json.loads(body)
+            except ValueError:
+                data = None
+            if not isinstance(data, dict):
+                return 400, {"error": "the body must be a JSON object"}
+            params.update(data)
+        start = time.perf_counter()
+        try:
+            status, payload = 200, handler(params)
+        except (ValueError, KeyError) as e:
+            status, payload = 400, {"error": str(e)}
+        durations = self.latency.setdefault(url.path, [])
+        durations.append(time.perf_counter() - start)
+        del durations[:-LATENCY_WINDOW]
+        return status, payload
+
+    async def handle(self, reader, writer):
+        # One connection, many requests (keep-alive) until the client closes it
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self.reject(writer, "request head too large")
+                    break
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                headers = {name.strip().lower(): value.strip() for name, value in
+                           (line.split(":", 1) for line in header_lines if ":" in line)}
+                try:
+                    method, target, version = request_line.split(" ", 2)
+                    length = int(headers.get("content-length", 0))
+                    if length < 0:
+                        raise ValueError
+                except ValueError:
+                    await self.reject(writer, "malformed request line or Content-Length")
+                    break
+                try:
+                    body = await reader.readexactly(length) if length else b""
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                try:
+                    status, payload = self.dispatch(method, target, body)
+                except Exception as e:
+                    status, payload = 500, {"error": repr(e)}
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, payload, keep_alive):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json; charset=utf-8\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}"
+                     f"\r\n\r\n".encode("latin-1") + data)
+        await writer.drain()
+
+    async def reject(self, writer, error):
+        # The rest of the stream cannot be parsed any more: answer 400 and close the connection
+        await self.respond(writer, 400, {"error": error}, keep_alive=False)
+
+    async def save_periodically(self, interval=SAVE_INTERVAL):
+        while True:
+            await asyncio.sleep(interval)
+            self.learners.save()
+
+    async def serve(self, host=HOST, port=PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        saver = asyncio.create_task(self.save_periodically())
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                asyncio.get_running_loop().add_signal_handler(sig, stop.set)
+            except NotImplementedError:
+                pass  # Windows: Ctrl+C cancels the loop instead, and the learners are still saved below
+        print(f"✅ Serving {len(self.learners.corpus)} paragraphs on http://{host}:{port}")
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            saver.cancel()
+            self.learners.save()
+
+if __name__ == "__main__":
+    corpus = load_corpus()
+    try:
+        asyncio.run(LearnerServer(corpus).serve())
+    except KeyboardInterrupt:
+        pass
+    print("👋 Server stopped, learners saved.")
@@ -0,0 +1,81 @@
+# %%
+# This module ranks ambiguous lemmas with a frequency prior taken from the corpus frequency lists
+#   (data/vocab/korean_token_frequency.csv and data/vocab/Clean/*.csv, columns token / frequency).
+#   A KoParadigm lemma is a bare stem (하, 좋, 먹), so its count is the count of the stem itself plus the count of its
+#   dictionary form (stem + 다); the score is the add-alpha smoothed log probability of that count, so unseen lemmas
+#   all get the same small score instead of -inf.
+#   top_k() verifies candidates in decreasing prior order from a heap and stops as soon as k of them are confirmed:
+#   every candidate left in the heap has a lower prior, so it cannot beat them. Callers that only need the best lemma
+#   (coverage, lemmatize_many) therefore check one or two candidates instead of hundreds.
+
+import csv
+import heapq
+import math
+from collections import Counter
+from pathlib import Path
+
+# ✅ Settings
+FREQUENCY_PATHS = [Path("data/vocab/korean_token_frequency.csv"), *sorted(Path("data/vocab/Clean").glob("*.csv"))]
+ALPHA = 1.0  # add-alpha smoothing
+DICTIONARY_SUFFIX = "다"
+
+# ✅ Prior
+class FrequencyPrior:
+    def __init__(self, counts, alpha=ALPHA):
+        self.counts = counts
+        self.alpha = alpha
+        self.log_total = math.log(sum(counts.values()) + alpha * (len(counts) + 1))
+        self.scores = {}
+
+    @classmethod
+    def from_csv(cls, paths=FREQUENCY_PATHS, alpha=ALPHA):
+        counts = Counter()
+        for path in paths:
+            if not Path(path).exists():
+                continue
+            with open(path, "r", encoding="utf-8-sig", newline="") as f:
+                for row in csv.DictReader(f):
+                    counts[row["token"]] += int(row["frequency"])
+        return cls(counts, alpha)
+
+    def count(self, lemma):
+        return self.counts.get(lemma, 0) + self.counts.get(lemma + DICTIONARY_SUFFIX, 0)
+
+    def score(self, lemma):
+        """Smoothed log probability of the lemma; memoized, the same lemmas come back for every token."""
+        if lemma not in self.scores:
+            self.scores[lemma] = math.log(self.count(lemma) + self.alpha) - self.log_total
+        return self.scores[lemma]
+
+_default_prior = None
+
+def load_prior():
+    global _default_prior
+    if _default_prior is None:
+        _default_prior = FrequencyPrior.from_csv()
+    return _default_prior
+
+# ✅ Top-k search with early termination
+def top_k(candidates, score, verify=None, k=1):
+    """The k best verified candidates, as [(score, candidate), ...] best first.
+    candidates are scored up front (a dictionary lookup each) and heapified; verify, the expensive check,
+    only runs on the candidates popped before k of them pass."""
+    heap = [(-score(candidate), i, candidate) for i, candidate in enumerate(candidates)]
+    heapq.heapify(heap)
+    best = []
+    while heap and len(best) < k:
+        neg_score, _, candidate = heapq.heappop(heap)
+        if verify is None or verify(candidate):
+            best.append((-neg_score, candidate))
+    return best
+
+def best_lemma(candidates, prior, verify=None, lemma_of=lambda candidate: candidate):
+    """Most probable verified lemma among the candidates, or None."""
+    best = top_k(candidates, lambda candidate: prior.score(lemma_of(candidate)), verify, k=1)
+    return lemma_of(best[0][1]) if best else None
+
+if __name__ == "__main__":
+    prior = load_prior()
+    print(f"✅ Prior over {len(prior.counts)} tokens")
+    for lemma in ["하", "되", "좋", "먹", "갈음하"]:
+        print(f"   {lemma}: count {prior.count(lemma)}, score {prior.score(lemma):.2f}")
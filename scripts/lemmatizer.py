@@ -0,0 +1,167 @@
+# %%
+# This module lemmatizes tokens in bulk with the KoParadigm data, quietly, for corpus-wide analysis
+#   (coverage, frequency lists) instead of the step-by-step printouts of KoParadigm_reverse_search.py.
+#   A token is looked up in the compiled lexicon (koparadigm_lexicon.py) when it has been built, otherwise it goes
+#   through the inverted template rules (koparadigm_lookup.InverseRules), which derive the few possible stems of the
+#   token directly and confirm each one by conjugating it forward. When a token has several analyses, the lemma with
+#   the highest corpus frequency prior wins (lemma_prior.py); candidates are confirmed best-first until one passes.
+#   Tokens that are not verb forms are their own lemma; lemmas are KoParadigm stems (하면서 → 하).
+#   lemmatize_many() analyzes each distinct token once; results are memoized in a bounded in-memory LRU and in a
+#   persistent JSON cache (data/vocab/lemma_cache.json), so later runs only analyze tokens they have never seen.
+#   The persistent cache is bounded too (least recently used tokens are evicted past STORE_SIZE) and is keyed on
+#   everything a lemma depends on: ANALYSIS_VERSION, the lexicon (or its absence), the KoParadigm sources and the
+#   frequency prior. When one of them changes, the old lemmas are discarded instead of being served.
+
+import re
+import os
+import json
+import hashlib
+import time
+import csv
+from collections import OrderedDict
+from pathlib import Path
+from koparadigm_lookup import InverseRules
+from lemma_prior import best_lemma, load_prior
+from koparadigm_bundle import open_bundle
+from koparadigm_lexicon import LEXICON_PATH, HEADER as LEXICON_HEADER, VERSION as LEXICON_VERSION
+from koparadigm_lexicon import Lexicon, lexicon_version
+
+# ✅ Settings
+LEMMA_CACHE_PATH = Path("data/vocab/lemma_cache.json")
+LRU_SIZE = 50_000
+STORE_SIZE = 500_000  # tokens kept in the persistent cache
+ANALYSIS_VERSION = 2  # bumped whenever analyze() can give another lemma for the same data (2: stacked endings)
+HANGUL = re.compile("[가-힣]")
+
+class Lemmatizer:
+    def __init__(self, cache_path=LEMMA_CACHE_PATH, maxsize=LRU_SIZE, lexicon_path=LEXICON_PATH, store_size=STORE_SIZE):
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.maxsize = maxsize
+        self.store_size = store_size
+        self.lru = OrderedDict()
+        self.lexicon = Lexicon(lexicon_path) if lexicon_version(lexicon_path) == LEXICON_VERSION else None
+        self.inverse_rules = None
+        self.prior = load_prior()
+        self.key = self.cache_key()
+        self.store = self.load_store()
+        self.dirty = False
+        self.stats = {"lru_hits": 0, "cache_hits": 0, "analyzed": 0}
+
+    # ✅ Persistent cache
+    def cache_key(self):
+        """Hash of everything the lemmas depend on."""
+        parts = {
+            "analysis": ANALYSIS_VERSION,
+            "lexicon": self.lexicon.mm[:LEXICON_HEADER.size].hex() if self.lexicon is not None else None,
+            "koparadigm": open_bundle().meta["sources"],
+            "prior": [len(self.prior.counts), sum(self.prior.counts.values()), self.prior.alpha],
+        }
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def load_store(self):
+        """{token: lemma}, least recently used first; empty when the cache was written under another key."""
+        if self.cache_path is None or not self.cache_path.exists():
+            return {}
+        with self.cache_path.open("r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if not isinstance(cached, dict) or cached.get("key") != self.key:
+            return {}
+        return cached["lemmas"]
+
+    def save(self):
+        if self.cache_path is None or not self.dirty:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump({"key": self.key, "lemmas": self.store}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+        self.dirty = False
+
+    def remember(self, token, lemma):
+        self.lru[token] = lemma
+        self.lru.move_to_end(token)
+        if len(self.lru) > self.maxsize:
+            self.lru.popitem(last=False)
+
+    # ✅ Analysis
+    def load_reverse_search(self):
+        # Only needed when the lexicon is missing or does not know a token
+        if self.inverse_rules is None:
+            self.inverse_rules = InverseRules.from_bundle()
+
+    def reverse_search(self, token):
+        self.load_reverse_search()
+        # Same order as Lexicon.lookup: forms of the paradigm first, then pre-final + final endings (갔어요)
+        for candidates in (self.inverse_rules.candidates, self.inverse_rules.stacked_candidates):
+            lemma = best_lemma(candidates(token), self.prior,
+                               verify=lambda analysis: self.inverse_rules.verify(token, analysis),
+                               lemma_of=lambda analysis: analysis[0])
+            if lemma is not None:
+                return lemma
+        return None
+
+    def analyze(self, token):
+        if not HANGUL.search(token):
+            return token
+        self.stats["analyzed"] += 1
+        if self.lexicon is not None:
+            entries = self.lexicon.lookup(token)
+            if entries:
+                return best_lemma(entries, self.prior, lemma_of=lambda entry: entry[0])
+            return token
+        return self.reverse_search(token) or token
+
+    # ✅ API
+    def lemmatize(self, token):
+        if token in self.lru:
+            self.stats["lru_hits"] += 1
+            self.lru.move_to_end(token)
+            return self.lru[token]
+        if token in self.store:
+            self.stats["cache_hits"] += 1
+            # Most recently used last; the new order is saved too, or eviction would drop tokens still in use
+            if next(reversed(self.store)) != token:
+                lemma = self.store[token] = self.store.pop(token)
+                self.dirty = True
+            else:
+                lemma = self.store[token]
+        else:
+            lemma = self.analyze(token)
+            self.store[token] = lemma
+            if len(self.store) > self.store_size:
+                del self.store[next(iter(self.store))]
+            self.dirty = True
+        self.remember(token, lemma)
+        return lemma
+
+    def lemmatize_many(self, tokens, save=True):
+        """Lemmas aligned with tokens. Each distinct token is analyzed at most once."""
+        tokens = list(tokens)
+        lemmas = {token: self.lemmatize(token) for token in dict.fromkeys(tokens)}
+        if save:
+            self.save()
+        return [lemmas[token] for token in tokens]
+
+_default_lemmatizer = None
+
+def lemmatize_many(tokens, save=True):
+    """Module-level shortcut sharing one Lemmatizer (and its caches) across calls."""
+    global _default_lemmatizer
+    if _default_lemmatizer is None:
+        _default_lemmatizer = Lemmatizer()
+    return _default_lemmatizer.lemmatize_many(tokens, save=save)
+
+if __name__ == "__main__":
+    # ✅ Lemmatize every token of the corpus frequency list in one call
+    with open("data/vocab/korean_token_frequency.csv", "r", encoding="utf-8") as f:
+        rows = [(row["token"], int(row["frequency"])) for row in csv.DictReader(f)]
+
+    start = time.perf_counter()
+    lemmas = lemmatize_many([token for token, _ in rows])
+    print(f"✅ {len(rows)} tokens lemmatized in {time.perf_counter() - start:.2f}s ({_default_lemmatizer.stats})")
+
+    changed = [(token, lemma, freq) for (token, freq), lemma in zip(rows, lemmas) if lemma != token]
+    print(f"🔤 {len(changed)} tokens mapped to another lemma, e.g.:")
+    for token, lemma, freq in changed[:15]:
+        print(f"   {token} → {lemma} ({freq})")
@@ -0,0 +1,88 @@
+# %%
+# This module turns the per-artist lyrics shards (see lyrics_store.py) into an indexed corpus for the song picker.
+#   Song metadata (artist, title, URL) lives in a small JSON index together with an artist → songs index,
+#   while the lyric bodies are concatenated into one UTF-8 file and addressed by (offset, length).
+#   Opening the corpus only reads the index; a song's lyrics are read from disk when the song is chosen,
+#   so listing artists and songs stays instant even with tens of thousands of songs.
+#   The index is rebuilt automatically when the lyrics manifest is newer than it.
+
+import json
+import os
+from pathlib import Path
+from lyrics_store import LYRICS_DIR, MANIFEST_NAME, load_manifest, load_artist_songs
+
+# ✅ File names (inside the lyrics folder)
+INDEX_NAME = "lyrics_index.json"
+BODIES_NAME = "lyrics_bodies.bin"
+
+# ✅ Build
+def build_lyrics_corpus(lyrics_dir=LYRICS_DIR):
+    """Write the index and the bodies file from the shards, one artist at a time. Returns the number of songs."""
+    lyrics_dir = Path(lyrics_dir)
+    lyrics_dir.mkdir(parents=True, exist_ok=True)
+    songs, artists = [], {}
+    tmp_bodies = lyrics_dir / (BODIES_NAME + ".tmp")
+    offset = 0
+    with tmp_bodies.open("wb") as bodies:
+        for artist in sorted(load_manifest(lyrics_dir)):
+            ids = []
+            for song in sorted(load_artist_songs(artist, lyrics_dir), key=lambda s: s["Song Name"]):
+                body = song["Lyrics"].encode("utf-8")
+                bodies.write(body)
+                ids.append(len(songs))
+                songs.append([artist, song["Song Name"], song["URL"], offset, len(body)])
+                offset += len(body)
+            artists[artist] = ids
+
+    tmp_index = lyrics_dir / (INDEX_NAME + ".tmp")
+    with tmp_index.open("w", encoding="utf-8") as f:
+        json.dump({"fields": ["artist", "title", "url", "offset", "length"], "songs": songs, "artists": artists},
+                  f, ensure_ascii=False)
+    # Bodies first, then the index that points into them
+    os.replace(tmp_bodies, lyrics_dir / BODIES_NAME)
+    os.replace(tmp_index, lyrics_dir / INDEX_NAME)
+    return len(songs)
+
+def index_is_stale(lyrics_dir=LYRICS_DIR):
+    lyrics_dir = Path(lyrics_dir)
+    index_path, manifest_path = lyrics_dir / INDEX_NAME, lyrics_dir / MANIFEST_NAME
+    if not index_path.exists() or not (lyrics_dir / BODIES_NAME).exists():
+        return True
+    return manifest_path.exists() and manifest_path.stat().st_mtime > index_path.stat().st_mtime
+
+# ✅ Read
+class LyricsCorpus:
+    def __init__(self, lyrics_dir=LYRICS_DIR):
+        self.lyrics_dir = Path(lyrics_dir)
+        with (self.lyrics_dir / INDEX_NAME).open("r", encoding="utf-8") as f:
+            index = json.load(f)
+        self.song_rows = index["songs"]
+        self.artist_songs = index["artists"]
+        self.artist_list = sorted(self.artist_songs)
+        self.bodies_path = self.lyrics_dir / BODIES_NAME
+
+    def __len__(self):
+        return len(self.song_rows)
+
+    def artists(self):
+        return self.artist_list
+
+    def songs(self, artist):
+        """[(title, song_id), ...] for one artist, sorted by title (ready for a Dropdown)."""
+        return [(self.song_rows[i][1], i) for i in self.artist_songs.get(artist, [])]
+
+    def metadata(self, song_id):
+        artist, title, url, _, _ = self.song_rows[song_id]
+        return {"Artist": artist, "Song Name": title, "URL": url}
+
+    def lyrics(self, song_id):
+        _, _, _, offset, length = self.song_rows[song_id]
+        with self.bodies_path.open("rb") as f:
+            f.seek(offset)
+            return f.read(length).decode("utf-8")
+
+def open_lyrics_corpus(lyrics_dir=LYRICS_DIR):
+    if index_is_stale(lyrics_dir):
+        count = build_lyrics_corpus(lyrics_dir)
+        print(f"🗂️ Lyrics index rebuilt: {count} songs.")
+    return LyricsCorpus(lyrics_dir)
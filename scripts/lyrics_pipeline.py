@@ -1,16 +1,21 @@
 # %%
 import json
 import re
-import pandas as pd
 from pathlib import Path
 from collections import Counter
+from functools import lru_cache
 from konlpy.tag import Okt
 from IPython.display import display, clear_output
 import ipywidgets as widgets
+from lyrics_store import load_manifest, import_legacy_lyrics
+from lyrics_corpus import open_lyrics_corpus
+from reader_view import ReaderView
+from session_engine import TokenizedCorpus, SessionEngine, KNOWN, UNKNOWN
 
 # ✅ Paths & load data
 DATA_DIR = Path("data")
-lyrics_file = DATA_DIR / "content박소은_lyrics.json"
+lyrics_dir = DATA_DIR / "content" / "lyrics"
+legacy_lyrics_file = DATA_DIR / "content박소은_lyrics.json"  # written by older versions of geniusLyricsDownload
 known_words_path = DATA_DIR / "json/known_words_tokenized.json"
 unknown_words_path = DATA_DIR / "json/unknown_words.json"
 seen_sentences_path = DATA_DIR / "json/seen_sentences.json"
@@ -18,12 +23,10 @@ seen_sentences_path = DATA_DIR / "json/seen_sentences.json"
 def load_words(path):
     return set(json.load(open(path, encoding="utf-8"))) if path.exists() else set()
 
-def save_words(words, path):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(sorted(list(words)), f, ensure_ascii=False, indent=2)
-
-with open(lyrics_file, "r", encoding="utf-8") as f:
-    lyrics_data = json.load(f)
+# Only the song index is read here: lyrics are read from disk when a song is launched
+if not load_manifest(lyrics_dir) and legacy_lyrics_file.exists():
+    import_legacy_lyrics(legacy_lyrics_file, lyrics_dir)
+lyrics_corpus = open_lyrics_corpus(lyrics_dir)
 
 known_words = load_words(known_words_path)
 unknown_words = load_words(unknown_words_path)
@@ -31,14 +34,40 @@ seen_sentences = load_words(seen_sentences_path)
 
 okt = Okt()
 
+# ✅ Tokenize each distinct line once: choruses are repeated many times in a song
+def korean_tokens(text):
+    tokens = okt.morphs(text)
+    return [t for t in tokens if re.search(r"[가-힣]", t) and len(t) > 1]
+
+@lru_cache(maxsize=8)
+def analyze_lyrics(lyrics_text):
+    """Split lyrics into lines, count how often each line repeats and tokenize every distinct line once."""
+    lines = [line.strip() for line in lyrics_text.split("\n") if line.strip()]
+    line_counts = Counter(lines)
+    line_tokens = {line: korean_tokens(line) for line in line_counts}
+    print(f"🔁 {len(lines)} lines, {len(line_counts)} distinct: tokenized {len(line_counts) / max(len(lines), 1):.0%} of the lines.")
+    return lines, line_counts, line_tokens
+
+def lyrics_token_counts(lyrics_text):
+    # Token frequencies weighted by how many times each line is sung
+    _, line_counts, line_tokens = analyze_lyrics(lyrics_text)
+    counts = Counter()
+    for line, repeats in line_counts.items():
+        for t in line_tokens[line]:
+            counts[t] += repeats
+    return counts
+
+def block_tokens(block_lines, line_tokens):
+    return [t for line in block_lines for t in line_tokens[line]]
+
 # ✅ Interactive dropdowns
-artist_list = sorted(set(song["Artist"] for song in lyrics_data))
+artist_list = lyrics_corpus.artists()
 artist_dropdown = widgets.Dropdown(options=artist_list, description="🎤 Artist")
 song_dropdown = widgets.Dropdown(description="🎵 Song")
 
 def update_songs(change):
     selected_artist = artist_dropdown.value
-    song_dropdown.options = [song["Song Name"] for song in lyrics_data if song["Artist"] == selected_artist]
+    song_dropdown.options = lyrics_corpus.songs(selected_artist) if selected_artist else []
 
 artist_dropdown.observe(update_songs, names='value')
 update_songs(None)
@@ -52,10 +81,7 @@ launch_button = widgets.Button(description="🚀 Start Session", button_style='s
 # ✅ Launch session
 def launch_session(b):
     clear_output()
-    selected_artist = artist_dropdown.value
-    selected_song = song_dropdown.value
-    lyrics_text = next(song["Lyrics"] for song in lyrics_data
-                       if song["Artist"] == selected_artist and song["Song Name"] == selected_song)
+    lyrics_text = lyrics_corpus.lyrics(song_dropdown.value)
     if mode_dropdown.value == "Learn Words":
         launch_word_review(lyrics_text)
     else:
@@ -66,9 +92,7 @@ display(widgets.VBox([artist_dropdown, song_dropdown, mode_dropdown, launch_butt
 
 # ✅ Vocab review session
 def launch_word_review(lyrics_text):
-    tokens = okt.morphs(lyrics_text)
-    tokens = [t for t in tokens if re.search(r"[가-힣]", t) and len(t) > 1]
-    token_list = [t for t, _ in Counter(tokens).most_common()
+    token_list = [t for t, _ in lyrics_token_counts(lyrics_text).most_common()
                   if t not in known_words and t not in unknown_words]
 
     print(f"✅ Found {len(token_list)} new words.")
@@ -78,9 +102,8 @@ def launch_word_review(lyrics_text):
         start_token_review_session(token_list, lyrics_text)
 
 def ask_to_review_unknowns_in_paragraphs(lyrics_text):
-    paragraph_tokens = okt.morphs(lyrics_text)
-    paragraph_tokens = [t for t in paragraph_tokens if re.search(r"[가-힣]", t) and len(t) > 1]
-    unknown_tokens = list(dict.fromkeys([t for t in paragraph_tokens if t in unknown_words]))
+    _, line_counts, line_tokens = analyze_lyrics(lyrics_text)
+    unknown_tokens = list(dict.fromkeys([t for line in line_counts for t in line_tokens[line] if t in unknown_words]))
 
     print(f"✅ Found {len(unknown_tokens)} previously unknown words.")
     yes_button = widgets.Button(description="✅ Yes, review", button_style='success')
@@ -101,8 +124,10 @@ def ask_to_review_unknowns_in_paragraphs(lyrics_text):
     no_button.on_click(on_no)
 
 def start_token_review_session(token_list, lyrics_text):
-    index = 0
+    engine = song_engine(lyrics_text)
+    engine.start_word_review(token_list)
     reviewed = 0
+    item = None
 
     token_label = widgets.HTML()
     progress = widgets.Label()
@@ -111,15 +136,16 @@ def start_token_review_session(token_list, lyrics_text):
     quit_button = widgets.Button(description="⏹️ Quit", button_style='warning')
 
     def update_display():
-        if index < len(token_list):
-            token_label.value = f"<h2>{token_list[index]}</h2>"
-            progress.value = f"Token {index + 1} of {len(token_list)}"
+        nonlocal item
+        item = engine.next_item()
+        if item is not None:
+            token_label.value = f"<h2>{item['token']}</h2>"
+            progress.value = f"Token {item['position']} of {item['total']}"
         else:
             finish_review()
 
     def finish_review():
-        save_words(known_words, known_words_path)
-        save_words(unknown_words, unknown_words_path)
+        engine.save()
         clear_output()
         display(widgets.HTML(
             f"<h3>✅ Review complete ({reviewed} tokens).</h3>"
@@ -127,54 +153,47 @@ def start_token_review_session(token_list, lyrics_text):
         ))
         ask_to_read_paragraphs(lyrics_text)
 
-    def on_known(b):
-        nonlocal index, reviewed
-        known_words.add(token_list[index])
-        index += 1
-        reviewed += 1
-        update_display()
-    def on_unknown(b):
-        nonlocal index, reviewed
-        unknown_words.add(token_list[index])
-        index += 1
+    def on_mark(status):
+        nonlocal reviewed
+        engine.mark(item["token"], status)
         reviewed += 1
         update_display()
-    def on_quit(b):
-        finish_review()
 
-    known_button.on_click(on_known)
-    unknown_button.on_click(on_unknown)
-    quit_button.on_click(on_quit)
+    known_button.on_click(lambda b: on_mark(KNOWN))
+    unknown_button.on_click(lambda b: on_mark(UNKNOWN))
+    quit_button.on_click(lambda b: finish_review())
 
     display(widgets.VBox([token_label, widgets.HBox([known_button, unknown_button, quit_button]), progress]))
     update_display()
 
+# ✅ Headless session over the 7-line blocks of a song (session_engine.py)
+LYRICS_BINS = [0, 20, 40, 60, 80, 92.9, 97, 100]
+LYRICS_LABELS = ["0-20%", "20-40%", "40-60%", "60-80%", "80-92.9%", "93-97%", "97-100%"]
+
+def song_engine(lyrics_text):
+    lines, _, line_tokens = analyze_lyrics(lyrics_text)
+    blocks = [lines[i:i+7] for i in range(0, len(lines), 7)]
+    corpus = TokenizedCorpus({"korean": "\n".join(block), "tokens": block_tokens(block, line_tokens)}
+                             for block in blocks)
+    # Songs are reread, so blocks already marked seen stay in their bin
+    return SessionEngine(corpus, known_words, unknown_words, seen_sentences,
+                         save_paths={"known": known_words_path, "unknown": unknown_words_path,
+                                     "seen": seen_sentences_path},
+                         bins=LYRICS_BINS, labels=LYRICS_LABELS, skip_seen=False)
+
 # ✅ Choose paragraph bin to read
 def ask_to_read_paragraphs(lyrics_text):
-    lines = [line.strip() for line in lyrics_text.split("\n") if line.strip()]
-    paragraphs = ["\n".join(lines[i:i+7]) for i in range(0, len(lines), 7)]
-    df = pd.DataFrame(paragraphs, columns=["korean"])
-
-    def korean_known_coverage(text):
-        tokens = okt.morphs(text)
-        tokens = [t for t in tokens if re.search(r"[가-힣]", t) and len(t) > 1]
-        known = [t for t in tokens if t in known_words]
-        return len(known) / len(tokens) * 100 if tokens else 0
-
-    df["coverage"] = df["korean"].apply(korean_known_coverage)
-    bins = [0,20,40,60,80,92.9,97,100]
-    labels = ["0-20%","20-40%","40-60%","60-80%","80-92.9%","93-97%","97-100%"]
-    df["coverage_bin"] = pd.cut(df["coverage"], bins=bins, labels=labels, include_lowest=True)
-    dist = df["coverage_bin"].value_counts().sort_index()
+    engine = song_engine(lyrics_text)
+    dist = engine.coverage_bins()
 
     bin_buttons = []
-    for label in labels:
+    for label in LYRICS_LABELS:
         count = dist.get(label, 0)
         btn = widgets.Button(description=f"{label} ({count})",
                              button_style='info' if count > 0 else '',
                              disabled=bool(count == 0))
         def make_onclick(l):
-            return lambda b: launch_paragraph_reader_for_bin(df, l)
+            return lambda b: launch_paragraph_reader_for_bin(engine, l)
         btn.on_click(make_onclick(label))
         bin_buttons.append(btn)
 
@@ -185,108 +204,37 @@ def ask_to_read_paragraphs(lyrics_text):
     display(skip_button)
 
 # ✅ Launch reading paragraphs in selected bin
-def launch_paragraph_reader_for_bin(df, coverage_label):
+def launch_paragraph_reader_for_bin(engine, coverage_label):
     clear_output()
-    filtered_df = df[df["coverage_bin"] == coverage_label].reset_index(drop=True)
-
-    if filtered_df.empty:
+    if not engine.start_reading(coverage_label):
         print(f"😕 No paragraphs found in range {coverage_label}.")
         return
 
-    index = 0
+    # One pooled view for the whole range: each paragraph only updates the existing buttons
+    view = ReaderView([("mark", "📌 Mark Seen & Next", 'success'), ("next", "➡️ Next (don't mark)", 'info')])
+    item = None
 
     def review_block():
-        nonlocal index
-        clear_output()
-        if index >= len(filtered_df):
-            save_words(seen_sentences, seen_sentences_path)
-            save_words(known_words, known_words_path)
-            save_words(unknown_words, unknown_words_path)
+        nonlocal item
+        item = engine.next_item()  # prepared in the background while the previous block was read
+        if item is None:
+            clear_output()
+            engine.save()
             print(f"🎉 Finished reading all paragraphs in {coverage_label}.")
             return
-
-        para = filtered_df.iloc[index]["korean"]
-        tokens = okt.morphs(para)
-        tokens = [t for t in tokens if re.search(r"[가-힣]", t) and len(t) > 1]
-
-        # local state of word statuses
-        word_status = {}
-        for t in tokens:
-            if t in known_words:
-                word_status[t] = 'green'
-            elif t in unknown_words:
-                word_status[t] = 'red'
-            else:
-                word_status[t] = 'grey'
-
-        # create buttons
-        buttons = []
-        for t in tokens:
-            btn = widgets.Button(description=t, 
-                                 layout=widgets.Layout(width='auto', height='auto', padding='1px', margin='1px'),
-                                 style={'button_color': color_for_status(word_status[t])})
-            def make_onclick(word):
-                def on_click(b):
-                    current = word_status[word]
-                    new_state = next_status(current)
-                    word_status[word] = new_state
-                    b.style.button_color = color_for_status(new_state)
-                return on_click
-            btn.on_click(make_onclick(t))
-            buttons.append(btn)
-
-        # display horizontally wrapping
-        button_grid = widgets.HBox()
-        rows = []
-        row_size = 8
-        for i in range(0, len(buttons), row_size):
-            rows.append(widgets.HBox(buttons[i:i+row_size]))
-        button_grid = widgets.VBox(rows)
-
-        mark_button = widgets.Button(description="📌 Mark Seen & Next", button_style='success')
-        next_button = widgets.Button(description="➡️ Next (don't mark)", button_style='info')
-
-        def on_mark(b):
-            seen_sentences.add(para)
-            update_global_word_lists()
-            move_next()
-        def on_next(b):
-            update_global_word_lists()
-            move_next()
-
-        def update_global_word_lists():
-            for word, status in word_status.items():
-                if status == 'green':
-                    known_words.add(word)
-                    unknown_words.discard(word)
-                elif status == 'red':
-                    unknown_words.add(word)
-                    known_words.discard(word)
-                # grey does nothing
-
-        def move_next():
-            nonlocal index
-            index += 1
-            review_block()
-
-        mark_button.on_click(on_mark)
-        next_button.on_click(on_next)
-        display(widgets.VBox([
-            widgets.HTML(f"<pre style='font-size:16px'>{para}</pre>"),
-            button_grid,
-            widgets.HBox([mark_button, next_button])
-        ]))
-
-    def color_for_status(status):
-        if status == 'green': return 'lightgreen'
-        elif status == 'red': return 'lightcoral'
-        else: return 'lightgrey'
-
-    def next_status(current):
-        if current == 'grey': return 'green'
-        if current == 'green': return 'red'
-        return 'grey'
-
+        view.show(f"<pre style='font-size:16px'>{item['korean']}</pre>", item["tokens"], item["word_status"])
+
+    def on_mark():
+        engine.mark_seen(item["korean"])
+        engine.mark_all(item["word_status"])
+        review_block()
+    def on_next():
+        engine.mark_all(item["word_status"])
+        review_block()
+
+    view.on("mark", on_mark)
+    view.on("next", on_next)
+    display(view.widget)
     review_block()
 
 # %%
@@ -0,0 +1,63 @@
+# %%
+# This module stores harvested lyrics as one shard file per artist under data/content/lyrics/,
+#   plus a manifest.json listing every artist with its shard file and song count.
+#   Each shard keeps the original song format ({"Artist", "Song Name", "URL", "Lyrics"}), so readers
+#   such as lyrics_pipeline.py can list the artists from the manifest and load only the artist being studied.
+
+import re
+import json
+import os
+from pathlib import Path
+
+# ✅ Default paths
+LYRICS_DIR = Path("data/content/lyrics")
+MANIFEST_NAME = "manifest.json"
+
+def shard_name(artist):
+    return re.sub(r'[\s/\\:*?"<>|()]+', "_", str(artist).strip()).strip("_") + ".json"
+
+# ✅ Manifest
+def load_manifest(lyrics_dir=LYRICS_DIR):
+    path = Path(lyrics_dir) / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    with path.open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_json_atomic(data, path):
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+# ✅ Shards
+def load_artist_songs(artist, lyrics_dir=LYRICS_DIR):
+    manifest = load_manifest(lyrics_dir)
+    if artist not in manifest:
+        return []
+    with (Path(lyrics_dir) / manifest[artist]["file"]).open("r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_artist_songs(artist, songs, lyrics_dir=LYRICS_DIR, **info):
+    """Write (replace) the shard of one artist and record it in the manifest. Extra info is kept in the manifest."""
+    lyrics_dir = Path(lyrics_dir)
+    lyrics_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(lyrics_dir)
+    entry = manifest.get(artist, {})
+    entry.update(info, file=entry.get("file", shard_name(artist)), songs=len(songs))
+    save_json_atomic(songs, lyrics_dir / entry["file"])
+    manifest[artist] = entry
+    save_json_atomic(manifest, lyrics_dir / MANIFEST_NAME)
+
+def import_legacy_lyrics(legacy_file, lyrics_dir=LYRICS_DIR):
+    """Split an old single-file lyrics JSON (list of songs of any artists) into per-artist shards."""
+    with open(legacy_file, "r", encoding="utf-8") as f:
+        songs = json.load(f)
+    by_artist = {}
+    for song in songs:
+        by_artist.setdefault(song["Artist"], []).append(song)
+    for artist, artist_songs in by_artist.items():
+        known = {s["URL"] for s in load_artist_songs(artist, lyrics_dir)}
+        merged = load_artist_songs(artist, lyrics_dir) + [s for s in artist_songs if s["URL"] not in known]
+        save_artist_songs(artist, merged, lyrics_dir)
+    return list(by_artist)
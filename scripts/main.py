@@ -1,13 +1,17 @@
 # %%
 import json
 import re
-import pandas as pd
-import wikipediaapi
+import threading
 from pathlib import Path
-from collections import Counter
 from konlpy.tag import Okt
 from IPython.display import display, clear_output
 import ipywidgets as widgets
+from article_store import WikipediaClient, get_paragraphs, iter_articles, open_jsonl, append_article, compact_jsonl
+from paragraph_dedup import ParagraphDeduplicator, format_report
+from category_corpus_builder import load_manifest, iter_shards
+from reader_view import ReaderView
+from session_engine import TokenizedCorpus, SessionEngine, COVERAGE_LABELS, KNOWN, UNKNOWN, serialized
+from article_picker import load_picker
 
 # ✅ Paths
 WORKSPACE_ROOT = Path("/Users/yannis.daguenet/Documents/korean_language_app")  # adjust as needed
@@ -20,21 +24,31 @@ unknown_path = JSON_DIR / "unknown_words.json"
 seen_path = JSON_DIR / "seen_sentences.json"
 articles_json = JSON_DIR / "selected_articles.json"
 paragraphs_json = JSON_DIR / "selected_wikipedia_paragraphs.json"
+paragraphs_jsonl = JSON_DIR / "selected_wikipedia_paragraphs.jsonl"
 csv_file = DATA_DIR / "content" / "wikipedia_korean_articles_cleaned.csv"
+shard_dir = DATA_DIR / "content" / "shards"
 
 # ✅ Load JSON helpers
 def load_json_set(path):
     return set(json.load(open(path, encoding="utf-8"))) if path.exists() else set()
 
-def save_json_set(data, path):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(sorted(list(data)), f, ensure_ascii=False, indent=2)
-
 known_words = load_json_set(known_path)
 unknown_words = load_json_set(unknown_path)
 seen_sentences = load_json_set(seen_path)
 
 okt = Okt()
+morphs = serialized(okt.morphs)  # a stale feed thread may still be tokenizing when the next one starts
+
+# ✅ Progressive corpus, filled article by article by a background thread
+#   corpus.lock (reentrant) also guards fetch_status, so the rows and the progress always change together
+corpus = TokenizedCorpus()  # [{"korean": paragraph, "tokens": [...]}, ...]
+fetch_status = {"generation": 0, "done": 0, "total": 0, "running": False, "error": None, "dedup": None}
+DEDUP_THRESHOLD = 0.8  # estimated Jaccard similarity above which a paragraph counts as a duplicate
+on_corpus_update = None  # callback of the view on screen, called with each new batch of rows
+
+# ✅ Headless session engine (session_engine.py): the widgets below only display it and forward clicks
+engine = SessionEngine(corpus, known_words, unknown_words, seen_sentences,
+                       save_paths={"known": known_path, "unknown": unknown_path, "seen": seen_path})
 
 # ✅ Start menu
 def start_menu():
@@ -42,6 +56,7 @@ def start_menu():
     print("📚 Welcome to your Korean Wikipedia reading app!")
     btn_pick_articles = widgets.Button(description="📂 Select Wikipedia articles", button_style='info')
     btn_use_last = widgets.Button(description="🚀 Use last selected articles", button_style='success')
+    btn_categories = widgets.Button(description="🗂️ Read whole categories", button_style='info')
     btn_quit = widgets.Button(description="❌ Quit", button_style='danger')
 
     def on_pick(b):
@@ -55,30 +70,30 @@ def start_menu():
             clear_output()
             print("⚠️ No previous articles found. Please select new ones.")
             select_articles_interface(csv_file)
+    def on_categories(b):
+        select_categories_interface()
     def on_quit(b):
         clear_output()
         print("👋 Goodbye!")
 
     btn_pick_articles.on_click(on_pick)
     btn_use_last.on_click(on_use_last)
+    btn_categories.on_click(on_categories)
     btn_quit.on_click(on_quit)
 
     display(widgets.VBox([
         widgets.HTML("<h3>What would you like to do?</h3>"),
-        btn_pick_articles, btn_use_last, btn_quit
+        btn_pick_articles, btn_use_last, btn_categories, btn_quit
     ]))
 
-# ✅ Select articles
+# ✅ Select articles (search-as-you-type picker, see article_picker.py)
 def select_articles_interface(csv_file):
-    df = pd.read_csv(csv_file)
-    df['combined'] = df['title_ko'] + " — " + df['title_final']
-    options = df['combined'].tolist()
-    selector = widgets.SelectMultiple(options=options, rows=20, layout=widgets.Layout(width='100%'))
+    picker = load_picker(csv_file)
     save_button = widgets.Button(description="💾 Save selected", button_style='success')
     output = widgets.Output()
 
     def save_selected(b):
-        selected_ko = [item.split(" — ")[0] for item in selector.value]
+        selected_ko = picker.selected_titles()
         with articles_json.open("w", encoding="utf-8") as f:
             json.dump(selected_ko, f, ensure_ascii=False, indent=2)
         with output:
@@ -88,35 +103,135 @@ def select_articles_interface(csv_file):
 
     save_button.on_click(save_selected)
     clear_output()
-    display(widgets.VBox([selector, save_button, output]))
+    display(widgets.VBox([picker.widget, save_button, output]))
+
+# ✅ Select category shards built by category_corpus_builder.py
+def select_categories_interface():
+    manifest = load_manifest(shard_dir)
+    clear_output()
+    if not manifest:
+        print("⚠️ No category shards found. Run category_corpus_builder.py first.")
+        return start_menu()
+    options = [(f"{c} — {info['articles']} articles", c) for c, info in manifest.items()]
+    selector = widgets.SelectMultiple(options=options, rows=min(len(options), 20), layout=widgets.Layout(width='100%'))
+    load_button = widgets.Button(description="📥 Load selected categories", button_style='success')
+
+    def on_load(b):
+        if selector.value:
+            load_category_corpus(list(selector.value))
+
+    load_button.on_click(on_load)
+    display(widgets.VBox([selector, load_button]))
+
+def load_category_corpus(categories):
+    manifest = load_manifest(shard_dir)
+    generation, dedup = begin_feed(sum(manifest[c]["articles"] for c in categories if c in manifest))
+    threading.Thread(target=feed_shards, args=(categories, generation, dedup), daemon=True).start()
+    launch_top_menu()
 
-# ✅ Extract paragraphs from Wikipedia
+def feed_shards(categories, generation, dedup):
+    # Only the shards of the chosen categories are read
+    for _, paras in iter_shards(categories, shard_dir):
+        if fetch_status["generation"] != generation:
+            return
+        add_article(paras, generation, dedup)
+    finish_feed(generation)
+
+# ✅ Extract paragraphs from Wikipedia (in the background)
 def extract_paragraphs(selected_titles):
-    wiki_kr = wikipediaapi.Wikipedia(language='ko', user_agent='Yannis-KoreanCorpus/1.0')
-    article_paragraphs = {}
-    for title in selected_titles:
-        page = wiki_kr.page(title)
-        if page.exists():
-            paras = [p.strip() for p in page.text.split("\n") if p.strip()]
-            if paras:
-                article_paragraphs[title] = paras
-    with paragraphs_json.open("w", encoding="utf-8") as f:
-        json.dump(article_paragraphs, f, ensure_ascii=False, indent=2)
-    print(f"✅ Extracted paragraphs saved to: {paragraphs_json.resolve()}")
+    start_background_fetch(selected_titles)
     launch_top_menu()
 
+def start_background_fetch(selected_titles):
+    titles = list(dict.fromkeys(selected_titles))
+    generation, dedup = begin_feed(len(titles))
+    threading.Thread(target=fetch_articles, args=(titles, generation, dedup), daemon=True).start()
+
+def begin_feed(total):
+    # A new generation makes any older background feed stop at its next article. Each generation has its own
+    #   deduplicator, handed to its feed thread: a stale thread never touches the index of the new one
+    dedup = ParagraphDeduplicator(threshold=DEDUP_THRESHOLD)
+    with corpus.lock:
+        corpus.clear()
+        fetch_status.update(generation=fetch_status["generation"] + 1, done=0, total=total,
+                            running=True, error=None, dedup=dedup)
+        return fetch_status["generation"], dedup
+
+def finish_feed(generation):
+    with corpus.lock:
+        if fetch_status["generation"] == generation:
+            fetch_status["running"] = False
+            notify_corpus_update([])
+
+def fetch_articles(selected_titles, generation, dedup):
+    # Articles downloaded by a previous session are read back from the JSONL instead of refetched
+    wanted = set(selected_titles)
+    cached = {title: paras for title, paras in iter_articles(paragraphs_jsonl) if title in wanted}
+    wiki_kr = WikipediaClient(language='ko', user_agent='Yannis-KoreanCorpus/1.0')
+    with open_jsonl(paragraphs_jsonl) as f:
+        for title in selected_titles:
+            if fetch_status["generation"] != generation:
+                return  # a newer selection replaced this one
+            if title in cached:
+                paras = cached.pop(title)
+            else:
+                try:
+                    paras = get_paragraphs(wiki_kr, title)
+                except Exception as e:
+                    with corpus.lock:
+                        fetch_status["error"] = f"{title}: {e}"
+                    break
+                append_article(f, title, paras)
+            add_article(paras, generation, dedup)
+    compact_jsonl(paragraphs_jsonl, paragraphs_json, titles=selected_titles)
+    finish_feed(generation)
+
+def add_article(paras, generation, dedup):
+    # Skip duplicates (in this generation's own index), tokenize outside the lock, then publish the rows and notify
+    #   the view atomically
+    rows = [{"korean": p, "tokens": korean_tokens(p)} for p in paras if p.strip() and dedup.add(p)]
+    with corpus.lock:
+        if fetch_status["generation"] != generation:
+            return
+        corpus.extend(rows)
+        fetch_status["done"] += 1
+        notify_corpus_update(rows)
+
+def notify_corpus_update(rows):
+    if on_corpus_update:
+        try:
+            on_corpus_update(rows)
+        except Exception:
+            pass  # a closed view must not stop the download
+
+def watch_corpus(callback):
+    global on_corpus_update
+    on_corpus_update = callback
+
+def fetch_progress_text():
+    with corpus.lock:
+        done, total, count = fetch_status["done"], fetch_status["total"], len(corpus)
+        running, error = fetch_status["running"], fetch_status["error"]
+    text = f"{'⏳ Loading' if running else '✅ Loaded'} {done}/{total} articles ({count} paragraphs)"
+    if not running and fetch_status["dedup"]:
+        text += " — " + format_report(fetch_status["dedup"].report)
+    if error:
+        text += f" — ⚠️ stopped at {error}"
+    return text
+
 # ✅ Learn words
 def learn_words_from_articles():
-    with open(paragraphs_json, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    all_text = "\n".join([para for paras in data.values() for para in paras])
-    tokens = okt.morphs(all_text)
-    token_freq = Counter([t for t in tokens if re.search(r"[가-힣]", t) and len(t) > 1])
-    learn_list = [t for t, _ in token_freq.most_common() if t not in known_words and t not in unknown_words]
-    run_word_review(learn_list)
-
-def run_word_review(token_list):
-    index, reviewed = 0, 0
+    watch_corpus(None)
+    with corpus.lock:
+        engine.start_word_review()
+        still_loading = fetch_status["running"]
+    if still_loading:
+        print(f"{fetch_progress_text()} — more words will be available next time.")
+    run_word_review()
+
+def run_word_review():
+    reviewed = 0
+    item = None
     token_label = widgets.HTML()
     known_button = widgets.Button(description="✅ Known", button_style='success')
     unknown_button = widgets.Button(description="❌ Unknown", button_style='danger')
@@ -126,35 +241,29 @@ def run_word_review(token_list):
     display_box = widgets.VBox([token_label, buttons, progress])
 
     def update():
-        if index < len(token_list):
-            token_label.value = f"<h2>{token_list[index]}</h2>"
-            progress.value = f"Token {index+1}/{len(token_list)}"
+        nonlocal item
+        item = engine.next_item()
+        if item is not None:
+            token_label.value = f"<h2>{item['token']}</h2>"
+            progress.value = f"Token {item['position']}/{item['total']}"
         else:
             finish()
 
     def finish():
-        save_json_set(known_words, known_path)
-        save_json_set(unknown_words, unknown_path)
+        engine.close()
+        engine.save()
         clear_output()
         print(f"✅ Word review done. {reviewed} tokens reviewed.")
         launch_top_menu()
 
-    def on_known(b):
-        nonlocal index, reviewed
-        known_words.add(token_list[index])
-        index += 1
-        reviewed += 1
-        update()
-
-    def on_unknown(b):
-        nonlocal index, reviewed
-        unknown_words.add(token_list[index])
-        index += 1
+    def on_mark(status):
+        nonlocal reviewed
+        engine.mark(item["token"], status)
         reviewed += 1
         update()
 
-    known_button.on_click(on_known)
-    unknown_button.on_click(on_unknown)
+    known_button.on_click(lambda b: on_mark(KNOWN))
+    unknown_button.on_click(lambda b: on_mark(UNKNOWN))
     quit_button.on_click(lambda b: finish())
     clear_output()
     display(display_box)
@@ -163,6 +272,7 @@ def run_word_review(token_list):
 # ✅ Top menu after paragraphs
 def launch_top_menu():
     clear_output()
+    status = widgets.Label(fetch_progress_text())
     btn_learn = widgets.Button(description="📚 Learn words first", button_style='success')
     btn_read = widgets.Button(description="📰 Read paragraphs by %", button_style='info')
     btn_quit = widgets.Button(description="🚪 Quit", button_style='danger')
@@ -173,113 +283,87 @@ def launch_top_menu():
 
     display(widgets.VBox([
         widgets.HTML("<h3>What would you like to do next?</h3>"),
-        btn_learn, btn_read, btn_quit
+        status, btn_learn, btn_read, btn_quit
     ]))
+    watch_corpus(lambda rows: setattr(status, "value", fetch_progress_text()))
 
 # ✅ Paragraph selection by % range
 def select_coverage_bin():
-    with open(paragraphs_json, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    paragraphs = [para.strip() for paras in data.values() for para in paras if para.strip()]
-    df = pd.DataFrame(paragraphs, columns=["korean"])
-    df["coverage"] = df["korean"].apply(lambda text: korean_known_coverage(text))
-    bins = [0, 0.1, 20, 30, 40, 50, 60, 70, 80, 90, 92.9, 97, 99.9, 100]
-    labels = ["0%", "0.1%-20%", "20.1%-30%", "30.1%-40%", "40.1%-50%", "50.1%-60%",
-              "60.1%-70%", "70.1%-80%", "80.1%-90%", "90.1%-92.9%", "93%-97%",
-              "97.1%-99.9%", "100%"]
-    df["coverage_bin"] = pd.cut(df["coverage"], bins=bins, labels=labels, include_lowest=True)
-    dist = df["coverage_bin"].value_counts().sort_index()
-
     clear_output()
-    print("📊 Paragraphs coverage distribution:")
-    for label, count in dist.items():
-        print(f"{label:>12}: {count}")
-
-    buttons = []
-    for label in labels:
-        count = dist.get(label, 0)
-        btn = widgets.Button(description=f"{label} ({count})", 
-                             button_style='info' if count > 0 else '',
-                             disabled=bool(count == 0))
+    status = widgets.Label()
+    buttons = {}
+    for label in COVERAGE_LABELS:
+        btn = widgets.Button()
         def make_onclick(l):
-            return lambda b: launch_paragraph_reader_for_bin(df, l)
+            # Paragraphs that arrived since the menu was shown are included too
+            return lambda b: launch_paragraph_reader_for_bin(l)
         btn.on_click(make_onclick(label))
-        buttons.append(btn)
-    rows = [widgets.HBox(buttons[i:i+3]) for i in range(0, len(buttons), 3)]
+        buttons[label] = btn
+
+    def refresh(counts):
+        status.value = fetch_progress_text()
+        for label, btn in buttons.items():
+            count = counts.get(label, 0)
+            btn.description = f"{label} ({count})"
+            btn.button_style = 'info' if count > 0 else ''
+            btn.disabled = bool(count == 0)
+
+    def on_new_rows(rows):
+        counts.update(engine.coverage_bins(rows))
+        refresh(counts)
+
+    # Snapshot and subscription happen under the lock so no article is counted twice or missed
+    with corpus.lock:
+        counts = engine.coverage_bins()
+        refresh(counts)
+        watch_corpus(on_new_rows)
+
+    print("📊 Paragraphs coverage distribution:")
+    for label in COVERAGE_LABELS:
+        print(f"{label:>12}: {counts.get(label, 0)}")
+
+    rows = [widgets.HBox(list(buttons.values())[i:i+3]) for i in range(0, len(buttons), 3)]
     quit_btn = widgets.Button(description="🚪 Quit", button_style='danger')
-    quit_btn.on_click(lambda b: (clear_output(), print("👋 Exited session.")))
-    display(widgets.VBox(rows + [quit_btn]))
+    quit_btn.on_click(lambda b: (watch_corpus(None), clear_output(), print("👋 Exited session.")))
+    display(widgets.VBox([status] + rows + [quit_btn]))
 
 # ✅ Paragraph reader
-def launch_paragraph_reader_for_bin(df, selected_bin):
-    eligible_df = df[(df["coverage_bin"] == selected_bin) & (~df["korean"].isin(seen_sentences))].reset_index(drop=True)
-    if eligible_df.empty:
+def launch_paragraph_reader_for_bin(selected_bin):
+    watch_corpus(None)
+    if not engine.start_reading(selected_bin):
         clear_output()
         print(f"😕 No paragraphs in {selected_bin}.")
         return launch_top_menu()
-    index = 0
+    # One pooled view for the whole bin: each paragraph only updates the existing buttons
+    view = ReaderView([("mark", "📌 Mark Seen & Next", 'success'), ("skip", "➡️ Next", 'info'),
+                       ("quit", "🚪 Quit", 'danger')])
+    item = None
     def review_block():
-        nonlocal index
-        clear_output()
-        if index >= len(eligible_df):
-            save_json_set(seen_sentences, seen_path)
-            save_json_set(known_words, known_path)
-            save_json_set(unknown_words, unknown_path)
+        nonlocal item
+        item = engine.next_item()  # prepared in the background while the previous paragraph was read
+        if item is None:
+            clear_output()
+            engine.save()
             print(f"✅ Finished {selected_bin}.")
             return launch_top_menu()
-        para = eligible_df.iloc[index]["korean"]
-        tokens = okt.morphs(para)
-        tokens = [t for t in tokens if re.search(r"[가-힣]", t) and len(t) > 1]
-        word_status = {t: ('green' if t in known_words else 'red' if t in unknown_words else 'grey') for t in tokens}
-        buttons = []
-        for t in tokens:
-            btn = widgets.Button(description=t,
-                                 layout=widgets.Layout(width='auto', height='auto', padding='1px', margin='1px'),
-                                 style={'button_color': color_for_status(word_status[t])})
-            def make_onclick(word):
-                def on_click(b):
-                    new = next_status(word_status[word])
-                    word_status[word] = new
-                    b.style.button_color = color_for_status(new)
-                return on_click
-            btn.on_click(make_onclick(t))
-            buttons.append(btn)
-        rows = [widgets.HBox(buttons[i:i+8]) for i in range(0, len(buttons), 8)]
-        mark_btn = widgets.Button(description="📌 Mark Seen & Next", button_style='success')
-        skip_btn = widgets.Button(description="➡️ Next", button_style='info')
-        quit_btn = widgets.Button(description="🚪 Quit", button_style='danger')
-        def on_mark(b):
-            seen_sentences.add(para)
-            update_globals()
-            next_para()
-        def on_skip(b):
-            update_globals()
-            next_para()
-        def update_globals():
-            for w, s in word_status.items():
-                if s == 'green':
-                    known_words.add(w)
-                    unknown_words.discard(w)
-                elif s == 'red':
-                    unknown_words.add(w)
-                    known_words.discard(w)
-        def next_para():
-            nonlocal index
-            index += 1
-            review_block()
-        mark_btn.on_click(on_mark)
-        skip_btn.on_click(on_skip)
-        quit_btn.on_click(lambda b: (clear_output(), print("👋 Exited session.")))
-        display(widgets.VBox([widgets.HTML(f"<pre>{para}</pre>")] + rows + [widgets.HBox([mark_btn, skip_btn, quit_btn])]))
+        view.show(f"<pre>{item['korean']}</pre>", item["tokens"], item["word_status"])
+    def on_mark():
+        engine.mark_seen(item["korean"])
+        engine.mark_all(item["word_status"])
+        review_block()
+    def on_skip():
+        engine.mark_all(item["word_status"])
+        review_block()
+    view.on("mark", on_mark)
+    view.on("skip", on_skip)
+    view.on("quit", lambda: (engine.close(), clear_output(), print("👋 Exited session.")))
+    clear_output()
+    display(view.widget)
     review_block()
 
-def korean_known_coverage(text):
-    tokens = okt.morphs(str(text))
-    tokens = [t for t in tokens if re.search(r"[가-힣]", t) and len(t) > 1]
-    known = [t for t in tokens if t in known_words]
-    return len(known) / len(tokens) * 100 if tokens else 0
-def color_for_status(s): return {'green': 'lightgreen', 'red': 'lightcoral', 'grey': 'lightgrey'}[s]
-def next_status(c): return {'grey': 'green', 'green': 'red', 'red': 'grey'}[c]
+def korean_tokens(text):
+    tokens = morphs(str(text))
+    return [t for t in tokens if re.search(r"[가-힣]", t) and len(t) > 1]
 
 # ✅ Go!
 start_menu()
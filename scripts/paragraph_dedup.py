@@ -0,0 +1,129 @@
+# %%
+# This module drops exact and near-duplicate paragraphs before they reach the tokenizer.
+#   Wikipedia articles repeat boilerplate, list items and almost identical paragraphs; tokenizing all of
+#   them skews the frequency counts and wastes JVM time. Exact duplicates are caught with a hash of the
+#   normalized text. Near duplicates are caught with MinHash signatures over character shingles, indexed
+#   with LSH (locality sensitive hashing) bands so that each paragraph is only compared with likely matches.
+#   The report tells how many paragraphs and characters were skipped, i.e. how much tokenization was avoided.
+
+import re
+import zlib
+import hashlib
+from collections import defaultdict
+import numpy as np
+
+# ✅ Default settings
+DEFAULT_THRESHOLD = 0.8   # estimated Jaccard similarity above which a paragraph is a near duplicate
+DEFAULT_NUM_PERM = 64     # number of MinHash permutations (signature length)
+DEFAULT_SHINGLE_SIZE = 5  # characters per shingle
+
+MERSENNE_PRIME = (1 << 31) - 1
+WHITESPACE = re.compile(r"\s+")
+
+# ✅ Text normalization + shingling
+def normalize(text):
+    return WHITESPACE.sub(" ", str(text)).strip().lower()
+
+def shingle_hashes(text, size=DEFAULT_SHINGLE_SIZE):
+    if len(text) <= size:
+        grams = {text}
+    else:
+        grams = {text[i:i + size] for i in range(len(text) - size + 1)}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+# ✅ LSH band layout
+def choose_bands(threshold, num_perm):
+    """Pick (bands, rows) with bands * rows == num_perm whose S-curve threshold (1/b)^(1/r) is closest."""
+    layouts = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return min(layouts, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+# ✅ Deduplicator
+class ParagraphDeduplicator:
+    """
+    Incremental deduplicator: call add(paragraph) for each paragraph in order,
+    it returns True when the paragraph is new and should be kept.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM,
+                 shingle_size=DEFAULT_SHINGLE_SIZE, seed=42):
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.bands, self.rows = choose_bands(threshold, num_perm)
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.exact = set()
+        self.buckets = [defaultdict(list) for _ in range(self.bands)]
+        self.signatures = []
+        self.report = {"paragraphs_in": 0, "kept": 0, "exact_duplicates": 0, "near_duplicates": 0,
+                       "chars_in": 0, "chars_skipped": 0}
+
+    def signature(self, text):
+        hashes = shingle_hashes(text, self.shingle_size) & np.uint64(MERSENNE_PRIME)
+        # (a * x + b) mod p for every permutation and shingle, then the minimum per permutation
+        return ((np.outer(self.a, hashes) + self.b[:, None]) % np.uint64(MERSENNE_PRIME)).min(axis=1)
+
+    def add(self, paragraph):
+        text = normalize(paragraph)
+        self.report["paragraphs_in"] += 1
+        self.report["chars_in"] += len(paragraph)
+
+        digest = hashlib.sha1(text.encode("utf-8")).digest()
+        if digest in self.exact:
+            return self._skip(paragraph, "exact_duplicates")
+
+        sig = self.signature(text)
+        keys = [sig[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+        candidates = {idx for band, key in zip(self.buckets, keys) for idx in band.get(key, ())}
+        for idx in candidates:
+            if np.mean(self.signatures[idx] == sig) >= self.threshold:
+                self.exact.add(digest)
+                return self._skip(paragraph, "near_duplicates")
+
+        idx = len(self.signatures)
+        self.signatures.append(sig)
+        for band, key in zip(self.buckets, keys):
+            band[key].append(idx)
+        self.exact.add(digest)
+        self.report["kept"] += 1
+        return True
+
+    def _skip(self, paragraph, reason):
+        self.report[reason] += 1
+        self.report["chars_skipped"] += len(paragraph)
+        return False
+
+# ✅ Batch helpers
+def dedup_paragraphs(paragraphs, **settings):
+    dedup = ParagraphDeduplicator(**settings)
+    kept = [p for p in paragraphs if dedup.add(p)]
+    return kept, dedup.report
+
+def dedup_articles(article_paragraphs, **settings):
+    """Deduplicate a {title: [paragraphs]} mapping across all articles, keeping its structure."""
+    dedup = ParagraphDeduplicator(**settings)
+    kept = {}
+    for title, paras in article_paragraphs.items():
+        paras = [p for p in paras if dedup.add(p)]
+        if paras:
+            kept[title] = paras
+    return kept, dedup.report
+
+def format_report(report):
+    skipped = report["paragraphs_in"] - report["kept"]
+    saved_pct = report["chars_skipped"] / report["chars_in"] * 100 if report["chars_in"] else 0
+    return (f"🧹 Dedup: kept {report['kept']}/{report['paragraphs_in']} paragraphs "
+            f"({report['exact_duplicates']} exact + {report['near_duplicates']} near duplicates removed). "
+            f"Skipped {skipped} paragraphs / {report['chars_skipped']} characters: "
+            f"{saved_pct:.1f}% less tokenization.")
+
+# %%
+if __name__ == "__main__":
+    import json
+    from pathlib import Path
+
+    input_file = Path("data/content/filtered_wikipedia_paragraphs.json")
+    with open(input_file, "r", encoding="utf-8") as f:
+        article_data = json.load(f)
+    _, report = dedup_articles(article_data)
+    print(format_report(report))
@@ -0,0 +1,87 @@
+# %%
+# This module holds the paragraph reader view shared by main.py, get_adapted_text.py and lyrics_pipeline.py.
+#   The readers used to clear the output and build a new Button (with a new closure) per token and new HBox rows for
+#   every paragraph, so the front end re-rendered the whole view at each click on "Next".
+#   ReaderView is displayed once and keeps a pool of token buttons and row containers: showing the next paragraph only
+#   changes the description, color and visibility of the buttons it needs (and hides the others). The pool only grows
+#   when a paragraph is longer than every previous one, so after the first few paragraphs nothing new is rendered.
+#   Clicking a token cycles its status (grey → green → red → grey) for every occurrence of the word in the paragraph.
+#   The session logic itself (statuses, prefetching of the next paragraphs) is headless, in session_engine.py.
+
+import ipywidgets as widgets
+
+# ✅ Token statuses
+STATUS_COLORS = {'green': 'lightgreen', 'red': 'lightcoral', 'grey': 'lightgrey'}
+NEXT_STATUS = {'grey': 'green', 'green': 'red', 'red': 'grey'}
+ROW_SIZE = 8
+HIDDEN, SHOWN = 'none', ''
+
+# ✅ Pooled reader view
+class ReaderView:
+    def __init__(self, actions, row_size=ROW_SIZE, colors=STATUS_COLORS, font_weight='', footer=()):
+        """actions: [(name, description, button_style), ...], bound with on(name, callback)."""
+        self.row_size = row_size
+        self.colors = colors
+        self.font_weight = font_weight
+        self.header = widgets.HTML()
+        self.grid = widgets.VBox()
+        self.buttons, self.rows = [], []
+        self.tokens, self.word_status = [], {}
+        self.callbacks = {}
+        self.action_buttons = {}
+        for name, description, style in actions:
+            button = widgets.Button(description=description, button_style=style)
+            button.on_click(lambda b, name=name: self.callbacks[name]() if name in self.callbacks else None)
+            self.action_buttons[name] = button
+        self.widget = widgets.VBox([self.header, self.grid, widgets.HBox(list(self.action_buttons.values()))]
+                                   + list(footer))
+
+    def on(self, name, callback):
+        self.callbacks[name] = callback
+
+    # ✅ Pool
+    def grow(self, size):
+        # New buttons are bound to their slot, never to a token, so they can be reused for any paragraph
+        if size <= len(self.buttons):
+            return
+        while len(self.buttons) < size:
+            button = widgets.Button(layout=widgets.Layout(width='auto', height='auto', padding='1px', margin='1px'))
+            button.style.font_weight = self.font_weight
+            button.on_click(lambda b, slot=len(self.buttons): self.toggle(slot))
+            self.buttons.append(button)
+        # The last existing row may have been partial: every row is refilled from its slice of the pool
+        n_rows = -(-size // self.row_size)
+        while len(self.rows) < n_rows:
+            self.rows.append(widgets.HBox())
+        for i, row in enumerate(self.rows):
+            children = tuple(self.buttons[i * self.row_size:(i + 1) * self.row_size])
+            if row.children != children:
+                row.children = children
+        self.grid.children = self.rows
+
+    def show(self, header, tokens, word_status):
+        """Reuse the pool for a new paragraph. word_status: {token: status}, updated in place by clicks."""
+        self.tokens, self.word_status = list(tokens), word_status
+        self.grow(len(self.tokens))
+        self.header.value = header
+        for i, button in enumerate(self.buttons):
+            if i < len(self.tokens):
+                token = self.tokens[i]
+                button.description = token
+                button.style.button_color = self.colors[word_status[token]]
+                button.layout.display = SHOWN
+            else:
+                button.layout.display = HIDDEN
+        n_rows = -(-len(self.tokens) // self.row_size)
+        for i, row in enumerate(self.rows):
+            row.layout.display = SHOWN if i < n_rows else HIDDEN
+
+    def toggle(self, slot):
+        if slot >= len(self.tokens):
+            return
+        word = self.tokens[slot]
+        self.word_status[word] = NEXT_STATUS[self.word_status[word]]
+        color = self.colors[self.word_status[word]]
+        for token, button in zip(self.tokens, self.buttons):
+            if token == word:
+                button.style.button_color = color
@@ -0,0 +1,338 @@
+# %%
+# This module is the headless core of the reading sessions: the corpus, coverage bins, word review, paragraph reading
+#   and the known / unknown / seen sets, without any ipywidgets. The notebook UIs (main.py, lyrics_pipeline.py) are
+#   thin views over a SessionEngine, so a session can also be scripted, load-tested and profiled without a browser.
+#     - TokenizedCorpus: the tokenized paragraphs, thread-safe so a background download can keep adding to it
+#     - SessionEngine: coverage_bins(), start_word_review() / start_reading(label), then next_item(),
+#       mark(token, status), mark_seen(text) and save()
+#   Every public engine call is timed; latency_report() gives p50 / p95 / p99 per call over the last calls, so latency
+#   regressions are visible in a scripted run (python session_engine.py).
+#   ParagraphPrefetcher prepares the next paragraphs (tokenization, status lookup) on a background thread while the
+#   current one is read, so "Next" is served from a small buffer. Every change to the known / unknown words bumps a
+#   vocab version; a prepared paragraph built at an older version is dropped only when one of the changed words is in it.
+
+import re
+import json
+import time
+import random
+import threading
+from bisect import bisect_left
+from collections import Counter, deque
+from functools import wraps
+
+# ✅ Settings
+COVERAGE_BINS = [0, 0.1, 20, 30, 40, 50, 60, 70, 80, 90, 92.9, 97, 99.9, 100]
+COVERAGE_LABELS = ["0%", "0.1%-20%", "20.1%-30%", "30.1%-40%", "40.1%-50%", "50.1%-60%",
+                   "60.1%-70%", "70.1%-80%", "80.1%-90%", "90.1%-92.9%", "93%-97%",
+                   "97.1%-99.9%", "100%"]
+LOOKAHEAD = 2        # paragraphs prepared ahead of the one on screen
+LATENCY_WINDOW = 1000  # calls kept per operation for the latency report
+KNOWN, UNKNOWN, NEUTRAL = 'green', 'red', 'grey'  # the statuses of the reader buttons
+
+# ✅ Token statuses
+def initial_status(token, known_words, unknown_words):
+    return 'green' if token in known_words else 'red' if token in unknown_words else 'grey'
+
+def apply_statuses(word_status, known_words, unknown_words):
+    """Copy the green / red statuses chosen in the reader to the known and unknown word sets.
+    Returns the words whose status actually changed."""
+    changed = set()
+    for word, status in word_status.items():
+        if status == 'green' and (word not in known_words or word in unknown_words):
+            known_words.add(word)
+            unknown_words.discard(word)
+            changed.add(word)
+        elif status == 'red' and (word not in unknown_words or word in known_words):
+            unknown_words.add(word)
+            known_words.discard(word)
+            changed.add(word)
+    return changed
+
+# ✅ Coverage
+def coverage_from_tokens(tokens, known_words):
+    known = [t for t in tokens if t in known_words]
+    return len(known) / len(tokens) * 100 if tokens else 0
+
+def coverage_bin_label(coverage, bins=COVERAGE_BINS, labels=COVERAGE_LABELS):
+    # Same bins as pd.cut(..., include_lowest=True): (low, high], the first bin including 0
+    return labels[max(bisect_left(bins, coverage) - 1, 0)]
+
+# ✅ Tokenizer calls from several threads
+def serialized(function):
+    """function behind a lock, so threads take turns calling it. konlpy's Okt goes through JPype into the JVM and
+    is not documented as safe to call concurrently: a prefetch thread and the foreground (or two feed threads)
+    must not run okt.morphs at the same time."""
+    lock = threading.Lock()
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        with lock:
+            return function(*args, **kwargs)
+    return wrapper
+
+# ✅ Background preparation of the next paragraphs
+class ParagraphPrefetcher:
+    def __init__(self, prepare, count, lookahead=LOOKAHEAD):
+        """prepare(index) → dict with at least "tokens" (the words its statuses depend on); runs on a worker thread."""
+        self.prepare = prepare
+        self.count = count
+        self.lookahead = lookahead
+        self.cond = threading.Condition()
+        self.ready = {}    # index → (vocab version, item)
+        self.failed = set()
+        self.changes = []  # [(version, changed words), ...] that produced version + 1
+        self.version = 0
+        self.inflight = None  # vocab version of the item the worker is preparing
+        self.current = -1
+        self.closed = False
+        self.stats = {"hits": 0, "misses": 0}
+        if lookahead:  # 0: every item is prepared on demand, without a thread (e.g. one engine per server learner)
+            threading.Thread(target=self.run, daemon=True).start()
+
+    def next_todo(self):
+        for index in range(self.current + 1, min(self.current + 1 + self.lookahead, self.count)):
+            if index not in self.ready and index not in self.failed:
+                return index
+        return None
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.closed and self.next_todo() is None:
+                    self.cond.wait()
+                if self.closed:
+                    return
+                index, version = self.next_todo(), self.version
+                self.inflight = version
+            try:
+                item = self.prepare(index)
+            except Exception:
+                item = None
+            with self.cond:
+                self.inflight = None
+                if item is None:
+                    self.failed.add(index)  # get() prepares it again in the foreground and shows the error there
+                elif index > self.current:
+                    self.ready[index] = (version, item)
+
+    def is_fresh(self, version, item):
+        tokens = set(item["tokens"])
+        return all(not (words & tokens) for v, words in self.changes if v >= version)
+
+    def get(self, index):
+        """The prepared item of index (prepared now when it is not buffered or is stale); moves the lookahead on."""
+        with self.cond:
+            entry = self.ready.pop(index, None)
+            fresh = entry is not None and self.is_fresh(*entry)
+            self.current = index
+            self.failed.discard(index)
+            self.ready = {i: e for i, e in self.ready.items() if i > index}
+            self.prune()
+            self.cond.notify()
+        self.stats["hits" if fresh else "misses"] += 1
+        return entry[1] if fresh else self.prepare(index)
+
+    def vocab_changed(self, words):
+        words = set(words)
+        if not words:
+            return
+        with self.cond:
+            self.changes.append((self.version, words))
+            self.version += 1
+            self.ready = {i: e for i, e in self.ready.items() if self.is_fresh(*e)}
+            self.prune()
+            self.cond.notify()
+
+    def prune(self):
+        # Changes older than every buffered or in-flight item can no longer make one stale
+        versions = [version for version, _ in self.ready.values()] + [self.version]
+        oldest = min(versions if self.inflight is None else versions + [self.inflight])
+        self.changes = [(v, words) for v, words in self.changes if v >= oldest]
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+
+# ✅ Corpus
+class TokenizedCorpus:
+    def __init__(self, rows=()):
+        """rows: [{"korean": paragraph, "tokens": [...]}, ...]"""
+        self.rows = list(rows)
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        with self.lock:
+            return len(self.rows)
+
+    def extend(self, rows):
+        with self.lock:
+            self.rows.extend(rows)
+
+    def clear(self):
+        with self.lock:
+            self.rows.clear()
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.rows)
+
+# ✅ Engine
+def timed(method):
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.latency.setdefault(method.__name__, deque(maxlen=LATENCY_WINDOW)).append(time.perf_counter() - start)
+    return wrapper
+
+def percentile(sorted_values, q):
+    return sorted_values[min(int(q * len(sorted_values)), len(sorted_values) - 1)]
+
+class SessionEngine:
+    def __init__(self, corpus, known_words, unknown_words, seen_sentences, save_paths=None,
+                 bins=COVERAGE_BINS, labels=COVERAGE_LABELS, skip_seen=True, lookahead=LOOKAHEAD):
+        """save_paths: {"known": path, "unknown": path, "seen": path}, written by save(); None keeps it in memory."""
+        self.corpus = corpus
+        self.known_words, self.unknown_words, self.seen_sentences = known_words, unknown_words, seen_sentences
+        self.save_paths = save_paths or {}
+        self.bins, self.labels = bins, labels
+        self.skip_seen = skip_seen
+        self.lookahead = lookahead
+        self.mode, self.queue, self.cursor = None, [], 0
+        self.prefetcher = None
+        self.latency = {}
+
+    # ✅ Coverage
+    def coverage(self, tokens):
+        return coverage_from_tokens(tokens, self.known_words)
+
+    def bin_of(self, tokens):
+        return coverage_bin_label(self.coverage(tokens), self.bins, self.labels)
+
+    @timed
+    def coverage_bins(self, rows=None):
+        """{label: number of paragraphs} over the corpus (or the given rows), every label present."""
+        counts = Counter({label: 0 for label in self.labels})
+        counts.update(self.bin_of(row["tokens"]) for row in (self.corpus.snapshot() if rows is None else rows))
+        return counts
+
+    # ✅ Sessions
+    @timed
+    def start_word_review(self, tokens=None):
+        """Review words one by one: the given ones, or the corpus tokens by frequency that are neither known nor
+        unknown yet. Returns the number of words."""
+        self.close()
+        if tokens is None:
+            token_freq = Counter(t for row in self.corpus.snapshot() for t in row["tokens"])
+            tokens = [t for t, _ in token_freq.most_common() if t not in self.known_words and t not in self.unknown_words]
+        self.mode, self.queue, self.cursor = "word", list(tokens), 0
+        return len(self.queue)
+
+    @timed
+    def start_reading(self, label):
+        """Read the paragraphs of a coverage bin (not seen yet, unless skip_seen is off). Returns their number."""
+        self.close()
+        self.queue = [row for row in self.corpus.snapshot() if self.bin_of(row["tokens"]) == label
+                      and not (self.skip_seen and row["korean"] in self.seen_sentences)]
+        self.mode, self.cursor = "paragraph", 0
+        self.prefetcher = ParagraphPrefetcher(self.prepare_paragraph, len(self.queue), self.lookahead)
+        return len(self.queue)
+
+    def prepare_paragraph(self, i):
+        row = self.queue[i]
+        return {"kind": "paragraph", "korean": row["korean"], "tokens": row["tokens"],
+                "word_status": {t: initial_status(t, self.known_words, self.unknown_words) for t in row["tokens"]}}
+
+    @timed
+    def next_item(self):
+        """The next word ({"kind": "word", "token"}) or paragraph ({"kind": "paragraph", "korean", "tokens",
+        "word_status"}) of the session, with its position and total; None when the session is over."""
+        if self.cursor >= len(self.queue):
+            self.close()
+            return None
+        if self.mode == "word":
+            item = {"kind": "word", "token": self.queue[self.cursor]}
+        else:
+            item = self.prefetcher.get(self.cursor)
+        self.cursor += 1
+        return dict(item, position=self.cursor, total=len(self.queue))
+
+    def remaining(self):
+        return len(self.queue) - self.cursor
+
+    # ✅ State updates
+    @timed
+    def mark(self, token, status):
+        """Set a word to KNOWN or UNKNOWN (NEUTRAL leaves it as it is). Returns True when its status changed."""
+        return bool(self.apply({token: status}))
+
+    @timed
+    def mark_all(self, word_status):
+        """Apply the statuses of a whole paragraph at once. Returns the words whose status changed."""
+        return self.apply(word_status)
+
+    def apply(self, word_status):
+        changed = apply_statuses(word_status, self.known_words, self.unknown_words)
+        if self.prefetcher is not None:
+            self.prefetcher.vocab_changed(changed)
+        return changed
+
+    @timed
+    def mark_seen(self, text):
+        self.seen_sentences.add(text)
+
+    @timed
+    def save(self):
+        for name, words in [("known", self.known_words), ("unknown", self.unknown_words),
+                            ("seen", self.seen_sentences)]:
+            path = self.save_paths.get(name)
+            if path is not None:
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(sorted(list(words)), f, ensure_ascii=False, indent=2)
+
+    def close(self):
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+            self.prefetcher = None
+
+    # ✅ Profiling
+    def latency_report(self):
+        """{operation: {"calls", "p50_ms", "p95_ms", "p99_ms"}} over the last LATENCY_WINDOW calls of each."""
+        report = {}
+        for name, durations in self.latency.items():
+            values = sorted(durations)
+            report[name] = {"calls": len(values),
+                            **{f"p{q}_ms": round(percentile(values, q / 100) * 1000, 3) for q in (50, 95, 99)}}
+        return report
+
+if __name__ == "__main__":
+    # ✅ Scripted session over the downloaded paragraphs, without a browser
+    #   (whitespace tokens stand in for Okt here, so the script runs without the JVM)
+    from article_store import DEFAULT_JSON  # the paragraphs file main.py and learner_server.py read
+    with open(DEFAULT_JSON, "r", encoding="utf-8") as f:
+        paragraphs = [p for paras in json.load(f).values() for p in paras if p.strip()]
+    corpus = TokenizedCorpus({"korean": p, "tokens": [t for t in p.split() if re.search("[가-힣]", t)]}
+                             for p in paragraphs)
+    engine = SessionEngine(corpus, set(), set(), set())
+
+    random.seed(0)
+    engine.start_word_review()
+    for _ in range(2000):
+        item = engine.next_item()
+        if item is None:
+            break
+        engine.mark(item["token"], KNOWN if random.random() < 0.7 else UNKNOWN)
+
+    bins = engine.coverage_bins()
+    label = max(bins, key=bins.get)
+    print(f"📊 {len(corpus)} paragraphs, most in {label} ({bins[label]})")
+    engine.start_reading(label)
+    while (item := engine.next_item()) is not None:
+        engine.mark_all({t: KNOWN for t in item["tokens"][:3]})
+        engine.mark_seen(item["korean"])
+
+    for name, stats in engine.latency_report().items():
+        print(f"⏱️ {name:>18}: {stats}")
@@ -0,0 +1,121 @@
+# %%
+# Tests of genius_harvester.py against a local stand-in for the Genius API and the lyrics pages (two servers, so the
+#   API and the pages are two hosts as on genius.com). The stand-in pages the artist catalog, answers some requests
+#   with 429 / 5xx the first time to exercise the retries, and serves Lyrics__Container pages.
+#   Run from scripts/ or from the repository root: python -m pytest -q scripts/test_genius_harvester.py
+
+import json
+import time
+import threading
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl
+import pytest
+from http_cache import make_session
+from lyrics_store import load_artist_songs
+from genius_harvester import GeniusHarvester, RateLimiter, REQUESTS_PER_SECOND
+
+ARTIST_ID, OTHER_ID = 7, 8
+SONGS = 40
+PAGE_SIZE = 15  # smaller than the per_page the harvester asks for, as when the API caps it
+FAILING = {"/artists/7/songs?page=2": 429, "/songs/3": 503, "/page/5": 500}  # first request only
+
+# ✅ Stand-in server
+class StandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def send(self, status, body="", content_type="application/json", headers=()):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = dict(parse_qsl(url.query))
+        key = url.path + (f"?page={params['page']}" if "page" in params else "")
+        with self.server.lock:
+            self.server.requests[key] += 1
+            first = self.server.requests[key] == 1
+        if first and key in FAILING:
+            self.send(FAILING[key], headers=[("Retry-After", "0")])
+        elif url.path == "/search":
+            hits = [{"result": {"id": 0, "primary_artist": {"id": ARTIST_ID, "name": "Stand-in Artist"}}}]
+            self.send(200, json.dumps({"response": {"hits": hits}}))
+        elif url.path == f"/artists/{ARTIST_ID}/songs":
+            page = int(params["page"])
+            ids = list(range(SONGS))[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]
+            next_page = page + 1 if page * PAGE_SIZE < SONGS else None
+            self.send(200, json.dumps({"response": {"songs": [self.server.song(i) for i in ids],
+                                                    "next_page": next_page}}))
+        elif url.path.startswith("/songs/"):
+            self.send(200, json.dumps({"response": {"song": self.server.song(int(url.path.split("/")[-1]))}}))
+        elif url.path.startswith("/page/"):
+            i = url.path.split("/")[-1]
+            self.send(200, f'<html><body><div class="Lyrics__Container-sc-1">[Verse 1]<br/>노래 {i}<br/>'
+                           f'<span>hello</span></div></body></html>', "text/html; charset=utf-8")
+        else:
+            self.send(404)
+
+def start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    server.requests, server.lock = Counter(), threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+@pytest.fixture
+def servers():
+    api, pages = start_server(), start_server()
+    pages_url = f"http://127.0.0.1:{pages.server_address[1]}"
+    # Every fifth song is a feature: its primary artist is someone else
+    api.song = lambda i: {"id": i, "full_title": f"Song {i} by Stand-in Artist", "url": f"{pages_url}/page/{i}",
+                          "primary_artist": {"id": OTHER_ID if i % 5 == 4 else ARTIST_ID, "name": "Stand-in Artist"}}
+    yield api, pages
+    api.shutdown()
+    pages.shutdown()
+
+def make_harvester(api, rate=REQUESTS_PER_SECOND):
+    return GeniusHarvester(token="test-token", base_url=f"http://127.0.0.1:{api.server_address[1]}", rate=rate,
+                           session=make_session(pool_size=8, backoff=0))
+
+# ✅ Rate limiter
+def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(50)
+    start = time.monotonic()
+    for _ in range(11):
+        limiter.wait()
+    assert time.monotonic() - start >= 10 / 50 - 0.01
+
+# ✅ Paging, retries and throughput
+def test_harvest_artist_pages_and_retries(servers, tmp_path):
+    api, pages = servers
+    start = time.perf_counter()
+    artist, count = make_harvester(api).harvest_artist("Stand-in Artist", tmp_path)
+    elapsed = time.perf_counter() - start
+
+    songs = load_artist_songs(artist, tmp_path)
+    expected = [i for i in range(SONGS) if i % 5 != 4]
+    assert count == len(songs) == len(expected)
+    assert sorted(int(song["URL"].rsplit("/", 1)[1]) for song in songs) == expected
+    assert all(song["Lyrics"] == f"노래 {song['URL'].rsplit('/', 1)[1]}\nhello" for song in songs)
+    # Every catalog page was read, and each failing request was retried once
+    assert [api.requests[f"/artists/{ARTIST_ID}/songs?page={p}"] for p in (1, 2, 3)] == [1, 2, 1]
+    assert api.requests["/songs/3"] == 2 and pages.requests["/page/5"] == 2
+    # 32 songs: 38 API requests and 33 pages at 10 requests/s per host, i.e. dozens of songs in a few seconds
+    assert elapsed < 8, f"{count} songs took {elapsed:.1f}s"
+
+def test_harvest_artist_skips_songs_in_the_shard(servers, tmp_path):
+    api, pages = servers
+    harvester = make_harvester(api, rate=0)
+    harvester.harvest_artist("Stand-in Artist", tmp_path)
+    before = sum(pages.requests.values())
+    artist, count = harvester.harvest_artist("Stand-in Artist", tmp_path)
+    assert count == len(load_artist_songs(artist, tmp_path))
+    assert sum(pages.requests.values()) == before
@@ -0,0 +1,41 @@
+# %%
+# Tests of the record / replay layer of http_cache.py.
+#   Run from scripts/ or from the repository root: python -m pytest -q scripts/test_http_cache.py
+
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from http_cache import CachedSession, store_response, load_response
+
+def make_response(body, url="https://genius.com/page/1"):
+    response = requests.Response()
+    response.status_code, response.reason, response.url = 200, "OK", url
+    response.headers["Content-Type"] = "text/html; charset=utf-8"
+    response._content = body.encode("utf-8")
+    return response
+
+def test_store_and_load_round_trip(tmp_path):
+    session = CachedSession(mode="record", cache_dir=tmp_path)
+    path = session.cache_path("GET", "https://genius.com/page/1")
+    store_response(make_response("<p>노래</p>"), path)
+    loaded = load_response(path)
+    assert loaded.status_code == 200 and loaded.text == "<p>노래</p>"
+    assert session.is_cached("GET", "https://genius.com/page/1") is False  # record mode never serves
+    assert CachedSession(mode="replay", cache_dir=tmp_path).is_cached("GET", "https://genius.com/page/1")
+
+def test_concurrent_writers_of_one_key(tmp_path):
+    # Workers recording the same URL at once (duplicate hits, a song in two catalogs) must each write a whole file
+    path = tmp_path / "genius.com" / "ab" / "key.json"
+    bodies = [f"<p>{'가' * 20_000} {i}</p>" for i in range(16)]
+    barrier = threading.Barrier(8)
+
+    def record(body):
+        barrier.wait()
+        store_response(make_response(body), path)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(record, bodies[:8]))
+        barrier.reset()
+        list(pool.map(record, bodies[8:16]))
+    assert load_response(path).text in bodies
+    assert [p.name for p in path.parent.iterdir()] == ["key.json"]
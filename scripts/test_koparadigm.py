@@ -0,0 +1,129 @@
+# %%
+# Regression tests for the KoParadigm modules (rule engine, lexicon, inverse rules).
+#   Run from scripts/ or from the repository root: python -m pytest -q scripts/test_koparadigm.py
+#   The data paths of the modules are relative to scripts/, so the tests run from there.
+
+import os
+import json
+from pathlib import Path
+import pytest
+from hangul import to_jamo
+from koparadigm_bundle import open_bundle
+from koparadigm_rules import STRAY_JAMO, conjugate, generate_forms
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+@pytest.fixture(scope="module", autouse=True)
+def in_scripts_dir():
+    cwd = os.getcwd()
+    os.chdir(SCRIPTS_DIR)
+    yield
+    os.chdir(cwd)
+
+@pytest.fixture(scope="module")
+def bundle():
+    return open_bundle()
+
+def forms_of(bundle, verb):
+    """Every surface form of a verb, over all its classes."""
+    verbs, classes = bundle.verbs.tolist(), bundle.verb_classes.tolist()
+    verb_classes = [c for v, c in zip(verbs, classes) if v == verb]
+    assert verb_classes, f"{verb} is not a KoParadigm verb"
+    paradigms = conjugate(verb, verb_classes, bundle.ending_list(), bundle.template().as_dict())
+    return {form for _, pairs in paradigms for _, forms in pairs for form in forms.split("/")}
+
+# ✅ Rule engine
+def test_contraction_patterns_are_jamo():
+    from koparadigm_rules import CONTRACTIONS
+    for untouched, contraction, _ in CONTRACTIONS:
+        assert to_jamo(untouched) == untouched and to_jamo(contraction) == contraction
+
+def test_hada_contracts_to_hae(bundle):
+    forms = forms_of(bundle, "공부하")
+    assert {"공부해요", "공부하여요", "공부했", "공부하였", "공부해서"} <= forms
+
+def test_oda_contracts_to_wa(bundle):
+    forms = forms_of(bundle, "오")
+    assert {"와요", "왔", "와서"} <= forms
+    assert "오아요" not in forms
+
+def test_generated_forms_are_composed(bundle):
+    verbs, classes = bundle.verbs.tolist(), bundle.verb_classes.tolist()
+    sample = list(range(0, len(verbs), 97))
+    endings, rules = bundle.ending_list(), bundle.template().as_dict()
+    count = 0
+    for _, _, forms in generate_forms([verbs[i] for i in sample], [classes[i] for i in sample], endings, rules):
+        assert not any(STRAY_JAMO.search(form) for form in forms)
+        count += len(forms)
+    assert count > 0
+
+# ✅ Lexicon
+@pytest.fixture(scope="module")
+def lexicon(bundle):
+    from koparadigm_lexicon import open_lexicon
+    lexicon = open_lexicon()
+    yield lexicon
+    lexicon.close()
+
+def lemmas(entries):
+    return {entry[0] for entry in entries}
+
+def test_lexicon_looks_up_hada_forms(lexicon):
+    assert "공부하" in lemmas(lexicon.lookup("공부해요"))
+    assert "공부하" in lemmas(lexicon.lookup("공부하여요"))
+    assert "하" in lemmas(lexicon.lookup("해요"))
+    assert "공부하" in lemmas(lexicon.lookup("공부했"))
+
+def test_lexicon_looks_up_contracted_forms(lexicon):
+    assert "오" in lemmas(lexicon.lookup("와요"))
+    assert "오" in lemmas(lexicon.lookup("왔"))
+    assert "가" in lemmas(lexicon.lookup("갔"))
+
+def test_lexicon_looks_up_stacked_endings(lexicon):
+    assert ("공부하", "였어요") in {entry[:2] for entry in lexicon.lookup("공부했어요")}
+    assert "가" in lemmas(lexicon.lookup("갔어요"))
+    assert "먹" in lemmas(lexicon.lookup("먹었다"))
+    assert lexicon.lookup("공부했어요요") == []
+
+def test_lexicon_has_no_uncomposed_forms(lexicon):
+    assert lexicon.lookup("공부하ᅧ요") == [] and "공부하ᅧ요" not in lexicon
+
+# ✅ Inverse rules
+@pytest.fixture(scope="module")
+def inverse_rules(bundle):
+    from koparadigm_lookup import InverseRules
+    return InverseRules.from_bundle(bundle)
+
+def analyses(inverse_rules, word):
+    return {(lemma, ending) for lemma, _, ending, _, _ in inverse_rules.stems(word)}
+
+def test_inverse_hae_contraction(inverse_rules):
+    assert ("공부하", "여요") in analyses(inverse_rules, "공부해요")
+    assert ("하", "여요") in analyses(inverse_rules, "해요")
+    assert ("공부하", "였") in analyses(inverse_rules, "공부했")
+
+def test_inverse_wa_contraction(inverse_rules):
+    assert ("오", "아요") in analyses(inverse_rules, "와요")
+    assert ("오", "았") in analyses(inverse_rules, "왔")
+
+def test_inverse_stacked_endings(inverse_rules):
+    assert ("공부하", "였어요") in analyses(inverse_rules, "공부했어요")
+    assert ("가", "았어요") in analyses(inverse_rules, "갔어요")
+
+def test_inverse_rules_match_the_lexicon(inverse_rules, lexicon):
+    for word in ["공부해요", "공부했어요", "와요", "왔다", "갔어요", "하면서", "먹었다", "좋습니다", "해서"]:
+        assert {entry[:2] for entry in lexicon.lookup(word)} == analyses(inverse_rules, word), word
+
+# ✅ Lemmatizer cache
+def test_lemma_cache_evicts_the_least_recently_used(tmp_path):
+    from lemmatizer import Lemmatizer
+    cache_path = tmp_path / "lemma_cache.json"
+    def stored():
+        return list(json.loads(cache_path.read_text(encoding="utf-8"))["lemmas"])
+
+    Lemmatizer(cache_path, store_size=3).lemmatize_many(["갔어요", "먹었다", "해요"])
+    lemmatizer = Lemmatizer(cache_path, store_size=3)
+    assert lemmatizer.lemmatize_many(["갔어요"]) == ["가"]  # a run of cache hits still saves the new order
+    assert lemmatizer.stats["analyzed"] == 0 and stored() == ["먹었다", "해요", "갔어요"]
+    Lemmatizer(cache_path, store_size=3).lemmatize_many(["좋습니다"])
+    assert stored() == ["해요", "갔어요", "좋습니다"]
@@ -0,0 +1,89 @@
+# %%
+# Tests of the request validation of learner_server.py: every malformed request is a 400 that changes nothing,
+#   over dispatch() and over a real connection for what only handle() sees (request line, Content-Length, head size).
+#   Run from scripts/ or from the repository root: python -m pytest -q scripts/test_learner_server.py
+
+import json
+import asyncio
+import pytest
+from learner_server import LearnerServer
+from session_engine import TokenizedCorpus, KNOWN
+
+ROWS = [{"korean": "나는 학교에 갑니다", "tokens": ["학교에", "갑니다"]},
+        {"korean": "오늘 날씨가 좋아요", "tokens": ["오늘", "날씨가", "좋아요"]}]
+
+@pytest.fixture
+def server(tmp_path):
+    return LearnerServer(TokenizedCorpus(ROWS), tmp_path / "learners")
+
+def post(server, path, body):
+    return server.dispatch("POST", path, json.dumps(body).encode("utf-8"))
+
+# ✅ Fields
+@pytest.mark.parametrize("path, body", [
+    ("/seen", {"learner": 5, "korean": "x"}),
+    ("/seen", {"learner": ["a"], "korean": "x"}),
+    ("/seen", {"learner": None, "korean": "x"}),
+    ("/seen", {"learner": "a/b", "korean": "x"}),
+    ("/seen", {"learner": "a"}),
+    ("/seen", {"learner": "a", "korean": ""}),
+    ("/seen", {"learner": "a", "korean": ["x"]}),
+    ("/mark", {"learner": "a", "status": KNOWN}),
+    ("/mark", {"learner": "a", "token": 3, "status": KNOWN}),
+    ("/mark", {"learner": "a", "token": "오늘", "status": "blue"}),
+    ("/mark", {"learner": "a", "token": "오늘"}),
+    ("/mark", {"learner": "a", "statuses": ["오늘"]}),
+    ("/mark", {"learner": "a", "statuses": {"": KNOWN}}),
+    ("/mark", {"learner": "a", "statuses": {"오늘": None}}),
+])
+def test_malformed_fields_are_rejected(server, path, body):
+    status, payload = post(server, path, body)
+    assert status == 400 and "error" in payload
+    engine = server.learners.engines.get("a")
+    assert not server.learners.dirty
+    assert engine is None or not (engine.known_words or engine.unknown_words or engine.seen_sentences)
+
+@pytest.mark.parametrize("query", ["", "?learner=5&bin=nope", "?bin=0%-50%"])
+def test_malformed_next_is_rejected(server, query):
+    assert server.dispatch("GET", "/next" + query, b"")[0] == 400
+
+@pytest.mark.parametrize("body", [b"not json", b"[1, 2]", b'"text"'])
+def test_body_must_be_a_json_object(server, body):
+    assert server.dispatch("POST", "/seen", body)[0] == 400
+
+def test_valid_requests(server):
+    assert post(server, "/mark", {"learner": "a", "statuses": {"오늘": KNOWN}}) == (200, {"changed": ["오늘"]})
+    assert post(server, "/seen", {"learner": "a", "korean": ROWS[0]["korean"]}) == (200, {"ok": True})
+    assert server.learners.dirty == {"a"}
+
+# ✅ Saving
+def test_one_failing_learner_does_not_block_the_others(server, tmp_path):
+    for learner in ("a", "b"):
+        post(server, "/seen", {"learner": learner, "korean": ROWS[0]["korean"]})
+    def fail():
+        raise OSError("disk full")
+    server.learners.engines["a"].save = fail
+    server.learners.save()
+    assert server.learners.dirty == {"a"}
+    assert json.loads((tmp_path / "learners" / "b" / "seen.json").read_text(encoding="utf-8")) == [ROWS[0]["korean"]]
+
+# ✅ Connections
+async def exchange(server, data, limit=1024):
+    listener = await asyncio.start_server(server.handle, "127.0.0.1", 0, limit=limit)
+    async with listener:
+        reader, writer = await asyncio.open_connection(*listener.sockets[0].getsockname())
+        writer.write(data)
+        await writer.drain()
+        head = await reader.readuntil(b"\r\n\r\n")
+        writer.close()
+    return int(head.split(b" ", 2)[1]), head
+
+@pytest.mark.parametrize("data", [
+    b"GARBAGE\r\n\r\n",
+    b"POST /seen HTTP/1.1\r\nContent-Length: abc\r\n\r\n",
+    b"POST /seen HTTP/1.1\r\nContent-Length: -5\r\n\r\n",
+    b"GET /stats HTTP/1.1\r\nX-Padding: " + b"x" * 2000 + b"\r\n\r\n",
+])
+def test_malformed_requests_get_a_400_and_close(server, data):
+    status, head = asyncio.run(exchange(server, data))
+    assert status == 400 and b"Connection: close" in head
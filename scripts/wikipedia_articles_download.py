@@ -1,17 +1,19 @@
 # This code sets up a Korean WIkipedia API, loads a list of selected wikipedia article titles and extracts paragraphs from each article.
-#   It fetches the full article text and splits the article into paragraphs by newline characters and filters out empty lines. 
-#   By looping over each titles, it populates a dictionary, mapping paragraphs to their articles.
-#   Finally, it saves the extracted paragraphs into a json file. 
+#   It fetches the full article text and splits the article into paragraphs by newline characters and filters out empty lines.
+#   Each article is appended to a JSONL file as soon as it is fetched, so an interrupted crawl can be resumed:
+#   with RESUME = True, the titles already present in the JSONL are skipped.
+#   Finally, the JSONL is compacted into the json file mapping paragraphs to their articles.
+#   Requests go through the shared HTTP layer: run with HTTP_CACHE_MODE=record once, then HTTP_CACHE_MODE=replay
+#   to rerun the whole crawl offline.
 
 # 📄 Extract paragraphs for selected articles from saved list
-import wikipediaapi
-import pandas as pd
 import json
 from tqdm import tqdm
 from pathlib import Path
+from article_store import WikipediaClient, get_paragraphs, downloaded_titles, open_jsonl, append_article, compact_jsonl
 
 # 🌐 Set up Wikipedia API (Korean)
-wiki_kr = wikipediaapi.Wikipedia(
+wiki_kr = WikipediaClient(
     language='ko',
     user_agent='Yannis-KoreanCorpus/1.0 (contact: yannisdaguenet@gmail.com)'
 )
@@ -19,27 +21,29 @@ wiki_kr = wikipediaapi.Wikipedia(
 # 📥 Load list of selected articles
 JSON_DIR = Path("data/json")
 input_file = JSON_DIR / "selected_articles.json"
+stream_file = JSON_DIR / "selected_wikipedia_paragraphs.jsonl"
 output_file = JSON_DIR / "selected_wikipedia_paragraphs.json"
+RESUME = True  # set to False to start a fresh crawl
 
 with open(input_file, "r", encoding="utf-8") as f:
     selected_titles = json.load(f)
 
-# 🔍 Extract paragraphs
-article_paragraphs = {}
-
-def get_paragraphs(title):
-    page = wiki_kr.page(title)
-    if not page.exists():
-        return []
-    return [p.strip() for p in page.text.split("\n") if p.strip()]
-
-for title in tqdm(selected_titles):
-    paras = get_paragraphs(title)
-    if paras:
-        article_paragraphs[title] = paras
-
-# 💾 Save extracted paragraphs
-with open(output_file, "w", encoding="utf-8") as f:
-    json.dump(article_paragraphs, f, ensure_ascii=False, indent=2)
-
-print(f"✅ Saved extracted paragraphs to: {output_file.resolve()}")
+# ⏭️ Skip titles that were already fetched by a previous run
+done = downloaded_titles(stream_file) if RESUME else set()
+remaining = [t for t in dict.fromkeys(selected_titles) if t not in done]
+print(f"🔁 {len(done)} articles already downloaded, {len(remaining)} to fetch.")
+
+# 🔍 Extract paragraphs, streaming each article to disk
+with open_jsonl(stream_file, resume=RESUME) as f:
+    for title in tqdm(remaining):
+        try:
+            paras = get_paragraphs(wiki_kr, title)
+        except Exception as e:
+            # Usually a network error or a rate limit: stop here and resume later
+            print(f"⚠️ Stopped at '{title}': {e}. Run again to resume.")
+            break
+        append_article(f, title, paras)
+
+# 💾 Compact into the legacy paragraphs file
+count = compact_jsonl(stream_file, output_file, titles=selected_titles)
+print(f"✅ Saved {count} articles of extracted paragraphs to: {output_file.resolve()}")